@@ -0,0 +1,65 @@
+###### Pipeline checkpoints
+# Every stage of run_pipeline_entry stores its output as ./checkpoints/<modelName>/<stage>.json, together with a
+# hash of the inputs it was computed from. When resuming, a stage whose inputs hash to the stored value is skipped
+# and its stored output is reused, so a restarted run picks up at the first stage that did not finish.
+import os
+import re
+import json
+import hashlib
+import datetime
+
+CHECKPOINT_DIR = os.environ.get("PIPELINE_CHECKPOINT_DIR", "./checkpoints")
+
+
+def inputs_hash(*inputs):
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _checkpoint_path(model_name, stage, checkpoint_dir=None):
+    model_dir = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+    return os.path.join(checkpoint_dir or CHECKPOINT_DIR, model_dir, f"{stage}.json")
+
+
+def load_checkpoint(model_name, stage, input_hash, checkpoint_dir=None):
+    """
+    Return the stored output of `stage`, or None if there is none or it was computed from different inputs.
+    """
+    try:
+        with open(_checkpoint_path(model_name, stage, checkpoint_dir), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if checkpoint.get('inputHash') != input_hash:
+        return None
+    print(f"Resuming from checkpoint: {model_name}/{stage} ({checkpoint.get('timestamp')})")
+    return checkpoint.get('output')
+
+
+def save_checkpoint(model_name, stage, input_hash, output, checkpoint_dir=None):
+    checkpoint_path = _checkpoint_path(model_name, stage, checkpoint_dir)
+    try:
+        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        checkpoint = {
+            'stage': stage,
+            'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'inputHash': input_hash,
+            'output': output
+        }
+        # Write then rename, so a run killed mid-write never leaves a truncated checkpoint behind
+        tmp_path = f"{checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, checkpoint_path)
+    except Exception as e:
+        print(f"Error saving checkpoint {checkpoint_path}: {e}")
+
+
+def discard_checkpoint(model_name, stage, checkpoint_dir=None):
+    """
+    Remove the stored output of `stage`, e.g. when it no longer holds up.
+    """
+    try:
+        os.remove(_checkpoint_path(model_name, stage, checkpoint_dir))
+    except FileNotFoundError:
+        pass
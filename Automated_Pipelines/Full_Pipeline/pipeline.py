@@ -1,26 +1,40 @@
 ###### pipline
 import json
-import time
 import datetime
 import os
-from openai import OpenAI
-
-import anthropic
-import subprocess
+import sys
+import argparse
 import re
-
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-openai_key = os.environ["OPENAI_API_KEY"]
-claude_key = os.environ["CLAUDE_API_KEY"]
-
-client = OpenAI(
-    api_key=openai_key,
+import shutil
+import contextvars
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+# Read-only inputs (syntax notes, RAG database) are resolved from here, so the pipeline can run from any working directory
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+# PAT runs, LLM calls, tracing, history logs and RAG retrieval are shared with the Interface, in ../../Shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(PIPELINE_DIR)), 'Shared'))
+
+from pat_runner import (
+    PAT_MAX_WORKERS, PAT_SINGLE_LAUNCH, group_code_by_engine, run_verifications, select_engine, split_assertion_outputs,
+    split_code_and_assertions
 )
-
-client_claude = anthropic.Anthropic(api_key=claude_key)
-
+import tracing
+from pat_output import format_trace, parse_assertion_output, total_visited_states
+from pat_cache import PAT_CACHE_ENABLED, cache_get, cache_key, cache_put, get_cache_dir, get_pat_version
+from pat_deps import PAT_INCREMENTAL, affected_blocks
+import llm_client
+import rag_index
+from history_store import append_record_async
+from checkpoints import discard_checkpoint, inputs_hash, load_checkpoint, save_checkpoint
+
+RAG_DATABASE_PATH = os.path.join(PIPELINE_DIR, 'database-rag-claude.json')
+# Add the NL annotation and code of every verified entry to the RAG database (off by default, so runs stay comparable)
+RAG_ADD_VERIFIED = os.environ.get("RAG_ADD_VERIFIED", "0") == "1"
+# Refinement candidates requested at once in each refinement round and verified in parallel; the one with the fewest
+# remaining mismatches is kept (1: one candidate per round)
+REFINE_CANDIDATES = int(os.environ.get("REFINE_CANDIDATES", 1))
 
 ### read ./test-automated-pipeline.json
 
@@ -34,12 +48,16 @@ client_claude = anthropic.Anthropic(api_key=claude_key)
 # refine.html: lines 208 - 233 + lines 237 - 305 + lines 319 - 350, similarly, **automatically select the longest chunk of code** and proceed to verify.html (if no code blocks or syntax error: trigger regeneration, regeneration constrained to 3 times?): based on the previous code and verification results
 
 def get_LLM_answers(question, context, history):
+    return llm_client.run(get_LLM_answers_async(question, context, history))
+
+async def get_LLM_answers_async(question, context, history):
     if question:
         try:
-            # Get model response
-            completion = client.chat.completions.create(
+            # Get model response; the planning prompts are sent once per model, so a rerun can reuse the answer
+            completion = await llm_client.openai_chat(
                 model="o3-mini-2025-01-31",
                 reasoning_effort="high",
+                cache=True,
                 messages=[
                     {
                         "role": "user",
@@ -72,49 +90,14 @@ def get_LLM_answers(question, context, history):
                 msg_history_path = './history/assertion-history.json'            
             else:
                 msg_history_path = './history/history.json'
-            try:
-                with open(msg_history_path, 'r') as file:
-                    history = json.load(file)
-            except FileNotFoundError:
-                history = []
-
-            history.append(interaction)
-
-            with open(msg_history_path, 'w') as file:
-                json.dump(history, file, indent=4)
+            append_record_async(msg_history_path, interaction)
             
             return interaction
         except Exception as e:
             print(f"Error: {str(e)}")
 
-def save_run_time(model_name, stage,run_time, hasMismatch=None, codegenFailed=None):
-    run_time_record_path = f'./run_time_record/{model_name}.json'
-    # Make sure the directory exists
-    os.makedirs('./run_time_record', exist_ok=True)
-    try:
-        with open(run_time_record_path, 'r') as file:
-            run_time_data = json.load(file)
-    except FileNotFoundError:
-        print("File not found. Creating a new one.")
-        run_time_data = {}
-    # Create the data to save
-    save_content = {"runTime": run_time}
-    if hasMismatch is not None and hasMismatch != "":
-        save_content["hasMismatch"] = hasMismatch
-    if codegenFailed is not None and codegenFailed != "":
-        save_content["codegenFailed"] = codegenFailed
-    # Update the dictionary
-    run_time_data[stage] = save_content
-
-    # Save back to file
-    with open(run_time_record_path, 'w') as file:
-        json.dump(run_time_data, file, indent=4)
-
-    return {"message": "Run time saved successfully."}
-
-
-
 # save same foloder save in piple
+@tracing.traced('const-var', kind='stage')
 def gen_const_and_vars(structuredData):
     processesDescription = "\n".join(
     f"process {i + 1}: process name: {sub['name']}, process description: {sub['description']}"
@@ -166,14 +149,11 @@ Requirements for the content:
 9. Variables whose possible values represent actions, transitions, or system control (e.g., moveSelection, activeControl) rather than data states **should not** be included as variables. These are part of the system behavior and will be handled separately during action extraction.
 
 Please ensure your response is a valid JSON string that can be parsed directly."""
-    start = time.perf_counter()
     ##### use LLM
     print(f"getting const and vars")
     print("prompt_gen_const_and_vars", protmpt_gen_const_and_vars)
-    get_LLM_answers(protmpt_gen_const_and_vars, structuredData, 'const')
-    end = time.perf_counter()
-    run_time = end - start
-    save_run_time(structuredData['modelName'], 'const-var-time', run_time)
+    interaction = get_LLM_answers(protmpt_gen_const_and_vars, structuredData, 'const')
+    return interaction['answerGPT'] if interaction else None
 
 def _generate_descriptions_for_actions_helper(structured_data):
     modelName = structured_data.get('modelName', 'N/A')
@@ -206,6 +186,7 @@ def _generate_descriptions_for_actions_helper(structured_data):
     #          desc += f". The processes interact with each other through the following way: {interaction_mode_value}."
     return desc
 
+@tracing.traced('action', kind='stage')
 def gen_actions(structured_data, processed_tables):
     descriptions_str = _generate_descriptions_for_actions_helper(structured_data)
     try:
@@ -261,15 +242,10 @@ Note that some actions **may not have any conditions or state changes**. In such
 
 Please ensure your response is a valid JSON string that can be parsed directly."""
 
-    start = time.perf_counter()
     print(f"getting actions")
     print("prompt_gen_actions", prompt_gen_actions)
-    get_LLM_answers(prompt_gen_actions, processed_tables, 'action')
-    end = time.perf_counter()
-    run_time = end - start
-    
-    model_name = structured_data.get('modelName', 'unknown_model')
-    save_run_time(model_name, 'action-time', run_time)
+    interaction = get_LLM_answers(prompt_gen_actions, processed_tables, 'action')
+    return interaction['answerGPT'] if interaction else None
 
 def _process_assertions_for_nl_helper(structured_data, assertions_list):
     modelName = structured_data.get("modelName", "UnknownModel")
@@ -354,53 +330,44 @@ def _process_assertions_for_nl_helper(structured_data, assertions_list):
                 
     return "\n".join(nl_annotations_assertion)
 
+@tracing.traced('nl-annotation', kind='stage')
 def gen_nl_instructions(structured_data, const_answer_str, action_answer_str, assertions_list):
-    start_time = time.perf_counter()
-    
     # Part 1: NL for Constants
     data1_content = ""
     try:
-        try:
-            parsed_const_data = json.loads(const_answer_str)
-            info = json.dumps(parsed_const_data)
-        except json.JSONDecodeError:
-            # not valid JSON, put into prompt as a string
-            parsed_const_data = const_answer_str
-            info = const_answer_str
-        
-        prompt1 = f"""According to the following json data, please generate NL annotation for PAT code generation, for example, to define the number of owners, you should generate such an annotation: // "N": number of owners in the system (set to 2), and to define the constant "far", you should generate this annotation: // "far": represents an owner being out and far away from the car. The annotation for each constant and variable should be generated on a new line. **Note: 1. For variables, there is no need to specify possible values, only specify the initial value for each variable. 2. Generate the annotations for all constants before variables.** The json data is as follows:\n{info}"""
-
-        data1_interaction = get_LLM_answers(prompt1, parsed_const_data, 'skip')
-        if data1_interaction and 'answerGPT' in data1_interaction:
-            data1_content = data1_interaction['answerGPT']
-        else:
-            print("Error: Failed to get NL for constants or answerGPT missing.")
+        parsed_const_data = json.loads(const_answer_str)
+        info = json.dumps(parsed_const_data)
     except json.JSONDecodeError:
-        print("Error: Could not decode JSON from const_answer_str for NL generation.")
-    except Exception as e:
-        print(f"Error in generating NL for constants: {str(e)}")
+        # not valid JSON, put into prompt as a string
+        parsed_const_data = const_answer_str
+        info = const_answer_str
+    
+    prompt1 = f"""According to the following json data, please generate NL annotation for PAT code generation, for example, to define the number of owners, you should generate such an annotation: // "N": number of owners in the system (set to 2), and to define the constant "far", you should generate this annotation: // "far": represents an owner being out and far away from the car. The annotation for each constant and variable should be generated on a new line. **Note: 1. For variables, there is no need to specify possible values, only specify the initial value for each variable. 2. Generate the annotations for all constants before variables.** The json data is as follows:\n{info}"""
 
     # Part 2: NL for Actions
     data2_content = ""
     try:
-        try:
-            parsed_action_data = json.loads(action_answer_str)
-            info_action = json.dumps(parsed_action_data)
-        except json.JSONDecodeError:
-            parsed_action_data = action_answer_str
-            info_action = action_answer_str
-        
-        prompt2 = f"""According to the following json data, please generate the NL annotation for PAT code generation. For each process, start the annotation with an annotation line // Definition of the "process_name" subsystem. (if any variable is involved in the process, please also add the description like: for xxx with index i). To annotate the actions that can happen in processes, we specify the conditions, action name, and the changes that the action introduces for the variables. For example, an annotation might be: //if "owner[i]" is "far", the action "towards.i" makes "owner[i]" become "near" (owner approaches the car). Note that, when processing conditions, if "complex_composite_conditions" exists as a key, its value alone forms the condition and should be directly described without mentioning "complex_composite_conditions". For other entries in conditions, the key and value together form the condition. Now please generate the NL annotations for each process in the json data, ensuring that the annotation for each action will span a new row. The json data is as follows:\n{info_action}"""
-        
-        data2_interaction = get_LLM_answers(prompt2, parsed_action_data, 'skip')
-        if data2_interaction and 'answerGPT' in data2_interaction:
-            data2_content = data2_interaction['answerGPT']
-        else:
-            print("Error: Failed to get NL for actions or answerGPT missing.")
+        parsed_action_data = json.loads(action_answer_str)
+        info_action = json.dumps(parsed_action_data)
     except json.JSONDecodeError:
-        print("Error: Could not decode JSON from action_answer_str for NL generation.")
-    except Exception as e:
-        print(f"Error in generating NL for actions: {str(e)}")
+        parsed_action_data = action_answer_str
+        info_action = action_answer_str
+    
+    prompt2 = f"""According to the following json data, please generate the NL annotation for PAT code generation. For each process, start the annotation with an annotation line // Definition of the "process_name" subsystem. (if any variable is involved in the process, please also add the description like: for xxx with index i). To annotate the actions that can happen in processes, we specify the conditions, action name, and the changes that the action introduces for the variables. For example, an annotation might be: //if "owner[i]" is "far", the action "towards.i" makes "owner[i]" become "near" (owner approaches the car). Note that, when processing conditions, if "complex_composite_conditions" exists as a key, its value alone forms the condition and should be directly described without mentioning "complex_composite_conditions". For other entries in conditions, the key and value together form the condition. Now please generate the NL annotations for each process in the json data, ensuring that the annotation for each action will span a new row. The json data is as follows:\n{info_action}"""
+
+    # The two prompts are independent, so they are sent concurrently
+    data1_interaction, data2_interaction = llm_client.run_all([
+        get_LLM_answers_async(prompt1, parsed_const_data, 'skip'),
+        get_LLM_answers_async(prompt2, parsed_action_data, 'skip')
+    ])
+    if isinstance(data1_interaction, dict) and 'answerGPT' in data1_interaction:
+        data1_content = data1_interaction['answerGPT']
+    else:
+        print("Error: Failed to get NL for constants or answerGPT missing.")
+    if isinstance(data2_interaction, dict) and 'answerGPT' in data2_interaction:
+        data2_content = data2_interaction['answerGPT']
+    else:
+        print("Error: Failed to get NL for actions or answerGPT missing.")
 
     # Part 3: NL for Assertions
     data3_content = _process_assertions_for_nl_helper(structured_data, assertions_list)
@@ -410,12 +377,6 @@ def gen_nl_instructions(structured_data, const_answer_str, action_answer_str, as
 
     # Save parts
     nl_parts_path = './history/nl-instruction-part.json'
-    try:
-        with open(nl_parts_path, 'r') as f:
-            existing_parts_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_parts_data = []
-    
     current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     new_part_entry = {
         "timestamp": current_time, # Added timestamp
@@ -423,57 +384,36 @@ def gen_nl_instructions(structured_data, const_answer_str, action_answer_str, as
         "data2": data2_content,
         "data3": data3_content
     }
-    existing_parts_data.append(new_part_entry)
-    with open(nl_parts_path, 'w') as f:
-        json.dump(existing_parts_data, f, indent=2)
+    append_record_async(nl_parts_path, new_part_entry)
     
     print("Assertion Annotations: ", data3_content)
 
     # Save full prompt
     nl_claude_path = './history/nl-instruction-claude.json'
-    try:
-        with open(nl_claude_path, 'r') as f:
-            existing_claude_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_claude_data = []
-    
     new_claude_entry = {
         "timestamp": current_time, # Added timestamp
         "fullText": full_prompt
     }
-    existing_claude_data.append(new_claude_entry)
-    with open(nl_claude_path, 'w') as f:
-        json.dump(existing_claude_data, f, indent=2)
+    append_record_async(nl_claude_path, new_claude_entry)
 
-    end_time = time.perf_counter()
-    run_time = end_time - start_time
     model_name = structured_data.get('modelName', 'unknown_model')
-    save_run_time(model_name, 'nl-annotation-time', run_time)
     
     print(f"NL Instructions generated and saved for {model_name}.")
+    return full_prompt
 
-def _get_most_relevant_rag_example_basic(instruction, rag_database_path='./database-rag-claude.json'):
+def _get_most_relevant_rag_example_basic(instruction, rag_database_path=RAG_DATABASE_PATH):
     try:
-        with open(rag_database_path, 'r') as f:
-            database = json.load(f)
-        
         if not instruction:
             print("Warning: RAG instruction is empty. Returning no example.")
             return {"nl": "", "code": ""}
 
-        nls = [entry["nl"] for entry in database if entry.get("nl")]
-        if not nls:
+        # Persistent TF-IDF index, rebuilt only when the database file changes
+        matches = rag_index.search(rag_database_path, instruction, k=1)
+        if not matches:
             print("Warning: No valid RAG database.")
             return {"nl": "", "code": ""}
-        
-        vectorizer = TfidfVectorizer().fit(nls + [instruction])
-        vectors = vectorizer.transform(nls + [instruction])
 
-        similarity_scores = cosine_similarity(vectors[-1], vectors[:-1])[0]
-        most_similar_idx = similarity_scores.argmax()
-
-        matched_entry = database[most_similar_idx]
-        return {"nl": matched_entry["nl"], "code": matched_entry["code"]}
+        return {"nl": matches[0]["nl"], "code": matches[0]["code"]}
             
     except FileNotFoundError:
         print(f"Error: RAG database file not found at {rag_database_path}")
@@ -482,14 +422,20 @@ def _get_most_relevant_rag_example_basic(instruction, rag_database_path='./datab
         print(f"Error: Could not decode JSON from RAG database file {rag_database_path}")
         return {"nl": "", "code": ""}
 
-def _get_claude_code_completion(prompt_text, history_file_path):
-    global client_claude # Ensure client_claude is accessible
+def _get_claude_code_completion(prompt_text, history_file_path, prompt_parts=None):
+    """
+    `prompt_parts`, if given, are the (text, cacheable) parts `prompt_text` is made of, sent so that Claude's prompt
+    cache can reuse the cacheable prefixes (see llm_client.cached_prompt).
+    """
     try:
-        response = client_claude.messages.create(
+        response = llm_client.run(llm_client.claude_messages(
             model="claude-3-7-sonnet-20250219",
             max_tokens=8192, # Max tokens as in codegen.html
-            messages=[{"role": "user", "content": prompt_text}]
-        )
+            messages=[{
+                "role": "user",
+                "content": llm_client.cached_prompt(prompt_parts) if prompt_parts else prompt_text
+            }]
+        ))
         answer = response.content[0].text
 
         current_time_dt = datetime.datetime.now()
@@ -502,26 +448,17 @@ def _get_claude_code_completion(prompt_text, history_file_path):
             'PAT': "" # Consistent with server.py structure
         }
 
-        try:
-            with open(history_file_path, 'r') as f:
-                history_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            history_data = []
-        
-        history_data.append(interaction)
-
-        with open(history_file_path, 'w') as f:
-            json.dump(history_data, f, indent=4)
+        append_record_async(history_file_path, interaction)
         
         return answer
     except Exception as e:
         print(f"Error calling Claude model or saving to {history_file_path}: {str(e)}")
         return "" # Return empty string on error
 
+@tracing.traced('codegen')
 def gen_code(structured_data, full_nl_prompt):
     model_name = structured_data.get('modelName', 'unknown_model')
     print(f"Starting code generation for {model_name}...")
-    start_time = time.perf_counter()
 
     # 1. RAG: Get most relevant example
     print("Retrieving RAG example...")
@@ -534,7 +471,7 @@ def gen_code(structured_data, full_nl_prompt):
     syntax_general_info = ""
     syntax_pitfalls_rules = ""
     try:
-        with open('./syntax-dataset.json', 'r') as f:
+        with open(os.path.join(PIPELINE_DIR, 'syntax-dataset.json'), 'r') as f:
             syntax_data = json.load(f)
         syntax_general_info = syntax_data.get("general_info", "")
         syntax_pitfalls_rules = syntax_data.get("pitfalls_rules", "")
@@ -550,86 +487,62 @@ def gen_code(structured_data, full_nl_prompt):
     # print(f"System description for prompt: {system_description_for_prompt[:200]}...")
 
     # 4. Construct Final Prompt for Claude
-    # Based on codegen.html prompt structure
-    final_code_gen_prompt = f"""You are an expert in PAT (Process Analysis Toolkit), and you already possess a strong understanding of PAT concepts as outlined in the documentation. As a reminder, here are a few key guidelines:
+    # Based on codegen.html prompt structure. The prompt is sent in parts, the stable ones first, so that Claude's
+    # prompt cache can reuse them: the syntax guide is the same for every model, the rest up to the response marker
+    # for every generation attempt of this model
+    syntax_guide_prompt = f"""You are an expert in PAT (Process Analysis Toolkit), and you already possess a strong understanding of PAT concepts as outlined in the documentation. As a reminder, here are a few key guidelines:
 --- Quick Reference ---
 General Information: {syntax_general_info}
 
 Pitfalls and Syntax Guidelines: {syntax_pitfalls_rules}
 
-Your task is to generate the PAT code given the corresponding natural language annotation for the system.
+"""
+    model_prompt = f"""Your task is to generate the PAT code given the corresponding natural language annotation for the system.
 ### Example:
 **Input NL Annotation:** {retrieved_nl}
 **Expected Output:** {retrieved_code}
 
 Given the general system description: {system_description_for_prompt}, now generate the PAT code corresponding to the **following system annotation**. Refer to the system description **only** if explicitly guided in the annotation, or if there is a contradiction between the annotation and the description.
 
-### System Annotation:\n{full_nl_prompt}
+### System Annotation:\n{full_nl_prompt}"""
+    response_prompt = """
 
 The PAT code should be:
 ### Response:"""
+    code_gen_prompt_parts = [(syntax_guide_prompt, True), (model_prompt, True), (response_prompt, False)]
+    final_code_gen_prompt = "".join(text for text, _ in code_gen_prompt_parts)
     
     # print(f"Final prompt for Claude: {final_code_gen_prompt[:500]}...")
 
     # 5. Call Claude Model for code generation
     print("Calling Claude for code generation...")
     print("prompt_gen_code", final_code_gen_prompt)
-    generated_code_output = _get_claude_code_completion(final_code_gen_prompt, './history/claude-code.json')
+    generated_code_output = _get_claude_code_completion(
+        final_code_gen_prompt, './history/claude-code.json', code_gen_prompt_parts
+    )
     
     if not generated_code_output:
         print(f"Code generation failed for {model_name}.")
         # Fallback or error handling could be added here
 
-    # 6. Timing and Saving Runtime
-    end_time = time.perf_counter()
-    run_time = end_time - start_time
-    
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    save_run_time(model_name, f'codegen-time_{timestamp}', run_time)
-    
-    print(f"Code generation for {model_name} completed in {run_time:.2f} seconds. Output saved.")
-    # No longer returns generated_code_output
-
-def _split_code_and_assertions(code):
-    """
-    Split PAT code into separate blocks for verification, one per assertion.
-    """
-    # Match any number of `#define…\n` lines, then one `#assert…;?`
-    pat = re.compile(
-        r'(?m)'                   # multiline mode
-        r'(?:'                    # start group for repeated #defines
-            r'^(?!\s*//)\s*'        # ── must be at line start, not // comment
-            r'#define[^\n]*\n'      # ── a real #define line
-        r')*'                     # repeat zero or more times
-        r'^(?!\s*//)\s*'          # ── now for the #assert line…
-        r'#assert[^\n]*;?'        # ── a real #assert
-        )
-    # body = everything except those define/assert pairs
-    body = pat.sub('', code).strip()
-    # capture each define+assert block
-    blocks = pat.findall(code)
-    defs, asserts = [], []
-    for blk in blocks:
-        lines = blk.splitlines()
-        # if it starts with a define, collect it
-        for line in lines[:-1]:
-            if line.startswith('#define'):
-                defs.append(line)
-        # the last line is always the #assert
-        asserts.append(lines[-1])
-    # dedupe while preserving order
-    seen = set()
-    uniq_defs = [d for d in defs if not (d in seen or seen.add(d))]
-    # build one output per assertion
-    return [
-        body + '\n\n' + '\n'.join(uniq_defs + [a])
-        for a in asserts
-    ]
+    print(f"Code generation for {model_name} completed in {tracing.current().elapsed():.2f} seconds.")
+    return generated_code_output
 
-def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0):
+@tracing.traced('verification')
+def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0, max_workers=None, timeout=None, single_launch=None, use_cache=None, candidate=None, save_verified=True, incremental=None, previous_code=None, previous_results=None):
     """
     Verify the generated code using PAT.
     Checks assertions against expected outcomes and handles mismatches.
+    Assertion blocks are verified concurrently, on a pool of at most `max_workers` PAT processes, each limited to `timeout` seconds (defaults: PAT_MAX_WORKERS / PAT_JOB_TIMEOUT).
+    With `single_launch` (default: PAT_SINGLE_LAUNCH), assertions are grouped by search engine and each
+    group is verified in one PAT launch, whose output is split back into per-assertion results.
+    With `use_cache` (default: PAT_CACHE_ENABLED), blocks verified before are answered from the shared
+    PAT result cache without launching PAT.
+    With `incremental` (default: PAT_INCREMENTAL) and the `previous_code` verified before with `previous_results`,
+    only the assertions whose dependency cone the change touched are verified again (see pat_deps.py); the others
+    keep their previous result.
+    `candidate` is the number of a best-of-N refinement candidate, verified in a folder of its own; with
+    `save_verified` off, code verified without mismatches is not added to database-algorithm.json.
     Returns verification results, whether there are mismatches, and if any empty outputs were encountered.
     """
     try:
@@ -640,19 +553,11 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
             "processedCode": code_to_verify
         }
         filename = "./history/claude-refinement.json"
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                refinement_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            refinement_data = []
-        refinement_data.append(new_record)
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(refinement_data, f, indent=2)
+        append_record_async(filename, new_record)
     except Exception as e:
         print("Error saving claude-refinement.json:", e)
         
     print(f"Starting code verification...")
-    start_time = time.perf_counter()
     model_name = structured_data.get('modelName', 'unknown_model')
     
     # Setup directories
@@ -661,6 +566,8 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
     if is_refine:
         # If we're refining, create a specific subdirectory for this round
         folder_path = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}/refine_round_{refine_round}"
+        if candidate is not None:
+            folder_path = f"{folder_path}/candidate_{candidate}"
     else:
         # Initial verification uses the main model directory
         folder_path = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}"
@@ -681,7 +588,7 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
                         print(f"Error removing file {file_path}: {e}")
     
     # Split the code into separate blocks for verification
-    code_blocks = _split_code_and_assertions(code_to_verify)
+    code_blocks = split_code_and_assertions(code_to_verify)
     
     # Record verification results
     verification_results = []
@@ -691,47 +598,159 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
         print(f"Warning: Number of code blocks ({len(code_blocks)}) does not match number of assertions ({len(structured_data['assertions'])}).")
         return [], True, True
     
-    # Save each code block and verify it
+    if single_launch is None:
+        single_launch = PAT_SINGLE_LAUNCH
+    if use_cache is None:
+        use_cache = PAT_CACHE_ENABLED
+    if incremental is None:
+        incremental = PAT_INCREMENTAL
+    
+    # Keep the previous results of assertions the change to the code cannot have affected
+    reused = {}
+    if incremental and previous_code is not None and previous_results and len(previous_results) == len(code_blocks):
+        affected = set(affected_blocks(split_code_and_assertions(previous_code), code_blocks))
+        reused = {
+            i: previous_results[i] for i in range(len(code_blocks))
+            if i not in affected and previous_results[i].get('actualResult')
+        }
+        print(f"Reusing previous results for {len(reused)} of {len(code_blocks)} assertions not affected by the change")
+    
+    # Reuse cached PAT results for blocks that have been verified before
+    cache_dir = get_cache_dir(root_path)
+    pat_version = get_pat_version(root_path)
+    block_keys = [cache_key(block, select_engine(block), pat_version) for block in code_blocks]
+    assertion_jobs = [(i, code_blocks[i], None) for i in reused]
+    pending = []
     for i, block in enumerate(code_blocks):
+        if i in reused:
+            continue
+        cached_output = cache_get(cache_dir, block_keys[i]) if use_cache else None
+        if cached_output is None:
+            pending.append(i)
+            continue
         input_file = f"{folder_path}/{i}.csp"
         output_file = f"{folder_path}/pat_output_{i}.txt"
-        
-        # Save the code block to file
         try:
             with open(input_file, 'w', encoding='utf-8') as f:
                 f.write(block)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(cached_output)
         except Exception as e:
-            print(f"Error saving code block {i} to file: {e}")
-            any_empty = True  # Mark as having issues
+            print(f"Error restoring cached result for assertion {i}: {e}")
+            pending.append(i)
+            continue
+        assertion_jobs.append((i, block, output_file))
+    if use_cache:
+        print(f"Reusing cached PAT results for {len(code_blocks) - len(reused) - len(pending)} of {len(code_blocks)} assertions")
+    
+    jobs = []
+    if single_launch:
+        # Save one file per search engine and verify all of its assertions in a single PAT launch
+        for g, (engine, indices, group_code) in enumerate(group_code_by_engine(code_to_verify, pending)):
+            input_file = f"{folder_path}/group_{g}.csp"
+            output_file = f"{folder_path}/pat_output_group_{g}.txt"
+            try:
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(group_code)
+            except Exception as e:
+                print(f"Error saving code group {g} to file: {e}")
+                any_empty = True  # Mark as having issues
+                continue
+            jobs.append((indices, input_file, output_file, engine))
+    else:
+        # Save each code block and queue its PAT run
+        for i in pending:
+            block = code_blocks[i]
+            input_file = f"{folder_path}/{i}.csp"
+            output_file = f"{folder_path}/pat_output_{i}.txt"
+            
+            # Save the code block to file
+            try:
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(block)
+            except Exception as e:
+                print(f"Error saving code block {i} to file: {e}")
+                any_empty = True  # Mark as having issues
+                continue
+            
+            # Choose the appropriate search engine based on the assertion type
+            jobs.append(([i], input_file, output_file, select_engine(block)))
+    
+    # Run all PAT verifications on a local worker pool, results come back in job order
+    job_statuses = run_verifications(root_path, [job[1:] for job in jobs], max_workers=max_workers, timeout=timeout)
+    # PAT wall time per assertion (assertions verified in one launch share its time); failed runs are traced here
+    pat_elapsed = {}
+    for (indices, input_file, output_file, engine), job_status in zip(jobs, job_statuses):
+        for idx in indices:
+            pat_elapsed[idx] = job_status.get('elapsed', 0.0) / len(indices)
+        if job_status['status'] != 'ok':
+            tracing.record('pat', 'pat', job_status.get('elapsed', 0.0), status=job_status['status'], assertions=len(indices), engine=engine)
+    
+    for (indices, input_file, output_file, engine), job_status in zip(jobs, job_statuses):
+        i = indices[0] if len(indices) == 1 else indices
+        if job_status['status'] == 'timeout':
+            print(f"PAT execution timed out for assertion {i}")
+            return [], True, True
+        if job_status['status'] == 'failed':
+            print(f"PAT execution failed for assertion {i}: {job_status['error']}")
+            return [], True, True
+        if job_status['status'] != 'ok':
+            print(f"Error processing verification for assertion {i}: {job_status['error']}")
+            return [], True, True
+        try:
+            with open(output_file, 'r', encoding='utf-8') as f:
+                output = f.read()
+        except Exception as e:
+            print(f"Error processing verification for assertion {i}: {e}")
+            return [], True, True
+        if not single_launch:
+            if use_cache:
+                cache_put(cache_dir, block_keys[i], output, engine, pat_version)
+            assertion_jobs.append((i, code_blocks[i], output_file))
+            continue
+        # Demultiplex the combined output into one pat_output_{i}.txt per assertion
+        try:
+            chunks = split_assertion_outputs(output)
+            if len(chunks) != len(indices):
+                print(f"Warning: PAT reported {len(chunks)} results for {len(indices)} assertions {indices}")
+            for k, idx in enumerate(indices):
+                assertion_output = chunks[k] if k < len(chunks) else ""
+                assertion_output_file = f"{folder_path}/pat_output_{idx}.txt"
+                with open(assertion_output_file, 'w', encoding='utf-8') as f:
+                    f.write(assertion_output)
+                if use_cache:
+                    cache_put(cache_dir, block_keys[idx], assertion_output, engine, pat_version)
+                assertion_jobs.append((idx, code_blocks[idx], assertion_output_file))
+        except Exception as e:
+            print(f"Error processing verification for assertions {indices}: {e}")
+            return [], True, True
+    assertion_jobs.sort(key=lambda job: job[0])
+    
+    for i, block, output_file in assertion_jobs:
+        if output_file is None:
+            result = dict(reused[i])
+            tracing.record(
+                'pat', 'pat', 0.0, assertion=i, cached=True, reused=True, engine=result.get('engine'),
+                **(result.get('statistics') or {})
+            )
+            verification_results.append(result)
             continue
-        
-        # Choose the appropriate command based on the assertion type
-        if ('reaches' in block) or ('deadlockfree' in block):
-            command = ["mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe",
-                      "-csp", "-engine", "1", input_file, output_file]
-        else:
-            command = ["mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe",
-                      "-csp", input_file, output_file]
-        
-        # Run the PAT verification
         try:
-            subprocess.run(command, check=True, timeout=300)
             with open(output_file, 'r', encoding='utf-8') as f:
                 output = f.read()
             if output == "":
                 any_empty = True
                 print(f"Warning: Empty output for assertion {i} - potential syntax error")
             
-            # Extract verification result
-            start_marker = "********Verification Result********"
-            end_marker = "********Verification Setting********"
-            start_idx = output.find(start_marker)
-            end_idx = output.find(end_marker)
+            # Extract verification result, trace, settings and statistics
+            pat_output = parse_assertion_output(output)
+            tracing.record(
+                'pat', 'pat', pat_elapsed.get(i, 0.0), assertion=i, cached=i not in pat_elapsed,
+                engine=pat_output.engine, **pat_output.statistics
+            )
             
-            pat_result = ""
-            if start_idx != -1 and end_idx != -1:
-                pat_result = output[start_idx + len(start_marker):end_idx].strip()
-            else:
+            pat_result = pat_output.result_text
+            if pat_result is None:
                 # No proper verification result found
                 any_empty = True
                 pat_result = "Verification result not found - potential syntax error"
@@ -744,29 +763,20 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
                     break
             
             # Determine actual outcome
-            actual_outcome = ""
-            match = re.search(r"is\s+(\w+)", pat_result, re.IGNORECASE)
-            if match and match.group(1):
-                word = match.group(1).upper()
-                if word == "VALID":
-                    actual_outcome = "Valid"
-                else:
-                    actual_outcome = "Invalid"
-            else:
+            actual_outcome = pat_output.verdict
+            if not actual_outcome:
                 # No outcome detected
                 any_empty = True
             
+            # The statistics are kept with the result, to follow the state-space cost across refinement rounds
             verification_results.append({
                 'assertion': assertion_line,
                 'patResult': pat_result,
-                'actualResult': actual_outcome
+                'actualResult': actual_outcome,
+                'trace': pat_output.trace,
+                'engine': pat_output.engine,
+                'statistics': pat_output.statistics
             })
-        except subprocess.TimeoutExpired:
-            print(f"PAT execution timed out for assertion {i}")
-            return [], True, True
-        except subprocess.CalledProcessError as e:
-            print(f"PAT execution failed for assertion {i}: {e}")
-            return [], True, True
         except Exception as e:
             print(f"Error processing verification for assertion {i}: {e}")
             return [], True, True
@@ -776,7 +786,6 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
     has_mismatch = False
     
     # Compare actual outcomes with expected outcomes
-    mismatches = []
     for i, result in enumerate(verification_results):
         # Default expected outcome is "Valid"
         expected_outcome = "Valid"
@@ -789,23 +798,7 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
         # Check for mismatch
         if result['actualResult'] != expected_outcome:
             has_mismatch = True
-            
-            # Extract trace information for mismatches
-            lines = result['patResult'].split("\n")
-            trace = "<init>"  # Default if no specific trace found
-            
-            # Look for trace information in the result
-            for line in lines:
-                if "->" in line and line.strip().startswith("<"):
-                    trace = line.strip()
-                    break
-            
-            mismatches.append({
-                'assertion': result['assertion'],
-                'trace': trace,
-                'current_result': result['actualResult'],
-                'desired_result': expected_outcome
-            })
+    mismatches = _mismatches(verification_results)
     
     # Save mismatch traces if any
     if has_mismatch:
@@ -815,7 +808,7 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
                 json.dump(mismatches, f, indent=2)
             print(f"Saved {len(mismatches)} mismatch traces to {mismatch_file}")
             
-            # Also save to the standard history location for compatibility
+            # Also log them to the standard history location (a log only: the refinement stage takes them in memory)
             if not is_refine:
                 with open('./history/mismatch_traces.json', 'w', encoding='utf-8') as f:
                     json.dump(mismatches, f, indent=2)
@@ -828,15 +821,16 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
             with open(verified_code_path, 'w', encoding='utf-8') as f:
                 f.write(code_to_verify)
             print(f"Saved verified code to {verified_code_path}")
-            try:
-                with open('./database-algorithm.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except:
-                data = []
-            data.append({"model_name": model_name, "verified_code": code_to_verify})
-            with open('./database-algorithm.json', 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"Saved verified code for {model_name} model to database-algorithm.json")
+            if save_verified:
+                try:
+                    with open('./database-algorithm.json', 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except:
+                    data = []
+                data.append({"model_name": model_name, "verified_code": code_to_verify})
+                with open('./database-algorithm.json', 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                print(f"Saved verified code for {model_name} model to database-algorithm.json")
         except Exception as e:
             print(f"Error saving verified code: {e}")
     
@@ -849,15 +843,28 @@ def verify_code(structured_data, code_to_verify, is_refine=False, refine_round=0
     except Exception as e:
         print(f"Error saving verification results: {e}")
     
-    # Record timing
-    end_time = time.perf_counter()
-    run_time = end_time - start_time
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    save_run_time(model_name, f'verification-time_{timestamp}', run_time, has_mismatch, any_empty)
+    tracing.current().set(hasMismatch=has_mismatch, codegenFailed=any_empty, assertions=len(code_blocks))
     
-    print(f"Code verification completed in {run_time:.2f} seconds. Has mismatches: {has_mismatch}, Has empty results: {any_empty}")
+    print(f"Code verification completed in {tracing.current().elapsed():.2f} seconds. Has mismatches: {has_mismatch}, Has empty results: {any_empty}")
     return verification_results, has_mismatch, any_empty
 
+def _mismatches(verification_results):
+    """
+    Mismatch traces of the assertions whose result is not the desired one, as the refinement prompts take them.
+    The verification results carry their desired outcome (see verify_code).
+    """
+    return [
+        {
+            'assertion': result.get('assertion', ''),
+            # "<init>" if PAT reported no trace
+            'trace': format_trace(result['trace']) if result.get('trace') else "<init>",
+            'current_result': result.get('actualResult', ''),
+            'desired_result': result.get('desiredOutcome', '')
+        }
+        for result in verification_results
+        if result.get('actualResult') != result.get('desiredOutcome')
+    ]
+
 def _process_mismatch_traces(mismatches):
     """
     Process mismatch traces to generate feedback for Claude to use in refinement.
@@ -907,25 +914,30 @@ def _process_mismatch_traces(mismatches):
     
     return "\n".join(processed_messages)
 
-def gen_refine(structured_data, current_code, mismatches, refine_round):
+@tracing.traced('refine')
+def gen_refine(structured_data, current_code, mismatches, refine_round, candidate=None):
     """
     Generate refined code based on verification mismatches.
+    `candidate` numbers the refined code of a best-of-N refinement round.
     Returns the refined code.
     """
     print(f"Starting code refinement round {refine_round}...")
-    start_time = time.perf_counter()
     model_name = structured_data.get('modelName', 'unknown_model')
     
     # Process mismatch traces into feedback for Claude
     processed_traces = _process_mismatch_traces(mismatches)
     
-    # Construct refinement prompt
-    refinement_prompt = f'''You are an expert in PAT (Process Analysis Toolkit). Your task now is to refine your previously generated PAT code according to some suggestions.\n\nYour previously generated PAT code is as follows:\n{current_code}\n\nThe logic that we can follow to refine our code to satisfy user requirements is:\n{processed_traces}\n\nPlease refine and fix the PAT code so that it avoids the problems we mentioned, and only through modifying code relevant to our suggestions. **The other parts of code should not be changed to avoid syntax error, especially, NEVER remove semicolons.** Please provide the revised PAT code.'''
+    # Construct refinement prompt: the code to refine comes first, so that Claude's prompt cache can reuse it
+    # across the candidates and the regeneration attempts of the round
+    code_prompt = f'''You are an expert in PAT (Process Analysis Toolkit). Your task now is to refine your previously generated PAT code according to some suggestions.\n\nYour previously generated PAT code is as follows:\n{current_code}\n\n'''
+    suggestions_prompt = f'''The logic that we can follow to refine our code to satisfy user requirements is:\n{processed_traces}\n\nPlease refine and fix the PAT code so that it avoids the problems we mentioned, and only through modifying code relevant to our suggestions. **The other parts of code should not be changed to avoid syntax error, especially, NEVER remove semicolons.** Please provide the revised PAT code.'''
+    refinement_prompt_parts = [(code_prompt, True), (suggestions_prompt, False)]
+    refinement_prompt = code_prompt + suggestions_prompt
 
     # Call Claude for refinement
     print("Calling Claude for code refinement...")
     print("prompt_refine", refinement_prompt)
-    refined_code = _get_claude_code_completion(refinement_prompt, './history/claude-code.json')
+    refined_code = _get_claude_code_completion(refinement_prompt, './history/claude-code.json', refinement_prompt_parts)
     
     if not refined_code:
         print(f"Failed to get refined code for round {refine_round}.")
@@ -936,6 +948,8 @@ def gen_refine(structured_data, current_code, mismatches, refine_round):
     root_path = "path_to_your_project_directory"  # Replace with your actual root path
     folder_path = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}"
     refined_code_path = f"{folder_path}/refined_code_{refine_round}.csp"
+    if candidate is not None:
+        refined_code_path = f"{folder_path}/refined_code_{refine_round}_{candidate}.csp"
     
     try:
         with open(refined_code_path, 'w', encoding='utf-8') as f:
@@ -944,13 +958,9 @@ def gen_refine(structured_data, current_code, mismatches, refine_round):
     except Exception as e:
         print(f"Error saving refined code for round {refine_round}: {e}")
     
-    # Record timing
-    end_time = time.perf_counter()
-    run_time = end_time - start_time
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    save_run_time(model_name, f'refine-time_{refine_round}_{timestamp}', run_time)
+    tracing.current().set(round=refine_round)
     
-    print(f"Code refinement round {refine_round} completed in {run_time:.2f} seconds.")
+    print(f"Code refinement round {refine_round} completed in {tracing.current().elapsed():.2f} seconds.")
     return refined_code
 
 def _extract_longest_code_block(text):
@@ -980,150 +990,231 @@ def _extract_longest_code_block(text):
     
     return longest_block.strip()
 
-if __name__ == '__main__':
-    # read ./test-automated-pipeline.json
-    with open('./PAT.json', 'r') as file:
-        structured_data_list = json.load(file)
-        assert len(structured_data_list) == 6, "The number of entries in the JSON file should be 6."
-        for i in range(len(structured_data_list)): # Iterate through all entries in the JSON
-        # for i in range(1):
-            current_structured_data = structured_data_list[i]
-            print(f"Processing data entry {i} with model name: {current_structured_data.get('modelName', 'N/A')}")
-            
-            # Stage 1: Generate Constants and Variables
-            print(f"getting const and vars for entry {i}")
-            gen_const_and_vars(current_structured_data)
-            
-            # Retrieve the result of gen_const_and_vars to pass to gen_actions
-            processed_tables_for_actions = None
-            const_history_path = './history/const-history.json'
-            try:
-                with open(const_history_path, 'r') as hist_file:
-                    const_history = json.load(hist_file)
-                if const_history:
-                    # Assuming the last entry corresponds to the gen_const_and_vars call just made
-                    latest_const_answer_str = const_history[-1]['answerGPT']
-                    try:
-                        processed_tables_for_actions = json.loads(latest_const_answer_str)
-                    except json.JSONDecodeError:
-                        processed_tables_for_actions = latest_const_answer_str
-                else:
-                    print(f"Error: Const history is empty after processing entry {i}.")
-                    continue # Skip to next data entry if const generation failed to produce history
-            except FileNotFoundError:
-                print(f"Error: Const history file not found at {const_history_path} for entry {i}")
-                continue
-            except json.JSONDecodeError:
-                print(f"Error: Could not decode JSON from const_history for entry {i}")
-                continue
-            
-            if processed_tables_for_actions is None:
-                print(f"Skipping action generation for entry {i} due to missing processed tables.")
-                continue
+@tracing.traced('refinement-candidate', kind='attempt')
+def _refine_candidate(structured_data, current_code, mismatches, refine_round, candidate, max_workers=None, current_results=None):
+    """
+    One candidate of a best-of-N refinement round: refined code and its verification, regenerated up to 3 times
+    while it has syntax errors. Returns (code, verification results, has mismatch, any empty); the code is
+    `current_code` if every attempt had syntax errors.
+    """
+    tracing.current().set(round=refine_round, candidate=candidate)
+    model_name = structured_data.get('modelName', 'unknown_model')
+    root_path = "path_to_your_project_directory"  # Replace with your actual root path
+    model_dir = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}"
+    result = (current_code, [], True, True)
+    for attempt in range(3):
+        if attempt > 0:
+            print(f"Syntax error in refinement candidate {candidate}, regenerating... (Regeneration attempt: {attempt})")
+        refined_code = gen_refine(structured_data, current_code, mismatches, refine_round, candidate=candidate)
+        refined_block = _extract_longest_code_block(refined_code)
+        if refined_block == "":
+            continue
+        try:
+            with open(f"{model_dir}/original_refined_{refine_round}_{candidate}.txt", 'w', encoding='utf-8') as f:
+                f.write(refined_code)
+            with open(f"{model_dir}/extracted_refined_{refine_round}_{candidate}.csp", 'w', encoding='utf-8') as f:
+                f.write(refined_block)
+        except Exception as e:
+            print(f"Error saving original/extracted refinement candidate {candidate}: {e}")
+        verification_results, has_mismatch, any_empty = verify_code(
+            structured_data, refined_block, is_refine=True, refine_round=refine_round, max_workers=max_workers,
+            candidate=candidate, save_verified=False, previous_code=current_code, previous_results=current_results
+        )
+        if not any_empty:
+            return refined_block, verification_results, has_mismatch, any_empty
+        result = (current_code, verification_results, has_mismatch, any_empty)
+    return result
 
-            # Stage 2: Generate Actions
-            print(f"getting actions for entry {i}")
-            gen_actions(current_structured_data, processed_tables_for_actions)
-            
-            # Stage 3: Retrieve data for NL Instruction Generation
-            print(f"preparing for NL instruction generation for entry {i}")
-            
-            latest_action_answer_str = None
-            action_history_path = './history/action-history.json'
-            try:
-                with open(action_history_path, 'r') as hist_file:
-                    action_history = json.load(hist_file)
-                if action_history:
-                    latest_action_answer_str = action_history[-1]['answerGPT']
-                else:
-                    print(f"Error: Action history is empty for entry {i} before NL generation.")
-                    continue
-            except FileNotFoundError:
-                print(f"Error: Action history file not found at {action_history_path} for entry {i}")
-                continue
-            except json.JSONDecodeError:
-                print(f"Error: Could not decode JSON from action_history for entry {i}")
-                continue
+def _remaining_mismatches(verification_results):
+    return sum(result.get('actualResult') != result.get('desiredOutcome') for result in verification_results)
 
-            if latest_const_answer_str is None or latest_action_answer_str is None:
-                print(f"Skipping NL instruction generation for entry {i} due to missing const or action answers.")
-                continue
-                
-            assertions_list = current_structured_data.get('assertions', [])
-            if not assertions_list:
-                 print(f"Warning: No assertions found in structured_data for entry {i}. NL for assertions will be minimal.")
+def _refine_best_of_n(structured_data, current_code, mismatches, refine_round, n, current_results=None):
+    """
+    Best-of-N refinement round: `n` refinement candidates for the same mismatches are requested and verified at the
+    same time, and the one with the fewest remaining mismatches is kept, ties going to the smallest state space
+    (visited states). Candidates with syntax errors are only kept when no candidate is free of them.
+    Returns (code, verification results, has mismatch, any empty) of the kept candidate, like one serial round.
+    """
+    print(f"Requesting {n} refinement candidates for round {refine_round}...")
+    model_name = structured_data.get('modelName', 'unknown_model')
+    root_path = "path_to_your_project_directory"  # Replace with your actual root path
+    refine_dir = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}/refine_round_{refine_round}"
+    # A candidate without mismatches writes no mismatch traces: remove those of an earlier run of this round,
+    # so they are not taken for the kept candidate's
+    if os.path.isdir(refine_dir):
+        for entry in os.listdir(refine_dir):
+            path = os.path.join(refine_dir, entry)
+            if entry.startswith('candidate_') and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        if os.path.exists(f"{refine_dir}/mismatch_traces.json"):
+            os.remove(f"{refine_dir}/mismatch_traces.json")
+    # The candidates share the PAT worker limit
+    max_workers = max(1, PAT_MAX_WORKERS // n)
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        # Each candidate runs in a copy of this context, so its spans are children of the refinement round
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run, _refine_candidate,
+                structured_data, current_code, mismatches, refine_round, k, max_workers, current_results
+            )
+            for k in range(n)
+        ]
+        candidates = [future.result() for future in futures]
+
+    def rank(k):
+        _, verification_results, _, any_empty = candidates[k]
+        visited_states = total_visited_states(verification_results)
+        return (
+            any_empty, _remaining_mismatches(verification_results),
+            visited_states if visited_states is not None else float('inf'), k
+        )
+    best = min(range(n), key=rank)
+    tracing.current().set(candidates=n, selected=best)
 
-            
-            # Stage 4: Generate NL Instructions
-            print(f"generating NL instructions for entry {i}")
-            gen_nl_instructions(current_structured_data, latest_const_answer_str, latest_action_answer_str, assertions_list)
+    # The kept candidate's results become the round's, where the refinement loop reads them
+    try:
+        os.makedirs(refine_dir, exist_ok=True)
+        with open(f"{refine_dir}/candidates.json", 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    'candidate': k,
+                    'syntaxValid': not any_empty,
+                    'remainingMismatches': _remaining_mismatches(verification_results),
+                    'visitedStates': total_visited_states(verification_results),
+                    'selected': k == best
+                }
+                for k, (_, verification_results, _, any_empty) in enumerate(candidates)
+            ], f, indent=2)
+        if os.path.exists(f"{refine_dir}/candidate_{best}/mismatch_traces.json"):
+            shutil.copyfile(f"{refine_dir}/candidate_{best}/mismatch_traces.json", f"{refine_dir}/mismatch_traces.json")
+    except Exception as e:
+        print(f"Error saving refinement candidates of round {refine_round}: {e}")
+    print(f"Kept refinement candidate {best} of {n} "
+          f"({_remaining_mismatches(candidates[best][1])} remaining mismatches, syntax errors: {candidates[best][3]})")
+    return candidates[best]
 
-            # Retrieve the full_nl_prompt from the file saved by gen_nl_instructions
-            retrieved_full_nl_prompt = None
-            nl_claude_history_path = './history/nl-instruction-claude.json'
-            try:
-                with open(nl_claude_history_path, 'r') as hist_file:
-                    nl_claude_history = json.load(hist_file)
-                if nl_claude_history:
-                    retrieved_full_nl_prompt = nl_claude_history[-1].get('fullText')
-                else:
-                    print(f"Error: NL Claude history is empty for entry {i}.")
-                    continue
-                if not retrieved_full_nl_prompt:
-                    print(f"Error: 'fullText' not found in the last NL Claude history entry for entry {i}.")
-                    continue # Skip to next data entry
-            except FileNotFoundError:
-                print(f"Error: NL Claude history file not found at {nl_claude_history_path} for entry {i}")
-                continue
-            except json.JSONDecodeError:
-                print(f"Error: Could not decode JSON from NL Claude history for entry {i}")
-                continue
+@dataclass
+class PipelineContext:
+    """
+    Outputs of the stages of run_pipeline_entry for one dataset entry, passed to the next stage in memory.
+    The history files are only a log of these outputs and are never read back.
+    """
+    structured_data: dict
+    const_answer: Optional[str] = None  # gen_const_and_vars: constants and variables (JSON text)
+    processed_tables: Any = None        # const_answer parsed, or as is if it is not valid JSON
+    action_answer: Optional[str] = None  # gen_actions: actions (JSON text)
+    nl_prompt: Optional[str] = None     # gen_nl_instructions: full NL annotation
+    generated_response: Optional[str] = None  # gen_code: latest raw LLM response
+    code: Optional[str] = None          # verified code without mismatches
+
+def run_pipeline_entry(i, current_structured_data, resume=False):
+    """
+    Run all stages (planning, code generation, verification, refinement) for one dataset entry.
+    Every stage is checkpointed; with `resume`, stages whose inputs are unchanged reuse their checkpoint.
+    Returns a summary record of how far the entry got. The run is traced as one model span (see tracing.py).
+    """
+    with tracing.trace(current_structured_data.get('modelName', 'unknown_model'), index=i, resume=resume) as root:
+        summary = _run_pipeline_entry(i, current_structured_data, resume)
+        root.set(status=summary['status'], genAttempts=summary['genAttempts'], refineRounds=summary['refineRounds'])
+    return summary
+
+
+def _run_pipeline_entry(i, current_structured_data, resume):
+    summary = {
+        'index': i,
+        'modelName': current_structured_data.get('modelName', 'N/A'),
+        'status': 'incomplete',
+        'genAttempts': 0,
+        'syntaxValid': False,
+        'hasMismatch': None,
+        'refineRounds': 0,
+        'allFixed': False
+    }
+    print(f"Processing data entry {i} with model name: {current_structured_data.get('modelName', 'N/A')}")
+            
+    # Stage 1: Generate Constants and Variables
+    model_name = current_structured_data.get('modelName', 'unknown_model')
+    ctx = PipelineContext(current_structured_data)
+    const_hash = inputs_hash(current_structured_data)
+    ctx.const_answer = load_checkpoint(model_name, 'const', const_hash) if resume else None
+    if ctx.const_answer is None:
+        print(f"getting const and vars for entry {i}")
+        ctx.const_answer = gen_const_and_vars(current_structured_data)
+        if ctx.const_answer is None:
+            print(f"Error: No constants and variables generated for entry {i}.")
+            return summary
+        save_checkpoint(model_name, 'const', const_hash, ctx.const_answer)
+    try:
+        ctx.processed_tables = json.loads(ctx.const_answer)
+    except json.JSONDecodeError:
+        ctx.processed_tables = ctx.const_answer
+
+    # Stage 2: Generate Actions
+    action_hash = inputs_hash(current_structured_data, ctx.const_answer)
+    ctx.action_answer = load_checkpoint(model_name, 'action', action_hash) if resume else None
+    if ctx.action_answer is None:
+        print(f"getting actions for entry {i}")
+        ctx.action_answer = gen_actions(current_structured_data, ctx.processed_tables)
+        if ctx.action_answer is None:
+            print(f"Error: No actions generated for entry {i}.")
+            return summary
+        save_checkpoint(model_name, 'action', action_hash, ctx.action_answer)
+
+    # Stage 3: Prepare NL Instruction Generation
+    print(f"preparing for NL instruction generation for entry {i}")
+    assertions_list = current_structured_data.get('assertions', [])
+    if not assertions_list:
+         print(f"Warning: No assertions found in structured_data for entry {i}. NL for assertions will be minimal.")
 
-            if not retrieved_full_nl_prompt:
-                print(f"Skipping code generation for entry {i} due to empty or missing NL prompt from history.")
-                continue
             
-            # Stage 5 & 6: Generate code and verify, with up to 3 generation attempts
-            gen_count = 0
-            max_gen_attempts = 3
-            verified_successfully = False
+    # Stage 4: Generate NL Instructions
+    nl_hash = inputs_hash(current_structured_data, ctx.const_answer, ctx.action_answer)
+    ctx.nl_prompt = load_checkpoint(model_name, 'nl', nl_hash) if resume else None
+    if ctx.nl_prompt is None:
+        print(f"generating NL instructions for entry {i}")
+        ctx.nl_prompt = gen_nl_instructions(current_structured_data, ctx.const_answer, ctx.action_answer, assertions_list)
+        if not ctx.nl_prompt:
+            print(f"Skipping code generation for entry {i} due to empty NL prompt.")
+            return summary
+        save_checkpoint(model_name, 'nl', nl_hash, ctx.nl_prompt)
             
-            while gen_count < max_gen_attempts and not verified_successfully:
+    # Stage 5 & 6: Generate code and verify, with up to 3 generation attempts
+    with tracing.span('code-generation', kind='stage'):
+        gen_count = 0
+        max_gen_attempts = 3
+        verified_successfully = False
+
+        code_hash = inputs_hash(current_structured_data, ctx.nl_prompt)
+        code_checkpoint = load_checkpoint(model_name, 'code', code_hash) if resume else None
+        if code_checkpoint is not None:
+            # Verify the checkpointed code again to restore its verification outputs (PAT results come from the cache)
+            longest_code_block = code_checkpoint['code']
+            verification_results, has_mismatch, any_empty = verify_code(current_structured_data, longest_code_block)
+            verified_successfully = not any_empty
+            if verified_successfully:
+                gen_count = code_checkpoint['attempts']
+            else:
+                # The code no longer verifies (e.g. after a PAT upgrade): generate it again from the first attempt,
+                # as a run without the checkpoint would
+                print(f"Checkpointed code for entry {i} has syntax errors now, generating it again.")
+                discard_checkpoint(model_name, 'code')
+            
+        while gen_count < max_gen_attempts and not verified_successfully:
+            with tracing.span('generation-attempt', kind='attempt', attempt=gen_count + 1):
                 # Generate code
                 if gen_count > 0:
                     print(f"Regenerating code (attempt {gen_count}/{max_gen_attempts - 1}).")
                 else:
                     print(f"Starting code generation for entry {i}, attempt {gen_count + 1}/{max_gen_attempts}")
-                gen_code(current_structured_data, retrieved_full_nl_prompt)
+                ctx.generated_response = gen_code(current_structured_data, ctx.nl_prompt)
                 gen_count += 1
 
-                # Retrieve the generated code
-                retrieved_generated_code = None
-                claude_code_history_path = './history/claude-code.json'
-                try:
-                    with open(claude_code_history_path, 'r') as hist_file:
-                        claude_code_history = json.load(hist_file)
-                    if claude_code_history:
-                        retrieved_generated_code = claude_code_history[-1].get('answerClaude')
-                    else:
-                        print(f"Error: Claude code history is empty for entry {i}.")
-                        break
-                    if not retrieved_generated_code:
-                        print(f"Error: 'answerClaude' not found in the last Claude code history entry for entry {i}.")
-                        break
-                except FileNotFoundError:
-                    print(f"Error: Claude code history file not found at {claude_code_history_path} for entry {i}")
-                    break
-                except json.JSONDecodeError:
-                    print(f"Error: Could not decode JSON from Claude code history for entry {i}")
-                    break
-
-                if not retrieved_generated_code:
-                    print(f"Could not retrieve generated code for entry {i}. Skipping verification stage.")
+                if not ctx.generated_response:
+                    print(f"No code generated for entry {i}. Skipping verification stage.")
                     break
                 
                 # Extract the longest code block from the LLM response
-                longest_code_block = _extract_longest_code_block(retrieved_generated_code)
+                longest_code_block = _extract_longest_code_block(ctx.generated_response)
                 if longest_code_block == "":
                     continue
                 
@@ -1135,7 +1226,7 @@ if __name__ == '__main__':
                 
                 try:
                     with open(f"{folder_path}/original_llm_response.txt", 'w', encoding='utf-8') as f:
-                        f.write(retrieved_generated_code)
+                        f.write(ctx.generated_response)
                     with open(f"{folder_path}/extracted_code.csp", 'w', encoding='utf-8') as f:
                         f.write(longest_code_block)
                     print("Saved original LLM response and extracted code block for reference")
@@ -1157,7 +1248,7 @@ if __name__ == '__main__':
                     if gen_count >= max_gen_attempts:
                         print(f"Maximum regeneration attempts ({max_gen_attempts}) reached. Could not produce error-free code.")
                         # Save information about the failed attempts
-                        error_info_path = f"./generated_code/{current_structured_data.get('modelName', 'unknown')}/regeneration_errors.json"
+                        error_info_path = os.path.join(PIPELINE_DIR, 'generated_code', current_structured_data.get('modelName', 'unknown'), 'regeneration_errors.json')
                         try:
                             with open(error_info_path, 'w') as f:
                                 json.dump({
@@ -1169,98 +1260,136 @@ if __name__ == '__main__':
                             print(f"Error saving regeneration info: {e}")
                     else:
                         print(f"Code has syntax errors, will attempt regeneration. Attempt {gen_count + 1}/{max_gen_attempts}")
+
+    summary['genAttempts'] = gen_count
+    summary['syntaxValid'] = verified_successfully
+    if verified_successfully:
+        save_checkpoint(model_name, 'code', code_hash, {
+            'code': longest_code_block,
+            'attempts': gen_count,
+            'verificationResults': verification_results,
+            'hasMismatch': has_mismatch
+        })
+        summary['hasMismatch'] = has_mismatch
+        summary['visitedStates'] = [total_visited_states(verification_results)]
+        summary['status'] = 'mismatch' if has_mismatch else 'verified'
+        if not has_mismatch:
+            ctx.code = longest_code_block
+    else:
+        summary['status'] = 'syntax-error'
                                 
-            # Stage 7: Refinement - if we have mismatches but no syntax errors
-            if verified_successfully and has_mismatch:
-                print("Code verified without syntax errors but has logical mismatches. Proceeding to refinement stage.")
+    # Stage 7: Refinement - if we have mismatches but no syntax errors
+    if verified_successfully and has_mismatch:
+        with tracing.span('refinement', kind='stage'):
+            print("Code verified without syntax errors but has logical mismatches. Proceeding to refinement stage.")
                 
-                # Prepare for refinement
-                current_code = longest_code_block  # Use the extracted code block
-                max_refine_attempts = 5
-                refine_count = 0
-                all_mismatches_fixed = False
-                model_name = current_structured_data.get('modelName', 'unknown_model')
+            # Prepare for refinement
+            current_code = longest_code_block  # Use the extracted code block
+            max_refine_attempts = 5
+            refine_count = 0
+            all_mismatches_fixed = False
+            model_name = current_structured_data.get('modelName', 'unknown_model')
                 
-                # Main directory for the model
-                root_path = "path_to_your_project_directory"  # Replace with your actual root path
-                model_dir = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}"
+            # Main directory for the model
+            root_path = "path_to_your_project_directory"  # Replace with your actual root path
+            model_dir = f"{root_path}/Automated_Pipelines/Full_Pipeline/generated_code/{model_name}"
                 
-                # Make sure the model directory exists
-                os.makedirs(model_dir, exist_ok=True)
+            # Make sure the model directory exists
+            os.makedirs(model_dir, exist_ok=True)
                 
-                # Read the mismatches from the standard location
-                mismatches = []
-                try:
-                    with open('./history/mismatch_traces.json', 'r', encoding='utf-8') as f:
-                        mismatches = json.load(f)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading mismatch traces: {e}")
-                    # Fallback to using verification results to create mismatch data
-                    for result in verification_results:
-                        if result.get('actualResult') != result.get('desiredOutcome'):
-                            mismatches.append({
-                                'assertion': result.get('assertion', ''),
-                                'trace': "<init>",  # Default trace
-                                'current_result': result.get('actualResult', ''),
-                                'desired_result': result.get('desiredOutcome', '')
-                            })
+            # Mismatches of the verified code, from its verification results
+            mismatches = _mismatches(verification_results)
                 
-                # Save initial verification results
-                try:
-                    # Save in the main model directory
-                    with open(f"{model_dir}/verification_results_refine_0.json", 'w', encoding='utf-8') as f:
-                        json.dump(verification_results, f, indent=2)
-                    print(f"Saved initial verification results as round 0")
-                except Exception as e:
-                    print(f"Error saving initial verification results: {e}")
+            # Save initial verification results
+            try:
+                # Save in the main model directory
+                with open(f"{model_dir}/verification_results_refine_0.json", 'w', encoding='utf-8') as f:
+                    json.dump(verification_results, f, indent=2)
+                print(f"Saved initial verification results as round 0")
+            except Exception as e:
+                print(f"Error saving initial verification results: {e}")
                 
-                # Refinement loop
-                while refine_count < max_refine_attempts and not all_mismatches_fixed and mismatches:
-                    refine_count += 1
+            # Total visited states of every round (round 0: the initial code), to follow the state-space cost
+            visited_states = [total_visited_states(verification_results)]
+            # Verification results of current_code, from which unaffected assertions are reused (PAT_INCREMENTAL)
+            current_results = verification_results
+        
+            # Refinement loop
+            while refine_count < max_refine_attempts and not all_mismatches_fixed and mismatches:
+                refine_count += 1
+                with tracing.span('refinement-round', kind='attempt', round=refine_count):
                     print(f"\n=== Starting refinement round {refine_count}/{max_refine_attempts} ===\n")
                     
                     # Generate refined code
-                    for i in range(3): # possible to give 3 chances if the generated code contains any syntax error.
-                        if i > 0:
-                            print(f"Syntax error in refined code, regenerating... (Regeneration attempt: {i})")
-                        refined_code = gen_refine(current_structured_data, current_code, mismatches, refine_count)
+                    round_hash = inputs_hash(current_code, mismatches)
+                    round_checkpoint = load_checkpoint(model_name, f'refine_{refine_count}', round_hash) if resume else None
+                    if round_checkpoint is not None:
+                        # Verify the checkpointed code again to restore this round's mismatch traces
+                        refine_verification_results, refine_has_mismatch, refine_any_empty = verify_code(
+                            current_structured_data, round_checkpoint['code'], is_refine=True, refine_round=refine_count,
+                            previous_code=current_code, previous_results=current_results
+                        )
+                        if not refine_any_empty:
+                            current_code = round_checkpoint['code']
+                    else:
+                        if REFINE_CANDIDATES > 1:
+                            current_code, refine_verification_results, refine_has_mismatch, refine_any_empty = _refine_best_of_n(
+                                current_structured_data, current_code, mismatches, refine_count, REFINE_CANDIDATES, current_results
+                            )
+                        else:
+                            for i in range(3): # possible to give 3 chances if the generated code contains any syntax error.
+                                if i > 0:
+                                    print(f"Syntax error in refined code, regenerating... (Regeneration attempt: {i})")
+                                refined_code = gen_refine(current_structured_data, current_code, mismatches, refine_count)
                         
-                        # Extract the longest code block from the refined response
-                        longest_refined_block = _extract_longest_code_block(refined_code)
-                        if longest_code_block == "":
-                            continue
+                                # Extract the longest code block from the refined response
+                                longest_refined_block = _extract_longest_code_block(refined_code)
+                                if longest_code_block == "":
+                                    continue
                         
-                        # Save both versions for reference
-                        try:
-                            with open(f"{model_dir}/original_refined_{refine_count}.txt", 'w', encoding='utf-8') as f:
-                                f.write(refined_code)
-                            with open(f"{model_dir}/extracted_refined_{refine_count}.csp", 'w', encoding='utf-8') as f:
-                                f.write(longest_refined_block)
-                        except Exception as e:
-                            print(f"Error saving original/extracted refined code: {e}")
+                                # Save both versions for reference
+                                try:
+                                    with open(f"{model_dir}/original_refined_{refine_count}.txt", 'w', encoding='utf-8') as f:
+                                        f.write(refined_code)
+                                    with open(f"{model_dir}/extracted_refined_{refine_count}.csp", 'w', encoding='utf-8') as f:
+                                        f.write(longest_refined_block)
+                                except Exception as e:
+                                    print(f"Error saving original/extracted refined code: {e}")
                         
-                        # Verify the refined code
-                        print(f"Verifying refined code from round {refine_count}...")
-                        refine_verification_results, refine_has_mismatch, refine_any_empty = verify_code(
-                            current_structured_data, longest_refined_block, is_refine=True, refine_round=refine_count
-                        )
+                                # Verify the refined code
+                                print(f"Verifying refined code from round {refine_count}...")
+                                refine_verification_results, refine_has_mismatch, refine_any_empty = verify_code(
+                                    current_structured_data, longest_refined_block, is_refine=True, refine_round=refine_count,
+                                    previous_code=current_code, previous_results=current_results
+                                )
                         
-                        # Save this round's verification results in the main model directory
-                        try:
-                            # with open(f"{model_dir}/verification_results_refine_{refine_count}.json", 'w', encoding='utf-8') as f:
-                            #     json.dump(refine_verification_results, f, indent=2)
-                            print(f"Saved verification results for refinement round {refine_count}")
-                        except Exception as e:
-                            print(f"Error saving verification results for round {refine_count}: {e}")
+                                # Save this round's verification results in the main model directory
+                                try:
+                                    # with open(f"{model_dir}/verification_results_refine_{refine_count}.json", 'w', encoding='utf-8') as f:
+                                    #     json.dump(refine_verification_results, f, indent=2)
+                                    print(f"Saved verification results for refinement round {refine_count}")
+                                except Exception as e:
+                                    print(f"Error saving verification results for round {refine_count}: {e}")
                         
-                        # Check for syntax errors (shouldn't happen but just in case)
-                        if refine_any_empty:
-                            continue
-                        else:
-                            # Update current code to refined code
-                            current_code = longest_refined_block
-                            break
+                                # Check for syntax errors (shouldn't happen but just in case)
+                                if refine_any_empty:
+                                    continue
+                                else:
+                                    # Update current code to refined code
+                                    current_code = longest_refined_block
+                                    break
                     
+                        if not refine_any_empty:
+                            save_checkpoint(model_name, f'refine_{refine_count}', round_hash, {
+                                'code': current_code,
+                                'verificationResults': refine_verification_results,
+                                'hasMismatch': refine_has_mismatch
+                            })
+                    
+                    if not refine_any_empty:
+                        current_results = refine_verification_results
+                    visited_states.append(total_visited_states(refine_verification_results))
+            
                     # Check if all mismatches are fixed
                     if not refine_has_mismatch:
                         all_mismatches_fixed = True
@@ -1286,66 +1415,62 @@ if __name__ == '__main__':
 
                         break
                     else:
-                        # Update mismatches for next round from the current round's directory
-                        refine_dir = f"{model_dir}/refine_round_{refine_count}"
-                        mismatch_file = f"{refine_dir}/mismatch_traces.json"
-                        try:
-                            with open(mismatch_file, 'r', encoding='utf-8') as f:
-                                mismatches = json.load(f)
-                        except (FileNotFoundError, json.JSONDecodeError) as e:
-                            print(f"Error reading mismatch traces from round {refine_count}: {e}")
-                            # Fallback to generating mismatches from verification results
-                            mismatches = []
-                            for result in refine_verification_results:
-                                if result.get('actualResult') != result.get('desiredOutcome'):
-                                    # Extract trace information
-                                    lines = result.get('patResult', '').split("\n")
-                                    trace = "<init>"  # Default if no specific trace found
-                                    for line in lines:
-                                        if "->" in line and line.strip().startswith("<"):
-                                            trace = line.strip()
-                                            break
-                                    
-                                    mismatches.append({
-                                        'assertion': result.get('assertion', ''),
-                                        'trace': trace,
-                                        'current_result': result.get('actualResult', ''),
-                                        'desired_result': result.get('desiredOutcome', '')
-                                    })
+                        # Mismatches for the next round, from this round's verification results
+                        mismatches = _mismatches(refine_verification_results)
                 
-                # After refinement loop
-                if all_mismatches_fixed:
-                    print(f"Refinement successful after {refine_count} rounds!")
-                else:
-                    print(f"Reached maximum refinement attempts ({max_refine_attempts}) without fixing all issues.")
+        # After refinement loop
+        summary['refineRounds'] = refine_count
+        summary['visitedStates'] = visited_states
+        summary['allFixed'] = all_mismatches_fixed
+        if all_mismatches_fixed:
+            summary['status'] = 'refined'
+            ctx.code = current_code
+            print(f"Refinement successful after {refine_count} rounds!")
+        else:
+            print(f"Reached maximum refinement attempts ({max_refine_attempts}) without fixing all issues.")
                     
-                    # Save the final refined code anyway
-                    final_code_path = f"{model_dir}/final_refined_code.csp"
-                    try:
-                        with open(final_code_path, 'w', encoding='utf-8') as f:
-                            f.write(current_code)
-                        print(f"Saved final refined code to {final_code_path}")
-                    except Exception as e:
-                        print(f"Error saving final refined code: {e}")
+            # Save the final refined code anyway
+            final_code_path = f"{model_dir}/final_refined_code.csp"
+            try:
+                with open(final_code_path, 'w', encoding='utf-8') as f:
+                    f.write(current_code)
+                print(f"Saved final refined code to {final_code_path}")
+            except Exception as e:
+                print(f"Error saving final refined code: {e}")
                     
-                    # Save a summary of the refinement process
-                    summary_path = f"{model_dir}/refinement_summary.json"
-                    try:
-                        with open(summary_path, 'w', encoding='utf-8') as f:
-                            json.dump({
-                                "rounds": refine_count,
-                                "all_fixed": all_mismatches_fixed,
-                                "remaining_mismatches": len(mismatches),
-                                "completion_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                            }, f, indent=2)
-                    except Exception as e:
-                        print(f"Error saving refinement summary: {e}")
-            
-            print(f"Finished processing entry {i}.")
-            
-            
+            # Save a summary of the refinement process
+            summary_path = f"{model_dir}/refinement_summary.json"
+            try:
+                with open(summary_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "rounds": refine_count,
+                        "all_fixed": all_mismatches_fixed,
+                        "remaining_mismatches": len(mismatches),
+                        "visited_states": visited_states,
+                        "completion_time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    }, f, indent=2)
+            except Exception as e:
+                print(f"Error saving refinement summary: {e}")
             
+    if RAG_ADD_VERIFIED and ctx.code:
+        try:
+            rag_index.add_examples(RAG_DATABASE_PATH, [{"nl": ctx.nl_prompt, "code": ctx.code}])
+            print(f"Added {model_name} to the RAG database.")
+        except Exception as e:
+            print(f"Error adding {model_name} to the RAG database: {e}")
 
+    print(f"Finished processing entry {i}.")
+    return summary
 
 
-
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the full pipeline on every entry of the dataset")
+    parser.add_argument('--resume', action='store_true', help="reuse the checkpoints of stages whose inputs are unchanged")
+    args = parser.parse_args()
+    # read ./test-automated-pipeline.json
+    with open('./PAT.json', 'r') as file:
+        structured_data_list = json.load(file)
+        assert len(structured_data_list) == 6, "The number of entries in the JSON file should be 6."
+        for i in range(len(structured_data_list)): # Iterate through all entries in the JSON
+        # for i in range(1):
+            run_pipeline_entry(i, structured_data_list[i], resume=args.resume)
@@ -0,0 +1,146 @@
+###### Dataset runner
+# Runs the pipeline on several dataset entries at once. Every entry gets its own working directory
+# (runs/<index>_<modelName>/) with its own ./history, ./traces and ./database-algorithm.json,
+# so concurrent entries never read or overwrite each other's stage outputs.
+# Usage:
+#   python run_dataset.py --dataset ./PAT.json --workers 4
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import datetime
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+PIPELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+# tracing.py and history_store.py are shared with the Interface, in ../../Shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(PIPELINE_DIR)), 'Shared'))
+
+import tracing
+import history_store
+
+
+def get_work_dir(runs_dir, index, structured_data):
+    model_name = structured_data.get('modelName', 'unknown_model')
+    return os.path.join(runs_dir, f"{index:03d}_{re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)}")
+
+
+def _run_entry(index, structured_data, work_dir, resume=False):
+    """
+    Worker process: run one entry inside its working directory, with its console output in pipeline.log.
+    """
+    os.makedirs(os.path.join(work_dir, 'history'), exist_ok=True)
+    os.chdir(work_dir)
+    start = time.perf_counter()
+    with open('pipeline.log', 'a' if resume else 'w', encoding='utf-8', buffering=1) as log:
+        sys.stdout = log
+        sys.stderr = log
+        try:
+            import pipeline
+            summary = pipeline.run_pipeline_entry(index, structured_data, resume=resume)
+        except Exception as e:
+            traceback.print_exc()
+            summary = {
+                'index': index,
+                'modelName': structured_data.get('modelName', 'N/A'),
+                'status': 'error',
+                'error': str(e)
+            }
+        finally:
+            # History records are appended by a background thread, and pool workers skip atexit handlers
+            history_store.flush()
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+    summary['wallTime'] = time.perf_counter() - start
+    summary['workDir'] = work_dir
+    return summary
+
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def merge_results(summaries, runs_dir, dataset_path, workers, wall_time):
+    """
+    Collect the per-entry summaries and their traced stage times into runs_dir/summary.json, and append the
+    code verified by every entry to the pipeline's database-algorithm.json, in dataset order.
+    """
+    summaries = sorted(summaries, key=lambda summary: summary['index'])
+    for summary in summaries:
+        model_name = summary.get('modelName', 'unknown_model')
+        # An absolute TRACE_DIR is shared by all entries
+        spans = tracing.load_spans(os.path.join(summary['workDir'], tracing.TRACE_DIR))
+        summary['runTime'] = tracing.summarize_model([span for span in spans if span.get('model') == model_name])
+
+    verified = []
+    for summary in summaries:
+        verified += _load_json(os.path.join(summary['workDir'], 'database-algorithm.json'), [])
+    if verified:
+        database_path = os.path.join(PIPELINE_DIR, 'database-algorithm.json')
+        data = _load_json(database_path, [])
+        # A resumed run reports the entries verified by the previous attempt again
+        verified = [entry for entry in verified if entry not in data]
+        data += verified
+        with open(database_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Saved verified code for {len(verified)} models to {database_path}")
+
+    status_counts = {}
+    for summary in summaries:
+        status_counts[summary['status']] = status_counts.get(summary['status'], 0) + 1
+    merged = {
+        'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'dataset': os.path.abspath(dataset_path),
+        'workers': workers,
+        'wallTime': wall_time,
+        'statusCounts': status_counts,
+        'entries': summaries
+    }
+    summary_path = os.path.join(runs_dir, 'summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+    return merged, summary_path
+
+
+def run_dataset(dataset_path, workers=2, runs_dir=None, indices=None, resume=False):
+    runs_dir = os.path.abspath(runs_dir or os.path.join(PIPELINE_DIR, 'runs'))
+    with open(dataset_path, 'r', encoding='utf-8') as f:
+        structured_data_list = json.load(f)
+    if indices is None:
+        indices = range(len(structured_data_list))
+
+    start = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for i in indices:
+            work_dir = get_work_dir(runs_dir, i, structured_data_list[i])
+            futures[executor.submit(_run_entry, i, structured_data_list[i], work_dir, resume)] = i
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            print(f"[{len(summaries)}/{len(futures)}] entry {summary['index']} ({summary['modelName']}): "
+                  f"{summary['status']} in {summary['wallTime']:.1f} seconds")
+
+    merged, summary_path = merge_results(summaries, runs_dir, dataset_path, workers, time.perf_counter() - start)
+    print(f"Processed {len(summaries)} entries in {merged['wallTime']:.1f} seconds: {merged['statusCounts']}")
+    print(f"Summary saved to {summary_path}")
+    return merged
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the pipeline on several dataset entries in parallel")
+    parser.add_argument('--dataset', default='./PAT.json')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get("PIPELINE_WORKERS", 2)),
+                        help="number of entries processed at once")
+    parser.add_argument('--runs-dir', default=None, help="parent of the per-entry working directories (default: ./runs)")
+    parser.add_argument('--only', type=int, nargs='*', default=None, help="indices of the entries to run (default: all)")
+    parser.add_argument('--resume', action='store_true', help="continue a previous run from its checkpoints")
+    args = parser.parse_args()
+    run_dataset(args.dataset, args.workers, args.runs_dir, args.only, args.resume)
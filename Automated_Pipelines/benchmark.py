@@ -0,0 +1,340 @@
+###### Pipeline benchmark
+# Runs the Full Pipeline and the pipeline without planning over the datasets in ../Datasets (PAT, A4F, UCS) with
+# replayed LLM responses (llm_replay.py), one model at a time in a fresh process and working directory, and records
+# per model: wall time, time per stage and step (from its trace, see tracing.py), PAT launches, verification cache
+# hits and misses, bytes written to ./history, and the peak RSS of the pipeline process and of its PAT processes.
+# The results are saved as a JSON baseline; `compare` flags every stage that got slower than a threshold.
+# Record the LLM responses once (with API keys), then benchmark offline:
+#   python benchmark.py run --llm-mode record --output baseline.json
+#   python benchmark.py run --output current.json --baseline baseline.json [--threshold 0.2]
+#   python benchmark.py run --pipelines no-planning --datasets UCS --only 0 1 --output ucs.json
+#   python benchmark.py compare baseline.json current.json [--threshold 0.2] [--min-seconds 0.5]
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import datetime
+import platform
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASETS_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'Datasets')
+# name -> (directory, module)
+PIPELINES = {
+    'full': (os.path.join(BENCHMARK_DIR, 'Full_Pipeline'), 'pipeline'),
+    'no-planning': (os.path.join(BENCHMARK_DIR, 'No_Planning'), 'pipeline_a')
+}
+DATASETS = ('PAT', 'A4F', 'UCS')
+
+FORMAT = "pipeline-benchmark"
+FORMAT_VERSION = 1
+# A stage is a regression when it is this much slower than in the baseline ...
+BENCHMARK_THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", 0.2))
+# ... and at least this many seconds slower, so that sub-second noise is not flagged
+BENCHMARK_MIN_SECONDS = float(os.environ.get("BENCHMARK_MIN_SECONDS", 0.5))
+
+
+def load_dataset(dataset):
+    with open(os.path.join(DATASETS_DIR, f"{dataset}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in '_.-' else '_' for c in name)
+
+
+def _dir_bytes(path):
+    size = 0
+    for directory, _, files in os.walk(path):
+        size += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return size
+
+
+def stage_times(spans):
+    """
+    Seconds per stage and step name (code-generation, codegen, verification, ...) and in LLM requests and PAT runs.
+    Steps are nested in stages and LLM requests and PAT runs in steps, so the figures overlap.
+    """
+    times = {}
+    for span in spans:
+        if span['kind'] in ('stage', 'step'):
+            name = span['name']
+        elif span['kind'] in ('llm', 'pat'):
+            name = span['kind']
+        else:
+            continue
+        times[name] = times.get(name, 0.0) + span['duration']
+    return times
+
+
+def measure_model(pipeline, dataset, index, result_path):
+    """
+    Run one dataset entry in the current process (whose working directory is the model's) and save its measurements.
+    """
+    pipeline_dir, module_name = PIPELINES[pipeline]
+    sys.path.insert(0, pipeline_dir)
+    module = importlib.import_module(module_name)
+    import tracing
+    import pat_cache
+    import pat_runner
+    import history_store
+
+    structured_data = load_dataset(dataset)[index]
+    os.makedirs('history', exist_ok=True)
+    start = time.perf_counter()
+    summary = module.run_pipeline_entry(index, structured_data)
+    history_store.flush()
+    wall_time = time.perf_counter() - start
+
+    spans = [span for span in tracing.load_spans(tracing.TRACE_DIR) if span.get('kind') != 'model']
+    hits, misses = pat_cache.cache_stats['hits'], pat_cache.cache_stats['misses']
+    result = {
+        'pipeline': pipeline,
+        'dataset': dataset,
+        'index': index,
+        'modelName': structured_data.get('modelName', 'unknown_model'),
+        'status': summary.get('status'),
+        'wallTime': wall_time,
+        'stages': stage_times(spans),
+        'llmCalls': sum(span['kind'] == 'llm' for span in spans),
+        'patLaunches': pat_runner.launch_stats['launches'],
+        'cacheHits': hits,
+        'cacheMisses': misses,
+        'cacheHitRate': hits / (hits + misses) if hits + misses else None,
+        'historyBytes': _dir_bytes('history'),
+        # ru_maxrss is in kilobytes on Linux
+        'peakRssMB': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'patPeakRssMB': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+
+def _run_model(pipeline, dataset, index, model_name, work_dir, env, shared_cache=False):
+    """
+    Benchmark one model in a child process, with its console output in <work_dir>/pipeline.log.
+    Unless `shared_cache`, the model starts with an empty PAT verification cache of its own, so that its hit rate
+    measures the reuse within the model and does not depend on the models run before it.
+    """
+    if os.path.isdir(work_dir):
+        shutil.rmtree(work_dir)
+    os.makedirs(work_dir)
+    if not shared_cache:
+        env = dict(env, PAT_CACHE_DIR=os.path.join(work_dir, 'verification_cache'))
+    result_path = os.path.join(work_dir, 'benchmark.json')
+    command = [
+        sys.executable, os.path.abspath(__file__), 'model', pipeline, dataset, str(index), '--result', result_path
+    ]
+    with open(os.path.join(work_dir, 'pipeline.log'), 'w', encoding='utf-8') as log:
+        returncode = subprocess.call(command, cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {
+            'pipeline': pipeline, 'dataset': dataset, 'index': index, 'modelName': model_name,
+            'status': 'error', 'error': f"exit status {returncode}, see {os.path.join(work_dir, 'pipeline.log')}"
+        }
+
+
+def model_key(result):
+    return f"{result['pipeline']}/{result['dataset']}/{result['index']:03d}_{_safe_name(result['modelName'])}"
+
+
+def _totals(results):
+    """
+    Sum of the measurements of a list of models (peak RSS: the largest).
+    """
+    measured = [result for result in results if 'wallTime' in result]
+    totals = {
+        'models': len(results),
+        'errors': len(results) - len(measured),
+        'wallTime': sum(result['wallTime'] for result in measured),
+        'stages': {},
+        'patLaunches': sum(result['patLaunches'] for result in measured),
+        'cacheHits': sum(result['cacheHits'] for result in measured),
+        'cacheMisses': sum(result['cacheMisses'] for result in measured),
+        'historyBytes': sum(result['historyBytes'] for result in measured),
+        'peakRssMB': max([result['peakRssMB'] for result in measured], default=None)
+    }
+    for result in measured:
+        for name, seconds in result['stages'].items():
+            totals['stages'][name] = totals['stages'].get(name, 0.0) + seconds
+    lookups = totals['cacheHits'] + totals['cacheMisses']
+    totals['cacheHitRate'] = totals['cacheHits'] / lookups if lookups else None
+    return totals
+
+
+def run_benchmark(pipelines=tuple(PIPELINES), datasets=DATASETS, indices=None, workers=1, work_root=None,
+                  recording_dir=None, llm_mode='replay', shared_cache=False):
+    """
+    Benchmark every entry of every dataset on every pipeline. Returns the baseline record.
+    """
+    work_root = os.path.abspath(work_root or os.path.join(BENCHMARK_DIR, 'benchmark_runs'))
+    env = dict(os.environ)
+    env.update({
+        'LLM_MODE': llm_mode,
+        'LLM_RECORDING_DIR': os.path.abspath(recording_dir or os.path.join(BENCHMARK_DIR, 'llm_recordings')),
+        'TRACING': '1',
+        'TRACE_DIR': './traces',
+        'PIPELINE_CHECKPOINT_DIR': './checkpoints'
+    })
+    runs = []
+    for pipeline in pipelines:
+        for dataset in datasets:
+            structured_data_list = load_dataset(dataset)
+            for index in (indices if indices is not None else range(len(structured_data_list))):
+                if index >= len(structured_data_list):
+                    continue
+                model_name = structured_data_list[index].get('modelName', 'unknown_model')
+                work_dir = os.path.join(work_root, pipeline, dataset, f"{index:03d}_{_safe_name(model_name)}")
+                runs.append((pipeline, dataset, index, model_name, work_dir))
+
+    results = []
+    # Models run one at a time by default, so that they do not compete for the CPU and skew each other's times
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(_run_model, *run, env, shared_cache) for run in runs]
+        for n, future in enumerate(futures):
+            result = future.result()
+            results.append(result)
+            took = f"{result['wallTime']:.1f} seconds" if 'wallTime' in result else result.get('error', '')
+            print(f"[{n + 1}/{len(runs)}] {model_key(result)}: {result['status']} ({took})")
+
+    groups = {}
+    for result in results:
+        groups.setdefault(f"{result['pipeline']}/{result['dataset']}", []).append(result)
+    return {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'llmMode': llm_mode,
+        'replayLatencyScale': env.get('LLM_REPLAY_LATENCY_SCALE', '1.0'),
+        'workers': workers,
+        'models': {model_key(result): result for result in results},
+        'totals': {group: _totals(group_results) for group, group_results in groups.items()}
+    }
+
+
+def _timings(record):
+    """
+    {(scope, measure): seconds} of every model and total of a baseline record.
+    """
+    timings = {}
+    for scope, entries in (('model', record['models']), ('total', record['totals'])):
+        for key, entry in entries.items():
+            if 'wallTime' not in entry:
+                continue
+            timings[(key, 'wallTime')] = entry['wallTime']
+            for name, seconds in entry['stages'].items():
+                timings[(key, name)] = seconds
+    return timings
+
+
+def compare(baseline, current, threshold=None, min_seconds=None):
+    """
+    (regressions, improvements): (key, measure, baseline seconds, current seconds) of the stages that got slower
+    (faster) by more than `threshold` (relative) and `min_seconds`.
+    """
+    threshold = BENCHMARK_THRESHOLD if threshold is None else threshold
+    min_seconds = BENCHMARK_MIN_SECONDS if min_seconds is None else min_seconds
+    old, new = _timings(baseline), _timings(current)
+    regressions, improvements = [], []
+    for key in sorted(set(old) & set(new)):
+        before, after = old[key], new[key]
+        if after > before * (1 + threshold) and after - before >= min_seconds:
+            regressions.append((*key, before, after))
+        elif before > after * (1 + threshold) and before - after >= min_seconds:
+            improvements.append((*key, before, after))
+    return regressions, improvements
+
+
+def _load_record(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        record = json.load(f)
+    if record.get('format') != FORMAT:
+        raise ValueError(f"{path} is not a benchmark result")
+    return record
+
+
+def _print_totals(record):
+    print(f"\n{'pipeline/dataset':<22} {'models':>6} {'errors':>6} {'wall (s)':>10} {'PAT runs':>9} "
+          f"{'cache hits':>10} {'history KB':>11} {'peak MB':>8}")
+    for group, totals in record['totals'].items():
+        hit_rate = f"{totals['cacheHitRate']:.0%}" if totals['cacheHitRate'] is not None else "-"
+        peak = f"{totals['peakRssMB']:.0f}" if totals['peakRssMB'] is not None else "-"
+        print(f"{group:<22} {totals['models']:>6} {totals['errors']:>6} {totals['wallTime']:>10.1f} "
+              f"{totals['patLaunches']:>9} {hit_rate:>10} {totals['historyBytes'] / 1024:>11.1f} {peak:>8}")
+
+
+def _print_comparison(regressions, improvements, threshold):
+    for title, rows in (('Faster', improvements), ('REGRESSIONS', regressions)):
+        if not rows:
+            continue
+        print(f"\n{title} (more than {threshold:.0%}):")
+        for key, measure, before, after in rows:
+            change = f"{after / before - 1:+.0%}" if before else "new"
+            print(f"  {key:<48} {measure:<16} {before:>9.2f} s -> {after:>9.2f} s ({change})")
+    if not regressions:
+        print("\nNo stage is slower than the baseline.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the pipelines on the datasets with replayed LLM responses")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="benchmark the pipelines and save the results")
+    run_parser.add_argument('--pipelines', nargs='+', choices=list(PIPELINES), default=list(PIPELINES))
+    run_parser.add_argument('--datasets', nargs='+', choices=DATASETS, default=list(DATASETS))
+    run_parser.add_argument('--only', type=int, nargs='*', default=None, help="indices of the entries to run (default: all)")
+    run_parser.add_argument('--workers', type=int, default=1, help="models benchmarked at once")
+    run_parser.add_argument('--work-dir', default=None, help="parent of the per-model working directories")
+    run_parser.add_argument('--recordings', default=None, help="LLM recordings (default: ./llm_recordings)")
+    run_parser.add_argument('--llm-mode', choices=('replay', 'record', 'live'), default='replay')
+    run_parser.add_argument('--shared-cache', action='store_true', help="use the shared PAT verification cache")
+    run_parser.add_argument('--output', default='benchmark.json')
+    run_parser.add_argument('--baseline', default=None, help="compare the results with this earlier output")
+    run_parser.add_argument('--threshold', type=float, default=BENCHMARK_THRESHOLD)
+    run_parser.add_argument('--min-seconds', type=float, default=BENCHMARK_MIN_SECONDS)
+    compare_parser = commands.add_parser('compare', help="flag the stages that got slower than in a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=BENCHMARK_THRESHOLD)
+    compare_parser.add_argument('--min-seconds', type=float, default=BENCHMARK_MIN_SECONDS)
+    # Internal: one model, run by `run` in a child process
+    model_parser = commands.add_parser('model')
+    model_parser.add_argument('pipeline', choices=list(PIPELINES))
+    model_parser.add_argument('dataset', choices=DATASETS)
+    model_parser.add_argument('index', type=int)
+    model_parser.add_argument('--result', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'model':
+        measure_model(args.pipeline, args.dataset, args.index, args.result)
+        sys.exit(0)
+
+    try:
+        baseline = _load_record(args.baseline) if args.baseline else None
+        if args.command == 'compare':
+            current = _load_record(args.current)
+        else:
+            current = run_benchmark(
+                args.pipelines, args.datasets, args.only, args.workers, args.work_dir,
+                args.recordings, args.llm_mode, args.shared_cache
+            )
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2)
+            print(f"Results saved to {args.output}")
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+    _print_totals(current)
+    if baseline is not None:
+        regressions, improvements = compare(baseline, current, args.threshold, args.min_seconds)
+        _print_comparison(regressions, improvements, args.threshold)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,108 @@
+###### Retrieval benchmark
+# Compares the retriever backends of rag_index.py on latency and hit quality. Indexes are built in a temporary
+# directory, so the indexes used by the server and the pipelines are left untouched.
+# Quality is measured on labelled queries: by default the name of every database-algorithm.json entry, which
+# should retrieve that entry from the descriptions (the wording differs, as with real user requests).
+# A JSON list of {"query", "expected"} (expected: position of the entry in the database) can be given instead.
+# Usage:
+#   python benchmark_retrieval.py [--backends tfidf embedding] [--database ./database-algorithm.json --field description]
+#                                 [--queries labelled.json] [-k 3] [--repeat 20] [--output results.json]
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+# rag_index.py is shared with the automated pipelines, in ../Shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Shared'))
+
+import rag_index
+
+
+def default_queries(database_path):
+    with open(database_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    return [{'query': entry['name'], 'expected': position} for position, entry in enumerate(entries) if entry.get('name')]
+
+
+def benchmark_backend(backend, database_path, field, queries, k, repeat):
+    index_dir = tempfile.mkdtemp(prefix=f"rag-{backend}-")
+    try:
+        index = rag_index.BACKENDS[backend](database_path, field, index_dir=os.path.join(index_dir, 'index'))
+        start = time.perf_counter()
+        index.ensure_fresh()
+        build_time = time.perf_counter() - start
+
+        texts = [query['query'] for query in queries]
+        # Warm-up, so that the first query does not pay for loading the model
+        index.search(texts[0], k)
+        latencies = []
+        for _ in range(repeat):
+            for text in texts:
+                start = time.perf_counter()
+                index.search(text, k)
+                latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        batched = index.search_many(texts, k)
+        batch_time = time.perf_counter() - start
+
+        hits_1 = hits_k = reciprocal_ranks = 0.0
+        for query, matches in zip(queries, index.search_many(texts, len(index.rows))):
+            ranked = [match['index'] for match in matches]
+            rank = ranked.index(query['expected']) + 1 if query['expected'] in ranked else None
+            if rank is not None:
+                hits_1 += rank == 1
+                hits_k += rank <= k
+                reciprocal_ranks += 1.0 / rank
+        latencies = np.array(latencies) * 1000
+        return {
+            'backend': backend,
+            'entries': int(len(index.rows)),
+            'queries': len(queries),
+            'buildSeconds': build_time,
+            'meanLatencyMs': float(latencies.mean()),
+            'p95LatencyMs': float(np.percentile(latencies, 95)),
+            'batchMsPerQuery': batch_time * 1000 / len(texts),
+            'hitAt1': hits_1 / len(queries),
+            f'hitAt{k}': hits_k / len(queries),
+            'mrr': reciprocal_ranks / len(queries),
+            'sample': [[match['index'] for match in matches] for matches in batched[:3]]
+        }
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the retriever backends of rag_index.py")
+    parser.add_argument('--backends', nargs='+', choices=sorted(rag_index.BACKENDS), default=sorted(rag_index.BACKENDS))
+    parser.add_argument('--database', default='./database-algorithm.json')
+    parser.add_argument('--field', default='description', help="entry field that is indexed")
+    parser.add_argument('--queries', default=None, help="JSON list of {\"query\", \"expected\"} (default: entry names)")
+    parser.add_argument('-k', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20, help="times every query is timed")
+    parser.add_argument('--output', default=None, help="also save the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = json.load(f)
+    else:
+        queries = default_queries(args.database)
+
+    results = []
+    for backend in args.backends:
+        print(f"Benchmarking {backend}...")
+        results.append(benchmark_backend(backend, args.database, args.field, queries, args.k, args.repeat))
+
+    print(f"\n{'backend':<10} {'build s':>8} {'mean ms':>8} {'p95 ms':>8} {'batch ms':>9} {'hit@1':>6} {f'hit@{args.k}':>6} {'MRR':>6}")
+    for result in results:
+        print(f"{result['backend']:<10} {result['buildSeconds']:>8.2f} {result['meanLatencyMs']:>8.3f} {result['p95LatencyMs']:>8.3f} "
+              f"{result['batchMsPerQuery']:>9.3f} {result['hitAt1']:>6.2f} {result[f'hitAt{args.k}']:>6.2f} {result['mrr']:>6.2f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,85 @@
+###### Server startup profile
+# Imports server.py in a fresh interpreter with `python -X importtime` and reports where the import time goes:
+# per top-level package (cumulative) and per module (self time), plus the peak memory of the interpreter.
+# Doubles as a regression check: exits with status 1 when the import takes longer than the budget, or when a heavy
+# package that should only be loaded on first use (torch, sklearn, the LLM SDKs, ...) is imported at startup.
+# Usage:
+#   python profile_startup.py [--budget 1.0] [--top 15] [--module server]
+import os
+import sys
+import argparse
+import resource
+import subprocess
+
+SERVER_IMPORT_BUDGET = float(os.environ.get("SERVER_IMPORT_BUDGET", 1.0))
+# Packages the server must not import before the first request that needs them
+DEFERRED_PACKAGES = (
+    'torch', 'transformers', 'sentence_transformers', 'sklearn', 'scipy', 'numpy',
+    'openai', 'anthropic', 'httpx'
+)
+
+
+def profile_import(module):
+    """
+    [(module name, self microseconds, cumulative microseconds, depth)] in import order, and the child's peak RSS in MB.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return records, peak_rss_mb
+
+
+def report(records, module, top):
+    total = next((cumulative for name, _, cumulative, depth in records if name == module and depth == 0), 0)
+    packages = {}
+    for name, _, cumulative, depth in records:
+        if depth <= 1:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + cumulative
+    slowest = sorted(records, key=lambda record: record[1], reverse=True)[:top]
+
+    print(f"import {module}: {total / 1e6:.3f} seconds, {len(records)} modules")
+    print(f"\n{'package':<40} {'cumulative ms':>14}")
+    for package, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        if package != module:
+            print(f"{package:<40} {cumulative / 1000:>14.1f}")
+    print(f"\n{'module':<40} {'self ms':>14}")
+    for name, self_us, _, _ in slowest:
+        print(f"{name:<40} {self_us / 1000:>14.1f}")
+    return total / 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Profile the import time of the server and check it against a budget")
+    parser.add_argument('--module', default='server')
+    parser.add_argument('--budget', type=float, default=SERVER_IMPORT_BUDGET, help="maximum import time in seconds")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    records, peak_rss_mb = profile_import(args.module)
+    total = report(records, args.module, args.top)
+    print(f"\nPeak memory: {peak_rss_mb:.0f} MB")
+
+    failures = []
+    if total > args.budget:
+        failures.append(f"import took {total:.3f} seconds, budget is {args.budget:.3f}")
+    imported = {name.split('.')[0] for name, _, _, _ in records}
+    for package in DEFERRED_PACKAGES:
+        if package in imported:
+            failures.append(f"{package} is imported at startup")
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print(f"\nOK: within the {args.budget:.3f} second budget, no deferred package imported")
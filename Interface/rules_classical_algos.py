@@ -1,183 +1,328 @@
+###### Classical algorithm generators
+# Every parameterised model of database-algorithm.json has a generator here, registered under its id with
+# @generator(id, *params). The Param schema of a generator parses and validates the value typed in the front-end
+# (values separated by comma or space, in the order of the params) and describes the expected input.
+# process_classical_algos dispatches with a dict lookup and memoizes the generated code per (id, parameters).
 import re
-def process_classical_algos(algo_id, var_value):
-    if isinstance(var_value, str):
-        try:
-            var_value = int(var_value)
-        except ValueError:
-            pass
-    if algo_id == "peterson":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        lines = []
-        lines.append(f"#define N {var_value};")
-        lines.append("")
-        lines.append("var step[N];")
-        lines.append("var pos[N];")
-        lines.append("var counter = 0; //which counts how many processes are in the critical session.")
-        
-        # For each process from 0 to var_value-1
-        for i in range(var_value):
-            # Process definition line
-            lines.append(f"Process{i}() = Repeat{i}(1); cs.{i}{{counter = counter+1;}} -> reset{{pos[{i}] = 0; counter = counter-1;}} -> Process{i}();")
-            # First line of the Repeat procedure
-            lines.append(f"Repeat{i}(j) = [j < N] update.{i}.1{{pos[{i}] = j;}} -> update.{i}.2{{step[j] = {i};}} -> ")
-            # Construct the waiting branch condition:
-            # It should check that for every other process k, pos[k] < j.
-            cond_list = []
-            for k in range(var_value):
-                if k != i:
-                    cond_list.append(f"pos[{k}] < j")
-            condition = " && ".join(cond_list)
-            # The waiting branch (indented by 16 spaces)
-            lines.append(f"{' ' * 16}([step[j] != {i} || ({condition})]idle.j -> Repeat{i}(j+1))")
-            # The alternative branch (indented by 8 spaces)
-            lines.append(f"{' ' * 8}[] [j == N] Skip;")
-            # Add a blank line between process blocks
-            lines.append("")
-        
-        # Combine the processes in parallel
-        process_names = " ||| ".join([f"Process{i}()" for i in range(var_value)])
-        lines.append(f"Peterson() = {process_names};")
-        lines.append("")
-        lines.append("#define goal counter > 1;")
-        lines.append("#assert Peterson() reaches goal;")
-        lines.append("#assert Peterson() |= []<> cs.0;")
-        
-        processed_code = "\n".join(lines)
+from collections import namedtuple
+from functools import lru_cache
 
-    elif algo_id == "dining_philosophers":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        lines = []
-        # Header
-        lines.append(f"#define N {var_value};")
-        lines.append("")
-        
-        # Process definitions (Phil and Fork)
-        lines.append("Phil(i) = get.i.(i+1)%N -> get.i.i -> eat.i -> put.i.(i+1)%N -> put.i.i -> Phil(i);")
-        lines.append("Fork(x) = get.x.x -> put.x.x -> Fork(x) [] get.(x-1)%N.x -> put.(x-1)%N.x -> Fork(x);")
-        lines.append("College() = ||x:{0..N-1}@(Phil(x)||Fork(x));")
-        
-        # Build the resource set for Implementation()
-        tokens = []
-        # For process 0: fixed tokens
-        tokens.append("get.0.0")
-        tokens.append("get.0.1")
-        tokens.append("put.0.0")
-        tokens.append("put.0.1")
-        # For each process i from 1 to var_value-1:
-        for i in range(1, var_value):
-            tokens.append(f"eat.{i}")
-            tokens.append(f"get.{i}.{i}")
-            tokens.append(f"get.{i}.{(i+1) % var_value}")
-            tokens.append(f"put.{i}.{i}")
-            tokens.append(f"put.{i}.{(i+1) % var_value}")
-        
-        tokens_str = ",".join(tokens)
-        lines.append(f"Implementation() = College() \\ {{{tokens_str}}};")
-        
-        # Specification and Properties (static text)
-        lines.append("Specification() = eat.0 -> Specification();")
-        lines.append("////////////////The Properties//////////////////")
-        lines.append("#assert College() deadlockfree;")
-        lines.append("#assert College() |= []<> eat.0;")
-        lines.append("#assert Implementation() refines Specification();")
-        lines.append("#assert Specification() refines Implementation();")
-        lines.append("#assert Implementation() refines <F> Specification();")
-        lines.append("#assert Specification() refines <F> Implementation();")
-        lines.append("#assert Implementation() refines <FD> Specification();")
-        lines.append("#assert Specification() refines <FD> Implementation();")
+GENERATED_CODE_CACHE_SIZE = 256
 
-        processed_code = "\n".join(lines)
+_COUNT_WORDS = {2: 'two', 3: 'three', 4: 'four'}
 
-    elif algo_id == "milner_scheduler":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        lines = []
-        # Header and alphabet declaration
-        lines.append(f"#define N {var_value};")
-        lines.append("#alphabet Cycle {ini.i,ini.(i+1)%N};")
-        lines.append("")
-        
-        # Cycle0 and Cycle(i) definitions
-        lines.append("Cycle0         = a.0 -> ini.1 -> work.0 -> ini.0 -> Cycle0;")
-        lines.append("Cycle(i)         = ini.i -> a.i -> (work.i -> atomic{ini.(i+1)%N -> Skip}; Cycle(i) [] ini.(i+1)%N -> atomic{work.i -> Skip}; Cycle(i));")
-        lines.append("MilnerAcyclic() = Cycle0 || (|| x:{1..N-1} @ Cycle(x)); ")
-        
-        # Build the token set for the Implementation() process.
-        # It always starts with tokens for process 0 and then for each process from 1 to var_value-1
-        tokens = []
-        tokens.append("ini.0")
-        tokens.append("a.0")
-        for i in range(1, var_value):
-            tokens.append(f"work.{i}")
-            tokens.append(f"ini.{i}")
-            tokens.append(f"a.{i}")
-        tokens_str = ",".join(tokens)
-        lines.append(f"Implementation()=(MilnerAcyclic() \\ {{{tokens_str}}});")
-        
-        # Specification definition
-        lines.append("Specification()=(work.0->Specification());")
-        lines.append("")
-        
-        # The Properties block (remains static)
-        lines.append("////////////////The Properties//////////////////")
-        lines.append("#assert MilnerAcyclic() deadlockfree;")
-        lines.append("#assert MilnerAcyclic() |= []<>work.0;")
-        lines.append("#assert Implementation() refines Specification();")
-        lines.append("#assert Specification() refines Implementation();")
-        lines.append("#assert Implementation() refines <F> Specification();")
-        lines.append("#assert Specification() refines <F> Implementation();")
-        lines.append("#assert Implementation() refines <FD> Specification();")
-        lines.append("#assert Specification() refines <FD> Implementation();")
+Generator = namedtuple('Generator', ['algo_id', 'params', 'build'])
 
-        processed_code = "\n".join(lines)
+# algo_id -> Generator
+GENERATORS = {}
 
-    elif algo_id == "readers_writers":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        lines = []
-        lines.append(f"#define M {var_value};")
-        lines.append("")
-        lines.append("Writer() \t= startwrite -> stopwrite -> Writer();")
-        lines.append("Reader() \t= startread -> stopread -> Reader();")
-        lines.append("Reading(i) \t= [i == 0]Controller() []")
-        lines.append("\t\t\t [i == M] stopread -> Reading(i-1) []")
-        lines.append("\t\t\t [i > 0 && i < M] (startread -> Reading(i+1) [] stopread -> Reading(i-1));")
-        lines.append("")
-        lines.append("Controller() \t= startread -> Reading(1)")
-        lines.append("\t\t\t [] stopread -> error -> Controller()")
-        lines.append("\t\t\t [] startwrite -> (stopwrite -> Controller() [] stopread -> error -> Controller());")
-        lines.append("")
-        lines.append("ReadersWriters() = Controller() || (|||x:{0..M-1} @ (Reader() ||| Writer()));")
-        lines.append("")
-        lines.append("Implementation() \t= ReadersWriters() \\ {startread, stopread, startwrite, stopwrite};")
-        lines.append("Specification() \t= error -> Specification();")
-        lines.append("")
-        lines.append("#alphabet Reading {startread,stopread};")
-        lines.append("")
-        lines.append("////////////////The Properties//////////////////")
-        lines.append("#assert ReadersWriters() deadlockfree;")
-        lines.append("#assert ReadersWriters() |= []<>error;")
-        lines.append("#assert ReadersWriters() |= ![]<>error;")
-        lines.append("#assert Implementation() refines Specification();")
-        lines.append("#assert Specification() refines Implementation();")
-        lines.append("#assert Implementation() refines <F> Specification();")
-        lines.append("#assert Specification() refines <F> Implementation();")
-        lines.append("#assert Implementation() refines <FD> Specification();")
-        lines.append("#assert Specification() refines <FD> Implementation();")
 
-        processed_code = "\n".join(lines)
+class Param:
+    """
+    One input of a generator: an integer within [minimum, maximum], or one of a few words (choices).
+    """
+    def __init__(self, name, minimum=None, maximum=None, choices=None):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = tuple(choices) if choices else None
 
-    elif algo_id == "dijkstra":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        # Build the sum for the mutual exclusion property: "enter_cs[0] + enter_cs[1] + ... + enter_cs[var_value-1]"
-        token_list = " + ".join([f"enter_cs[{i}]" for i in range(var_value)])
-        
-        # Template for Dijkstra's algorithm.
-        # Note: Double curly braces {{ and }} produce literal { and } in the output.
-        template = """#define N {N};
+    def parse(self, text):
+        """
+        The value of `text` for this parameter, or None if it is not a valid one.
+        """
+        text = str(text).strip()
+        if self.choices:
+            text = text.lower()
+            return text if text in self.choices else None
+        try:
+            value = int(text)
+        except ValueError:
+            return None
+        if self.minimum is not None and value < self.minimum:
+            return None
+        if self.maximum is not None and value > self.maximum:
+            return None
+        return value
+
+    def requirement(self):
+        if self.choices:
+            return "either " + " or ".join(f"'{choice}'" for choice in self.choices)
+        if self.minimum is not None and self.maximum is not None:
+            return f"between {self.minimum} and {self.maximum}"
+        if self.minimum is not None:
+            return f"at least {self.minimum}"
+        if self.maximum is not None:
+            return f"at most {self.maximum}"
+        return "a number"
+
+    def describe(self):
+        """
+        num_processes (at least 2)
+        """
+        return f"{self.name} ({self.requirement()})"
+
+    def to_dict(self):
+        schema = {'name': self.name, 'type': 'choice' if self.choices else 'int'}
+        if self.choices:
+            schema['choices'] = list(self.choices)
+        if self.minimum is not None:
+            schema['minimum'] = self.minimum
+        if self.maximum is not None:
+            schema['maximum'] = self.maximum
+        return schema
+
+
+def generator(algo_id, *params):
+    """
+    Register the decorated function as the generator of `algo_id`. It is called with the parsed values of `params`.
+    """
+    def register(build):
+        GENERATORS[algo_id] = Generator(algo_id, params, build)
+        return build
+    return register
+
+
+def get_generator(algo_id):
+    if algo_id not in GENERATORS:
+        raise ValueError("Sorry, this algorithm does not exist in our database yet.")
+    return GENERATORS[algo_id]
+
+
+def describe_parameters(algo_id):
+    """
+    Text shown to the user above the input box, e.g. "x (at least 2) and y (at least 1)". Empty if there is no generator.
+    """
+    if algo_id not in GENERATORS:
+        return ""
+    descriptions = [param.describe() for param in GENERATORS[algo_id].params]
+    if len(descriptions) <= 2:
+        return " and ".join(descriptions)
+    return ", ".join(descriptions[:-1]) + ", and " + descriptions[-1]
+
+
+def parameter_schema(algo_id):
+    if algo_id not in GENERATORS:
+        return []
+    return [param.to_dict() for param in GENERATORS[algo_id].params]
+
+
+def parse_parameters(algo_id, var_value):
+    """
+    Tuple of the values of the parameters of `algo_id` in `var_value` ("4", "3, faulty, tau", 4, ...).
+    Raises ValueError with a message for the user if the input does not match the schema.
+    """
+    params = get_generator(algo_id).params
+    if len(params) == 1:
+        value = params[0].parse(var_value)
+        if value is None:
+            if params[0].choices:
+                raise ValueError(f"Please enter {params[0].requirement()}!")
+            raise ValueError(f"Please enter a valid number which is {params[0].requirement()}!")
+        return (value,)
+
+    texts = [text for text in re.split(r'[,\s]+', str(var_value).strip()) if text]
+    if len(texts) != len(params):
+        count = _COUNT_WORDS.get(len(params), str(len(params)))
+        raise ValueError(f"Please ensure that you've entered a valid value for each of the {count} variables, and separated the values by comma or space!")
+    values = tuple(param.parse(text) for param, text in zip(params, texts))
+    if any(value is None for value in values):
+        raise ValueError("Please ensure that the values you entered adhere to the requirements!")
+    return values
+
+
+@lru_cache(maxsize=GENERATED_CODE_CACHE_SIZE)
+def _generate(algo_id, values):
+    return GENERATORS[algo_id].build(*values)
+
+
+def process_classical_algos(algo_id, var_value):
+    """
+    PAT code of the classical algorithm `algo_id` for the parameters typed by the user (`var_value`).
+    """
+    return _generate(algo_id, parse_parameters(algo_id, var_value))
+
+
+@generator("peterson", Param("num_processes", minimum=2))
+def _generate_peterson(var_value):
+    lines = []
+    lines.append(f"#define N {var_value};")
+    lines.append("")
+    lines.append("var step[N];")
+    lines.append("var pos[N];")
+    lines.append("var counter = 0; //which counts how many processes are in the critical session.")
+
+    # For each process from 0 to var_value-1
+    for i in range(var_value):
+        # Process definition line
+        lines.append(f"Process{i}() = Repeat{i}(1); cs.{i}{{counter = counter+1;}} -> reset{{pos[{i}] = 0; counter = counter-1;}} -> Process{i}();")
+        # First line of the Repeat procedure
+        lines.append(f"Repeat{i}(j) = [j < N] update.{i}.1{{pos[{i}] = j;}} -> update.{i}.2{{step[j] = {i};}} -> ")
+        # Construct the waiting branch condition:
+        # It should check that for every other process k, pos[k] < j.
+        cond_list = []
+        for k in range(var_value):
+            if k != i:
+                cond_list.append(f"pos[{k}] < j")
+        condition = " && ".join(cond_list)
+        # The waiting branch (indented by 16 spaces)
+        lines.append(f"{' ' * 16}([step[j] != {i} || ({condition})]idle.j -> Repeat{i}(j+1))")
+        # The alternative branch (indented by 8 spaces)
+        lines.append(f"{' ' * 8}[] [j == N] Skip;")
+        # Add a blank line between process blocks
+        lines.append("")
+
+    # Combine the processes in parallel
+    process_names = " ||| ".join([f"Process{i}()" for i in range(var_value)])
+    lines.append(f"Peterson() = {process_names};")
+    lines.append("")
+    lines.append("#define goal counter > 1;")
+    lines.append("#assert Peterson() reaches goal;")
+    lines.append("#assert Peterson() |= []<> cs.0;")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("dining_philosophers", Param("num_philosophers", minimum=2))
+def _generate_dining_philosophers(var_value):
+    lines = []
+    # Header
+    lines.append(f"#define N {var_value};")
+    lines.append("")
+
+    # Process definitions (Phil and Fork)
+    lines.append("Phil(i) = get.i.(i+1)%N -> get.i.i -> eat.i -> put.i.(i+1)%N -> put.i.i -> Phil(i);")
+    lines.append("Fork(x) = get.x.x -> put.x.x -> Fork(x) [] get.(x-1)%N.x -> put.(x-1)%N.x -> Fork(x);")
+    lines.append("College() = ||x:{0..N-1}@(Phil(x)||Fork(x));")
+
+    # Build the resource set for Implementation()
+    tokens = []
+    # For process 0: fixed tokens
+    tokens.append("get.0.0")
+    tokens.append("get.0.1")
+    tokens.append("put.0.0")
+    tokens.append("put.0.1")
+    # For each process i from 1 to var_value-1:
+    for i in range(1, var_value):
+        tokens.append(f"eat.{i}")
+        tokens.append(f"get.{i}.{i}")
+        tokens.append(f"get.{i}.{(i+1) % var_value}")
+        tokens.append(f"put.{i}.{i}")
+        tokens.append(f"put.{i}.{(i+1) % var_value}")
+
+    tokens_str = ",".join(tokens)
+    lines.append(f"Implementation() = College() \\ {{{tokens_str}}};")
+
+    # Specification and Properties (static text)
+    lines.append("Specification() = eat.0 -> Specification();")
+    lines.append("////////////////The Properties//////////////////")
+    lines.append("#assert College() deadlockfree;")
+    lines.append("#assert College() |= []<> eat.0;")
+    lines.append("#assert Implementation() refines Specification();")
+    lines.append("#assert Specification() refines Implementation();")
+    lines.append("#assert Implementation() refines <F> Specification();")
+    lines.append("#assert Specification() refines <F> Implementation();")
+    lines.append("#assert Implementation() refines <FD> Specification();")
+    lines.append("#assert Specification() refines <FD> Implementation();")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("milner_scheduler", Param("num_schedulers", minimum=2))
+def _generate_milner_scheduler(var_value):
+    lines = []
+    # Header and alphabet declaration
+    lines.append(f"#define N {var_value};")
+    lines.append("#alphabet Cycle {ini.i,ini.(i+1)%N};")
+    lines.append("")
+
+    # Cycle0 and Cycle(i) definitions
+    lines.append("Cycle0         = a.0 -> ini.1 -> work.0 -> ini.0 -> Cycle0;")
+    lines.append("Cycle(i)         = ini.i -> a.i -> (work.i -> atomic{ini.(i+1)%N -> Skip}; Cycle(i) [] ini.(i+1)%N -> atomic{work.i -> Skip}; Cycle(i));")
+    lines.append("MilnerAcyclic() = Cycle0 || (|| x:{1..N-1} @ Cycle(x)); ")
+
+    # Build the token set for the Implementation() process.
+    # It always starts with tokens for process 0 and then for each process from 1 to var_value-1
+    tokens = []
+    tokens.append("ini.0")
+    tokens.append("a.0")
+    for i in range(1, var_value):
+        tokens.append(f"work.{i}")
+        tokens.append(f"ini.{i}")
+        tokens.append(f"a.{i}")
+    tokens_str = ",".join(tokens)
+    lines.append(f"Implementation()=(MilnerAcyclic() \\ {{{tokens_str}}});")
+
+    # Specification definition
+    lines.append("Specification()=(work.0->Specification());")
+    lines.append("")
+
+    # The Properties block (remains static)
+    lines.append("////////////////The Properties//////////////////")
+    lines.append("#assert MilnerAcyclic() deadlockfree;")
+    lines.append("#assert MilnerAcyclic() |= []<>work.0;")
+    lines.append("#assert Implementation() refines Specification();")
+    lines.append("#assert Specification() refines Implementation();")
+    lines.append("#assert Implementation() refines <F> Specification();")
+    lines.append("#assert Specification() refines <F> Implementation();")
+    lines.append("#assert Implementation() refines <FD> Specification();")
+    lines.append("#assert Specification() refines <FD> Implementation();")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("readers_writers", Param("num_persons", minimum=2))
+def _generate_readers_writers(var_value):
+    lines = []
+    lines.append(f"#define M {var_value};")
+    lines.append("")
+    lines.append("Writer() \t= startwrite -> stopwrite -> Writer();")
+    lines.append("Reader() \t= startread -> stopread -> Reader();")
+    lines.append("Reading(i) \t= [i == 0]Controller() []")
+    lines.append("\t\t\t [i == M] stopread -> Reading(i-1) []")
+    lines.append("\t\t\t [i > 0 && i < M] (startread -> Reading(i+1) [] stopread -> Reading(i-1));")
+    lines.append("")
+    lines.append("Controller() \t= startread -> Reading(1)")
+    lines.append("\t\t\t [] stopread -> error -> Controller()")
+    lines.append("\t\t\t [] startwrite -> (stopwrite -> Controller() [] stopread -> error -> Controller());")
+    lines.append("")
+    lines.append("ReadersWriters() = Controller() || (|||x:{0..M-1} @ (Reader() ||| Writer()));")
+    lines.append("")
+    lines.append("Implementation() \t= ReadersWriters() \\ {startread, stopread, startwrite, stopwrite};")
+    lines.append("Specification() \t= error -> Specification();")
+    lines.append("")
+    lines.append("#alphabet Reading {startread,stopread};")
+    lines.append("")
+    lines.append("////////////////The Properties//////////////////")
+    lines.append("#assert ReadersWriters() deadlockfree;")
+    lines.append("#assert ReadersWriters() |= []<>error;")
+    lines.append("#assert ReadersWriters() |= ![]<>error;")
+    lines.append("#assert Implementation() refines Specification();")
+    lines.append("#assert Specification() refines Implementation();")
+    lines.append("#assert Implementation() refines <F> Specification();")
+    lines.append("#assert Specification() refines <F> Implementation();")
+    lines.append("#assert Implementation() refines <FD> Specification();")
+    lines.append("#assert Specification() refines <FD> Implementation();")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("dijkstra", Param("num_processes", minimum=2))
+def _generate_dijkstra(var_value):
+    # Build the sum for the mutual exclusion property: "enter_cs[0] + enter_cs[1] + ... + enter_cs[var_value-1]"
+    token_list = " + ".join([f"enter_cs[{i}]" for i in range(var_value)])
+
+    # Template for Dijkstra's algorithm.
+    # Note: Double curly braces {{ and }} produce literal { and } in the output.
+    template = """#define N {N};
 
 var flag[N];
 var enter_cs[N];
@@ -225,22 +370,28 @@ Dijkstra() = [] x:{{0..N-1}} @ (tau{{turn = x}} -> (|||y :{{0..N-1}}@Process(y))
 
 #assert Dijkstra() deadlockfree;
 #assert Dijkstra() reaches p;"""
-        
-        processed_code = template.format(N=var_value, p_sum=token_list)
-
-    elif algo_id == "needham":
-        if var_value.lower() == "original":
-            processed_code = "enum {A, B, I, Na, Nb, gD};\n\n//ca: type 1 messages {x1,x2}PK{x3}\n//cb: type 2 messages {x1}PK{x2}\nchannel ca 0;\nchannel cb 0;\n\n//IniRunningAB is true iff initiator A takes part in a session of the protocol with B.\nvar IniRunningAB = false;\n//IniCommitAB is true iff initiator A commits to a session with B.\nvar IniCommitAB = false;\n//ResRunningAB is true iff responder B takes part in a session of the protocol with A.\nvar ResRunningAB = false;\n//ResCommitAB is true iff responder B commits to a session with A.\nvar ResCommitAB = false;\n\n//Initiator\nPIni(sender, receiver, nonce) =\n\tIniRunning_AB { if (sender == A && receiver == B) { IniRunningAB = true; } } ->\n\t//sending {nonce, sender}Pk{receiver}\n\tca!sender.nonce.sender.receiver ->\n\t\n\t//receiving {nonce, g1}Pk{sender}\n\tca?sender.nonce.g1.sender -> IniCommit_AB { if (sender == A && receiver == B) { IniCommitAB = true; } } ->\n\t\n\t//sending {g1}Pk{receiver}\n\tcb!sender.g1.receiver -> Skip;\n\n//Responder\nPRes(receiver, nonce) =\t\n\t//receiving {g2, g3}Pk{receiver}\n\tca?receiver.g2.g3.receiver ->\n\tResRunning_AB { if (g3 == A && receiver == B) { ResRunningAB = true; } } ->\n\t\n\t//sending {g2, nonce}Pk{g3}\n\tca!receiver.g2.nonce.g3 ->\n\t\n\t//receiving {nonce}Pk{receiver}\n\tcb?receiver.nonce.receiver ->\n\tResCommit_AB { if (g3 == A && receiver == B) { ResCommitAB = true; } } -> Skip;\n\n//Intruder knows Na\nvar kNa = false; \n//Intruder knows Nb\nvar kNb = false;\n//Intruder knows {Na, Nb}PK{A}\nvar k_Na_Nb__A = false;\n//Intruder knows {Na, A}PK{B}\nvar k_Na_A__B = false;\n//Intruder knows {Nb}PK{B}\nvar k_Nb__B = false;\n\n//Intruder Process, which always knows A, B, I, PK(A), PK(B), PK(I), SK(I) and Ng\nPI() =\n\tca!B.gD.A.B -> PI() []\n\tca!B.gD.B.B -> PI() []\n\tca!B.gD.I.B -> PI() []\n\t\n\tca!B.A.A.B -> PI []\n\tca!B.A.B.B -> PI []\n\tca!B.A.I.B -> PI []\n\t\n\tca!B.B.A.B -> PI() []\n\tca!B.B.B.B -> PI() []\n\tca!B.B.I.B -> PI() []\n\t\n\tca!B.I.A.B -> PI() []\n\tca!B.I.B.B -> PI() []\n\tca!B.I.I.B -> PI() []\n\t\n\t[kNa]                        ca!A.Na.Na.A -> PI() []\n\t[(kNa && kNb) || k_Na_Nb__A] ca!A.Na.Nb.A -> PI() []\n\t[kNa]                        ca!A.Na.gD.A -> PI() []\n\t\n\t[kNa] ca!A.Na.A.A -> PI() []\n\t[kNa] ca!A.Na.B.A -> PI() []\n\t[kNa] ca!A.Na.I.A -> PI() []\n\t\n\t[kNa || k_Na_A__B] ca!B.Na.A.B -> PI() []\n\t[kNa]              ca!B.Na.B.B -> PI() []\n\t[kNa]              ca!B.Na.I.B -> PI() []\n\t\n\t[kNb] ca!B.Nb.A.B -> PI() []\n\t[kNb] ca!B.Nb.B.B -> PI() []\n\t[kNb] ca!B.Nb.I.B -> PI() []\n\t\n\t[k_Nb__B || kNb] cb!B.Nb.B -> PI() []\n\t\n\tca?tmp1.x1.x2.x3\n\t-> InterceptChanA {\n\t\tif (x3 == I) {\n\t\t\tif (x1 == Na) { kNa = true; }\n\t\t\telse if (x1 == Nb) { kNb = true; }\n\t\t\tif (x2 == Na) { kNa = true; }\n\t\t\telse if (x2 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (x1 == Na && x2 == A && x3 == B) { k_Na_A__B = true; }\n\t\telse if (x1 == Na && x2 == Nb && x3 == A) { k_Na_Nb__A = true; }\n\t}\n\t-> PI() []\n\t\n\tcb?tmp2.y1.y2\n\t-> InterceptChanB {\n\t\tif (y2 == I) {\n\t\t\tif (y1 == Na) { kNa = true; }\n\t\t\telse if (y1 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (y1 == Nb && y2 == B) { k_Nb__B = true; }\n\t}\n\t-> PI();\n\nProtocol = ( PIni(A, I, Na) [] PIni(A, B, Na) ) ||| PRes(B, Nb) ||| PI;\n\n#define iniRunningAB (IniRunningAB == true);\n#define iniCommitAB (IniCommitAB == true);\n#define resRunningAB (ResRunningAB == true);\n#define resCommitAB (ResCommitAB == true);\n\n//Authentication of B to A can thus be expressed saying that ResRunningAB must become true before IniCommitAB.\n//i.e., the initiator A commits to a session with B only if B has indeed taken part in a run of the protocol with A.\n#assert Protocol |= [] ( ([] !iniCommitAB) || (!iniCommitAB U resRunningAB) );\n\n//The converse authentication property corresponds to saying that IniRunningAB becomes true before ResCommitAB.\n//The flaw of the protocol is shown by this model\n#assert Protocol |= [] ( ([] !resCommitAB) || (!resCommitAB U iniRunningAB) );\n\n#assert Protocol deadlockfree;"
-        elif var_value.lower() == "fixed":
-            processed_code =  "enum {A, B, I, Na, Nb, gD};\n\n//ca: type 1 messages {x1,x2}PK{x3}\n//cb: type 2 messages {x1}PK{x2}\n//cc: type 3 messages {x1,x2,x3}PK{x4}\nchannel ca 0;\nchannel cb 0;\nchannel cc 0;\n\n//IniRunningAB is true iff initiator A takes part in a session of the protocol with B.\nvar IniRunningAB = false;\n//IniCommitAB is true iff initiator A commits to a session with B.\nvar IniCommitAB = false;\n//ResRunningAB is true iff responder B takes part in a session of the protocol with A.\nvar ResRunningAB = false;\n//ResCommitAB is true iff responder B commits to a session with A.\nvar ResCommitAB = false;\n\n//Initiator\nPIni(sender, receiver, nonce) =\n\tIniRunning_AB { if (sender == A && receiver == B) { IniRunningAB = true; } } ->\n\t\n\t//sending {nonce, sender}Pk{receiver}\n\tca!sender.nonce.sender.receiver ->\n\t\n\t//receiving {nonce, g1}Pk{sender}\n\tcc?sender.nonce.g1.receiver.sender -> IniCommit_AB { if (sender == A && receiver == B) { IniCommitAB = true; } } ->\n\t\n\t//sending {g1}Pk{receiver}\n\tcb!sender.g1.receiver -> Skip;\n\n//Responder\nPRes(receiver, nonce) =\t\n\t//receiving {g2, g3}Pk{receiver}\n\tca?receiver.g2.g3.receiver -> ResRunning_AB { if (g3 == A && receiver == B) { ResRunningAB = true; } } ->\n\t\n\t//sending {g2, nonce, receiver}Pk{g3}\n\tcc!receiver.g2.nonce.receiver.g3 ->\n\t\t\n\t//receiving {nonce}Pk{receiver}\n\tcb?receiver.nonce.receiver -> ResCommit_AB { if (g3 == A && receiver == B) { ResCommitAB = true; } } -> Skip;\n\n//Intruder knows Na\nvar kNa = false; \n//Intruder knows Nb\nvar kNb = false;\n//Intruder knows {Na, Nb, B}PK{A}\nvar k_Na_Nb_B__A = false;\n//Intruder knows {Na, A}PK{B}\nvar k_Na_A__B = false;\n//Intruder knows {Nb}PK{B}\nvar k_Nb__B = false;\n\n//Intruder Process, which always knows A, B, I, PK(A), PK(B), PK(I), SK(I) and Ng\nPI() =\n\tca!B.gD.A.B -> PI() []\n\tca!B.gD.B.B -> PI() []\n\tca!B.gD.I.B -> PI() []\n\t\n\tca!B.A.A.B -> PI() []\n\tca!B.A.B.B -> PI() []\n\tca!B.A.I.B -> PI() []\n\t\n\tca!B.B.A.B -> PI() []\n\tca!B.B.B.B -> PI() []\n\tca!B.B.I.B -> PI() []\n\t\n\tca!B.I.A.B -> PI() []\n\tca!B.I.B.B -> PI() []\n\tca!B.I.I.B -> PI() []\n\t\n\t[kNa]                        cc!A.Na.Na.B.A -> PI() []\n\t[(kNa && kNb) || k_Na_Nb_B__A] cc!A.Na.Nb.B.A -> PI() []\n\t[kNa]                        cc!A.Na.gD.B.A -> PI() []\n\t\n\t[kNa] cc!A.Na.A.B.A -> PI() []\n\t[kNa] cc!A.Na.B.B.A -> PI() []\n\t[kNa] cc!A.Na.I.B.A -> PI() []\n\t\n\t[kNa]        cc!A.Na.Na.I.A -> PI() []\n\t[kNa && kNb] cc!A.Na.Nb.I.A -> PI() []\n\t[kNa]        cc!A.Na.gD.I.A -> PI() []\n\t\n\t[kNa] cc!A.Na.A.I.A -> PI() []\n\t[kNa] cc!A.Na.B.I.A -> PI() []\n\t[kNa] cc!A.Na.I.I.A -> PI() []\n\t\n\t[kNa || k_Na_A__B] ca!B.Na.A.B -> PI() []\n\t[kNa]              ca!B.Na.B.B -> PI() []\n\t[kNa]              ca!B.Na.I.B -> PI() []\n\t\n\t[kNb] ca!B.Nb.A.B -> PI() []\n\t[kNb] ca!B.Nb.B.B -> PI() []\n\t[kNb] ca!B.Nb.I.B -> PI() []\n\t\n\t[k_Nb__B || kNb] cb!B.Nb.B -> PI() []\n\t\n\tca?tmp1.x1.x2.x3\n\t-> InterceptChanA {\n\t\tif (x3 == I) {\n\t\t\tif (x1 == Na) { kNa = true; }\n\t\t\telse if (x1 == Nb) { kNb = true; }\n\t\t\tif (x2 == Na) { kNa = true; }\n\t\t\telse if (x2 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (x1 == Na && x2 == A && x3 == B) { k_Na_A__B = true; }\n\t} -> PI() []\n\t\n\tcb?tmp2.y1.y2\n\t-> InterceptChanB {\n\t\tif (y2 == I) {\n\t\t\tif (y1 == Na) { kNa = true; }\n\t\t\telse if (y1 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (y1 == Nb && y2 == B) { k_Nb__B = true; }\n\t} ->  PI() []\n\t\n\tcc?tmp3.z1.z2.z3.z4 \n\t-> InterceptChanC {\n\t\tif (z4 == I) {\n\t\t\tif (z1 == Na) { kNa = true; }\n\t\t\telse if (z1 == Nb) { kNb = true; }\n\t\t\tif (z2 == Na) { kNa = true; }\n\t\t\telse if (z2 == Nb) { kNb = true; }\n\t\t\tif (z3 == Na) { kNa = true; }\n\t\t\telse if (z3 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (z1 == Na && z2 == Nb && z3 == B && z4 == A) { k_Na_Nb_B__A = true; }\n\t} -> PI;\n\nProtocol = ( PIni(A, I, Na) [] PIni(A, B, Na) ) ||| PRes(B, Nb) ||| PI;\n\n#define iniRunningAB (IniRunningAB == true);\n#define iniCommitAB (IniCommitAB == true);\n#define resRunningAB (ResRunningAB == true);\n#define resCommitAB (ResCommitAB == true);\n\n//Authentication of B to A can thus be expressed saying that ResRunningAB must become true before IniCommitAB.\n//i.e., the initiator A commits to a session with B only if B has indeed taken part in a run of the protocol with A.\n#assert Protocol |= [] ( ([] !iniCommitAB) || (!iniCommitAB U resRunningAB) );\n\n//The converse authentication property corresponds to saying that IniRunningAB becomes true before ResCommitAB.\n//The flaw of the protocol is shown by this model\n#assert Protocol |= [] ( ([] !resCommitAB) || (!resCommitAB U iniRunningAB) );\n\n#assert Protocol deadlockfree;"
-        else:
-            raise ValueError("Please enter a valid option!")
-        
-    elif algo_id == "interrupt_controller":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        
-        processed_code = f"""#define MODULO {var_value};
+
+    processed_code = template.format(N=var_value, p_sum=token_list)
+
+    return processed_code
+
+
+@generator("needham", Param("version", choices=('original', 'fixed')))
+def _generate_needham(var_value):
+    if var_value.lower() == "original":
+        processed_code = "enum {A, B, I, Na, Nb, gD};\n\n//ca: type 1 messages {x1,x2}PK{x3}\n//cb: type 2 messages {x1}PK{x2}\nchannel ca 0;\nchannel cb 0;\n\n//IniRunningAB is true iff initiator A takes part in a session of the protocol with B.\nvar IniRunningAB = false;\n//IniCommitAB is true iff initiator A commits to a session with B.\nvar IniCommitAB = false;\n//ResRunningAB is true iff responder B takes part in a session of the protocol with A.\nvar ResRunningAB = false;\n//ResCommitAB is true iff responder B commits to a session with A.\nvar ResCommitAB = false;\n\n//Initiator\nPIni(sender, receiver, nonce) =\n\tIniRunning_AB { if (sender == A && receiver == B) { IniRunningAB = true; } } ->\n\t//sending {nonce, sender}Pk{receiver}\n\tca!sender.nonce.sender.receiver ->\n\t\n\t//receiving {nonce, g1}Pk{sender}\n\tca?sender.nonce.g1.sender -> IniCommit_AB { if (sender == A && receiver == B) { IniCommitAB = true; } } ->\n\t\n\t//sending {g1}Pk{receiver}\n\tcb!sender.g1.receiver -> Skip;\n\n//Responder\nPRes(receiver, nonce) =\t\n\t//receiving {g2, g3}Pk{receiver}\n\tca?receiver.g2.g3.receiver ->\n\tResRunning_AB { if (g3 == A && receiver == B) { ResRunningAB = true; } } ->\n\t\n\t//sending {g2, nonce}Pk{g3}\n\tca!receiver.g2.nonce.g3 ->\n\t\n\t//receiving {nonce}Pk{receiver}\n\tcb?receiver.nonce.receiver ->\n\tResCommit_AB { if (g3 == A && receiver == B) { ResCommitAB = true; } } -> Skip;\n\n//Intruder knows Na\nvar kNa = false; \n//Intruder knows Nb\nvar kNb = false;\n//Intruder knows {Na, Nb}PK{A}\nvar k_Na_Nb__A = false;\n//Intruder knows {Na, A}PK{B}\nvar k_Na_A__B = false;\n//Intruder knows {Nb}PK{B}\nvar k_Nb__B = false;\n\n//Intruder Process, which always knows A, B, I, PK(A), PK(B), PK(I), SK(I) and Ng\nPI() =\n\tca!B.gD.A.B -> PI() []\n\tca!B.gD.B.B -> PI() []\n\tca!B.gD.I.B -> PI() []\n\t\n\tca!B.A.A.B -> PI []\n\tca!B.A.B.B -> PI []\n\tca!B.A.I.B -> PI []\n\t\n\tca!B.B.A.B -> PI() []\n\tca!B.B.B.B -> PI() []\n\tca!B.B.I.B -> PI() []\n\t\n\tca!B.I.A.B -> PI() []\n\tca!B.I.B.B -> PI() []\n\tca!B.I.I.B -> PI() []\n\t\n\t[kNa]                        ca!A.Na.Na.A -> PI() []\n\t[(kNa && kNb) || k_Na_Nb__A] ca!A.Na.Nb.A -> PI() []\n\t[kNa]                        ca!A.Na.gD.A -> PI() []\n\t\n\t[kNa] ca!A.Na.A.A -> PI() []\n\t[kNa] ca!A.Na.B.A -> PI() []\n\t[kNa] ca!A.Na.I.A -> PI() []\n\t\n\t[kNa || k_Na_A__B] ca!B.Na.A.B -> PI() []\n\t[kNa]              ca!B.Na.B.B -> PI() []\n\t[kNa]              ca!B.Na.I.B -> PI() []\n\t\n\t[kNb] ca!B.Nb.A.B -> PI() []\n\t[kNb] ca!B.Nb.B.B -> PI() []\n\t[kNb] ca!B.Nb.I.B -> PI() []\n\t\n\t[k_Nb__B || kNb] cb!B.Nb.B -> PI() []\n\t\n\tca?tmp1.x1.x2.x3\n\t-> InterceptChanA {\n\t\tif (x3 == I) {\n\t\t\tif (x1 == Na) { kNa = true; }\n\t\t\telse if (x1 == Nb) { kNb = true; }\n\t\t\tif (x2 == Na) { kNa = true; }\n\t\t\telse if (x2 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (x1 == Na && x2 == A && x3 == B) { k_Na_A__B = true; }\n\t\telse if (x1 == Na && x2 == Nb && x3 == A) { k_Na_Nb__A = true; }\n\t}\n\t-> PI() []\n\t\n\tcb?tmp2.y1.y2\n\t-> InterceptChanB {\n\t\tif (y2 == I) {\n\t\t\tif (y1 == Na) { kNa = true; }\n\t\t\telse if (y1 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (y1 == Nb && y2 == B) { k_Nb__B = true; }\n\t}\n\t-> PI();\n\nProtocol = ( PIni(A, I, Na) [] PIni(A, B, Na) ) ||| PRes(B, Nb) ||| PI;\n\n#define iniRunningAB (IniRunningAB == true);\n#define iniCommitAB (IniCommitAB == true);\n#define resRunningAB (ResRunningAB == true);\n#define resCommitAB (ResCommitAB == true);\n\n//Authentication of B to A can thus be expressed saying that ResRunningAB must become true before IniCommitAB.\n//i.e., the initiator A commits to a session with B only if B has indeed taken part in a run of the protocol with A.\n#assert Protocol |= [] ( ([] !iniCommitAB) || (!iniCommitAB U resRunningAB) );\n\n//The converse authentication property corresponds to saying that IniRunningAB becomes true before ResCommitAB.\n//The flaw of the protocol is shown by this model\n#assert Protocol |= [] ( ([] !resCommitAB) || (!resCommitAB U iniRunningAB) );\n\n#assert Protocol deadlockfree;"
+    elif var_value.lower() == "fixed":
+        processed_code =  "enum {A, B, I, Na, Nb, gD};\n\n//ca: type 1 messages {x1,x2}PK{x3}\n//cb: type 2 messages {x1}PK{x2}\n//cc: type 3 messages {x1,x2,x3}PK{x4}\nchannel ca 0;\nchannel cb 0;\nchannel cc 0;\n\n//IniRunningAB is true iff initiator A takes part in a session of the protocol with B.\nvar IniRunningAB = false;\n//IniCommitAB is true iff initiator A commits to a session with B.\nvar IniCommitAB = false;\n//ResRunningAB is true iff responder B takes part in a session of the protocol with A.\nvar ResRunningAB = false;\n//ResCommitAB is true iff responder B commits to a session with A.\nvar ResCommitAB = false;\n\n//Initiator\nPIni(sender, receiver, nonce) =\n\tIniRunning_AB { if (sender == A && receiver == B) { IniRunningAB = true; } } ->\n\t\n\t//sending {nonce, sender}Pk{receiver}\n\tca!sender.nonce.sender.receiver ->\n\t\n\t//receiving {nonce, g1}Pk{sender}\n\tcc?sender.nonce.g1.receiver.sender -> IniCommit_AB { if (sender == A && receiver == B) { IniCommitAB = true; } } ->\n\t\n\t//sending {g1}Pk{receiver}\n\tcb!sender.g1.receiver -> Skip;\n\n//Responder\nPRes(receiver, nonce) =\t\n\t//receiving {g2, g3}Pk{receiver}\n\tca?receiver.g2.g3.receiver -> ResRunning_AB { if (g3 == A && receiver == B) { ResRunningAB = true; } } ->\n\t\n\t//sending {g2, nonce, receiver}Pk{g3}\n\tcc!receiver.g2.nonce.receiver.g3 ->\n\t\t\n\t//receiving {nonce}Pk{receiver}\n\tcb?receiver.nonce.receiver -> ResCommit_AB { if (g3 == A && receiver == B) { ResCommitAB = true; } } -> Skip;\n\n//Intruder knows Na\nvar kNa = false; \n//Intruder knows Nb\nvar kNb = false;\n//Intruder knows {Na, Nb, B}PK{A}\nvar k_Na_Nb_B__A = false;\n//Intruder knows {Na, A}PK{B}\nvar k_Na_A__B = false;\n//Intruder knows {Nb}PK{B}\nvar k_Nb__B = false;\n\n//Intruder Process, which always knows A, B, I, PK(A), PK(B), PK(I), SK(I) and Ng\nPI() =\n\tca!B.gD.A.B -> PI() []\n\tca!B.gD.B.B -> PI() []\n\tca!B.gD.I.B -> PI() []\n\t\n\tca!B.A.A.B -> PI() []\n\tca!B.A.B.B -> PI() []\n\tca!B.A.I.B -> PI() []\n\t\n\tca!B.B.A.B -> PI() []\n\tca!B.B.B.B -> PI() []\n\tca!B.B.I.B -> PI() []\n\t\n\tca!B.I.A.B -> PI() []\n\tca!B.I.B.B -> PI() []\n\tca!B.I.I.B -> PI() []\n\t\n\t[kNa]                        cc!A.Na.Na.B.A -> PI() []\n\t[(kNa && kNb) || k_Na_Nb_B__A] cc!A.Na.Nb.B.A -> PI() []\n\t[kNa]                        cc!A.Na.gD.B.A -> PI() []\n\t\n\t[kNa] cc!A.Na.A.B.A -> PI() []\n\t[kNa] cc!A.Na.B.B.A -> PI() []\n\t[kNa] cc!A.Na.I.B.A -> PI() []\n\t\n\t[kNa]        cc!A.Na.Na.I.A -> PI() []\n\t[kNa && kNb] cc!A.Na.Nb.I.A -> PI() []\n\t[kNa]        cc!A.Na.gD.I.A -> PI() []\n\t\n\t[kNa] cc!A.Na.A.I.A -> PI() []\n\t[kNa] cc!A.Na.B.I.A -> PI() []\n\t[kNa] cc!A.Na.I.I.A -> PI() []\n\t\n\t[kNa || k_Na_A__B] ca!B.Na.A.B -> PI() []\n\t[kNa]              ca!B.Na.B.B -> PI() []\n\t[kNa]              ca!B.Na.I.B -> PI() []\n\t\n\t[kNb] ca!B.Nb.A.B -> PI() []\n\t[kNb] ca!B.Nb.B.B -> PI() []\n\t[kNb] ca!B.Nb.I.B -> PI() []\n\t\n\t[k_Nb__B || kNb] cb!B.Nb.B -> PI() []\n\t\n\tca?tmp1.x1.x2.x3\n\t-> InterceptChanA {\n\t\tif (x3 == I) {\n\t\t\tif (x1 == Na) { kNa = true; }\n\t\t\telse if (x1 == Nb) { kNb = true; }\n\t\t\tif (x2 == Na) { kNa = true; }\n\t\t\telse if (x2 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (x1 == Na && x2 == A && x3 == B) { k_Na_A__B = true; }\n\t} -> PI() []\n\t\n\tcb?tmp2.y1.y2\n\t-> InterceptChanB {\n\t\tif (y2 == I) {\n\t\t\tif (y1 == Na) { kNa = true; }\n\t\t\telse if (y1 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (y1 == Nb && y2 == B) { k_Nb__B = true; }\n\t} ->  PI() []\n\t\n\tcc?tmp3.z1.z2.z3.z4 \n\t-> InterceptChanC {\n\t\tif (z4 == I) {\n\t\t\tif (z1 == Na) { kNa = true; }\n\t\t\telse if (z1 == Nb) { kNb = true; }\n\t\t\tif (z2 == Na) { kNa = true; }\n\t\t\telse if (z2 == Nb) { kNb = true; }\n\t\t\tif (z3 == Na) { kNa = true; }\n\t\t\telse if (z3 == Nb) { kNb = true; }\n\t\t}\n\t\telse if (z1 == Na && z2 == Nb && z3 == B && z4 == A) { k_Na_Nb_B__A = true; }\n\t} -> PI;\n\nProtocol = ( PIni(A, I, Na) [] PIni(A, B, Na) ) ||| PRes(B, Nb) ||| PI;\n\n#define iniRunningAB (IniRunningAB == true);\n#define iniCommitAB (IniCommitAB == true);\n#define resRunningAB (ResRunningAB == true);\n#define resCommitAB (ResCommitAB == true);\n\n//Authentication of B to A can thus be expressed saying that ResRunningAB must become true before IniCommitAB.\n//i.e., the initiator A commits to a session with B only if B has indeed taken part in a run of the protocol with A.\n#assert Protocol |= [] ( ([] !iniCommitAB) || (!iniCommitAB U resRunningAB) );\n\n//The converse authentication property corresponds to saying that IniRunningAB becomes true before ResCommitAB.\n//The flaw of the protocol is shown by this model\n#assert Protocol |= [] ( ([] !resCommitAB) || (!resCommitAB U iniRunningAB) );\n\n#assert Protocol deadlockfree;"
+    else:
+        raise ValueError("Please enter a valid option!")
+
+    return processed_code
+
+
+@generator("interrupt_controller", Param("counter_modulo", minimum=2))
+def _generate_interrupt_controller(var_value):
+
+    processed_code = f"""#define MODULO {var_value};
 
 // Input to the counter
 channel up 0;
@@ -269,11 +420,13 @@ aSys = Int ||| C ||| Evn;
 #define goal noOfError > 0;
 #assert aSys reaches goal;"""
 
-    elif algo_id == "abp":
-        if var_value < 1:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        
-        processed_code = f"""#define CHANNELSIZE {var_value};
+    return processed_code
+
+
+@generator("abp", Param("channel_size", minimum=1))
+def _generate_abp(var_value):
+
+    processed_code = f"""#define CHANNELSIZE {var_value};
 
 channel c CHANNELSIZE; //unreliable channel.
 channel d CHANNELSIZE; //perfect channel.
@@ -302,11 +455,13 @@ ABP = Sender(0) ||| Receiver(0) ||| Timer;
 #assert ABP deadlockfree;
 #assert ABP |= []<> lost;"""
 
-    elif algo_id == "tpcp":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        
-        processed_code = f"""#define N {var_value}; //number of pages
+    return processed_code
+
+
+@generator("tpcp", Param("num_pages", minimum=2))
+def _generate_tpcp(var_value):
+
+    processed_code = f"""#define N {var_value}; //number of pages
 enum {{Yes, No, Commit, Abort}}; //constants
 //channel result 0;
 //channel inform 0;
@@ -347,605 +502,581 @@ PU(i) = [i == 0](|||{{N}}@undo -> Skip)
  
 #assert Implementation refines Specification;"""
 
-    elif algo_id == "multi_register_1r_1w":
-        try:
-            var_value, implementation_type, event_type = re.split(r'[,\s]+', var_value.strip())
-            var_value = int(var_value)
-            implementation_type = implementation_type.lower()
-            event_type = event_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (var_value < 3) or (implementation_type not in ['faulty', 'correct']) or (event_type not in ['tau', 'explicit']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        if implementation_type == 'correct' and event_type == 'tau':
-            lines = []
-            # Define the shared binary array of size N.
-            # Create an array with all 0's except the last entry is 1.
-            b_elements = [ "0" for _ in range(var_value - 1) ] + ["1"]
-            b_array = "[" + ",".join(b_elements) + "]"
-            lines.append("//shared binary array of size N")
-            lines.append(f"var B = {b_array};")
-            lines.append("")
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_value - 1};")
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M = 0;")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers() = read_inv -> UpScan(0);")
-            lines.append("UpScan(i) = if(B[i] == 1) { DownScan(i - 1, i) } else { UpScan(i + 1) };")
-            lines.append("DownScan(i, v) =")
-            lines.append("\tif(i >= 0) {")
-            lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i) } else { DownScan(i - 1, v) }")
-            lines.append("\t} else {")
-            lines.append("\t\tread_res.v -> Readers()")
-            lines.append("\t};")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
-            lines.append("")
-            # Generate the list of Writers depending on var_value.
-            writer_list = "[]".join([f"Writer({i})" for i in range(var_value)])
-            lines.append(f"Writers() = ({writer_list}); Writers();")
-            lines.append("Register() = Readers() ||| Writers();")
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs() = read_inv -> tau{M=R;} -> read_res.M -> ReadersAbs();")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
-            lines.append("")
-            # Generate the list of WriterAbs processes.
-            writer_abs_list = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
-            lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
-            lines.append("RegisterAbs() = ReadersAbs() ||| WritersAbs();")
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-
-        elif implementation_type == 'correct' and event_type == 'explicit':
-            lines = []
-            # Shared array and register values
-            lines.append("//shared binary array of size N")
-            # Create an array with var_value-1 zeros and a final 1.
-            b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
-            lines.append(f"var B = {b_array};")
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_value - 1};")
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M = 0;")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers() = read_inv -> UpScan(0);")
-            lines.append("UpScan(i) = if(B[i] == 1) { DownScan(i - 1, i) } else { UpScan(i + 1) };")
-            lines.append("DownScan(i, v) =")
-            lines.append("\tif(i >= 0) {")
-            lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i) } else { DownScan(i - 1, v) }")
-            lines.append("\t} else {")
-            lines.append("\t\tread_res.v -> Readers()")
-            lines.append("\t};")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> write.i.1{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0) { write.i.0{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
-            lines.append("")
-            
-            # Writers process: list of Writer(i) separated by "[]"
-            writer_list = "[]".join([f"Writer({i})" for i in range(var_value)])
-            lines.append(f"Writers() = ({writer_list}); Writers();")
-            
-            # Register: concrete implementation hiding a set of write actions.
-            # For each i in 0..var_value-1, include tokens: write.i.0 and write.i.1.
-            concrete_tokens = []
-            for i in range(var_value):
-                concrete_tokens.append(f"write.{i}.0")
-                concrete_tokens.append(f"write.{i}.1")
-            tokens_concrete = ", ".join(concrete_tokens)
-            lines.append(f"Register() = (Readers() ||| Writers()) \\{{{tokens_concrete}}};")
-            lines.append("")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs() = read_inv -> read{M=R;} -> read_res.M -> ReadersAbs();")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> write.i{R=i;} -> write_res -> Skip;")
-            # List WriterAbs(i) for all pages.
-            writer_abs_list = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
-            lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
-            lines.append("")
-            
-            # RegisterAbs: abstract register hiding a different set.
-            # Tokens: for each i in 0..var_value-1, include "write.i" and then add "read".
-            abstract_tokens = [f"write.{i}" for i in range(var_value)]
-            abstract_tokens.append("read")
-            tokens_abstract = ", ".join(abstract_tokens)
-            lines.append(f"RegisterAbs() = (ReadersAbs() ||| WritersAbs()) \\{{{tokens_abstract}}};")
-            lines.append("")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-
-        elif implementation_type == 'faulty' and event_type == 'tau':
-            lines = []
-            # Shared binary array and register parameters
-            lines.append("//shared binary array of size N")
-            # B array: (var_value-1) zeros and a final 1
-            b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
-            lines.append(f"var B = {b_array};")
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_value - 1};")
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M = 0;")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers() = read_inv -> UpScan(0);")
-            lines.append("UpScan(i) = if(B[i] == 1) { read_res.i -> Readers() } else { UpScan(i + 1) };")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
-            lines.append("")
-            
-            # Generate the Writers process list: Writer(0)[]Writer(1)...[]Writer(var_value-1)
-            writers = "[]".join([f"Writer({i})" for i in range(var_value)])
-            lines.append(f"Writers() = ({writers}); Writers();")
-            lines.append("Register() = Readers() ||| Writers();")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs() = read_inv -> tau{M=R;} -> read_res.M -> ReadersAbs();")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
-            # Generate the WritersAbs process list similarly: WriterAbs(0)[]WriterAbs(1)...[]WriterAbs(var_value-1)
-            writers_abs = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
-            lines.append(f"WritersAbs() = ({writers_abs}); WritersAbs();")
-            lines.append("RegisterAbs() = ReadersAbs() ||| WritersAbs();")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-
-        else: # faulty & explicit
-            lines = []
-            # Shared binary array and register parameters
-            lines.append("//shared binary array of size N")
-            # Create an array with (var_value-1) zeros followed by a single 1
-            b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
-            lines.append(f"var B = {b_array};")
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_value - 1};")
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M = 0;")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers() = read_inv -> UpScan(0);")
-            lines.append("UpScan(i) = if(B[i] == 1) { read_res.i -> Readers() } else { UpScan(i + 1) };")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> write.i.1{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0) { write.i.0{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
-            lines.append("")
-            
-            # Writers process: list Writer(0)[]Writer(1)[]...[]Writer(var_value-1)
-            writer_list = "[]".join(f"Writer({i})" for i in range(var_value))
-            lines.append(f"Writers() = ({writer_list}); Writers();")
-            
-            # Register (concrete) with hiding of write tokens for each Writer
-            # For each page i, we hide actions write.i.0 and write.i.1.
-            concrete_tokens = []
-            for i in range(var_value):
-                concrete_tokens.append(f"write.{i}.0")
-                concrete_tokens.append(f"write.{i}.1")
-            hiding_concrete = ", ".join(concrete_tokens)
-            lines.append(f"Register() = (Readers() ||| Writers()) \\{{{hiding_concrete}}};")
-            lines.append("")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs() = read_inv -> read{M=R;} -> read_res.M -> ReadersAbs();")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> write.i{R=i;} -> write_res -> Skip;")
-            # WritersAbs: list WriterAbs(0)[]WriterAbs(1)[]...[]WriterAbs(var_value-1)
-            writer_abs_list = "[]".join(f"WriterAbs({i})" for i in range(var_value))
-            lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
-            lines.append("")
-            
-            # RegisterAbs with hiding of abstract write tokens and the read action.
-            # For each page i, hide action write.i; then also hide "read"
-            abstract_tokens = [f"write.{i}" for i in range(var_value)]
-            abstract_tokens.append("read")
-            hiding_abstract = ", ".join(abstract_tokens)
-            lines.append(f"RegisterAbs() = (ReadersAbs() ||| WritersAbs()) \\{{{hiding_abstract}}};")
-            lines.append("")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-            
-    elif algo_id == "multi_register_mr":
-        try:
-            var_register, var_reader, implementation_type = re.split(r'[,\s]+', var_value.strip())
-            var_register = int(var_register)
-            var_reader = int(var_reader)
-            implementation_type = implementation_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (var_register < 3) or (var_reader < 1) or (implementation_type not in ['faulty', 'correct']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        if implementation_type == 'correct':
-            lines = []
-            # The number of readers (N) is given by var_reader.
-            lines.append(f"#define N {var_reader};")
-            lines.append("")
-            
-            # Shared binary array B of size var_register:
-            # It is an array of length var_register with all entries 0 except the last one is 1.
-            b_elements = ["0"] * (var_register - 1) + ["1"]
-            b_array = "[" + ",".join(b_elements) + "]"
-            lines.append("//shared binary array of size N")
-            lines.append(f"var B = {b_array};")
-            
-            # Register value for the abstract model is R = var_register - 1
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_register - 1};")
-            
-            # Temporary array M of size N (number of readers)
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M[N];")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers(id) = read_inv.id -> UpScan(0, id);")
-            lines.append("UpScan(i, id) =  if(B[i] == 1) { DownScan(i - 1, i, id) } else { UpScan(i + 1, id) };")
-            lines.append("DownScan(i, v, id) =")
-            lines.append("\tif(i >= 0) {")
-            lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i, id) } else { DownScan(i - 1, v, id) }")
-            lines.append("\t} else {")
-            lines.append("\t\tread_res.id.v -> Readers(id)")
-            lines.append("\t};")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0 ) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip } ;")
-            lines.append("")
-            
-            # Generate Writers: Writer(0)[]Writer(1)...[]Writer(var_register-1)
-            writers = "[]".join(f"Writer({i})" for i in range(var_register))
-            lines.append(f"Writers() = ({writers}); Writers();")
-            lines.append("Register() = (|||x:{0..N-1}@Readers(x)) ||| Writers();")
-            lines.append("")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs(id) = read_inv.id -> tau{M[id]=R;} -> read_res.id.M[id] -> ReadersAbs(id);")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
-            # Generate WritersAbs similarly:
-            writer_abs = "[]".join(f"WriterAbs({i})" for i in range(var_register))
-            lines.append(f"WritersAbs() = ({writer_abs}); WritersAbs();")
-            lines.append("RegisterAbs() = (|||x:{0..N-1}@ReadersAbs(x))||| WritersAbs();")
-            lines.append("")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-
-        else:
-            lines = []
-            # The number of readers is given by var_reader; N is defined using var_reader.
-            lines.append(f"#define N {var_reader};")
-            lines.append("")
-            
-            # Shared binary array: an array of length var_register with (var_register-1) zeros followed by a 1.
-            lines.append("//shared binary array of size N")
-            b_array = "[" + ",".join(["0"] * (var_register - 1) + ["1"]) + "]"
-            lines.append(f"var B = {b_array};")
-            
-            # Register value for the abstract model (R) equals var_register - 1.
-            lines.append("//register value used by the abstract model")
-            lines.append(f"var R = {var_register - 1};")
-            
-            # Temporary storage for each reader (an array of size N)
-            lines.append("//temporary value for abstract reader to stored the value read from register")
-            lines.append("var M[N];")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("Readers(id) = read_inv.id -> UpScan(0, id);")
-            lines.append("UpScan(i, id) =  if(B[i] == 1) { read_res.id.i -> Readers(id) } else { UpScan(i + 1, id) };")
-            lines.append("")
-            lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
-            lines.append("WriterDownScan(i) = if(i >= 0 ) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip } ;")
-            lines.append("")
-            
-            # Compose the Writers: a choice of Writer processes for each page from 0 to var_register-1.
-            writer_items = [f"Writer({i})" for i in range(var_register)]
-            writers_str = "[]".join(writer_items)
-            lines.append(f"Writers() = ({writers_str}); Writers();")
-            lines.append("Register() = (|||x:{0..N-1}@Readers(x)) ||| Writers();")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("ReadersAbs(id) = read_inv.id -> tau{M[id]=R;} -> read_res.id.M[id] -> ReadersAbs(id);")
-            lines.append("")
-            lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
-            writer_abs_items = [f"WriterAbs({i})" for i in range(var_register)]
-            writers_abs_str = "[]".join(writer_abs_items)
-            lines.append(f"WritersAbs() = ({writers_abs_str}); WritersAbs();")
-            lines.append("RegisterAbs() = (|||x:{0..N-1}@ReadersAbs(x))||| WritersAbs();")
-            lines.append("")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Register() refines RegisterAbs();")
-            lines.append("#assert RegisterAbs() refines Register();")
-
-            processed_code = "\n".join(lines)
-
-    elif algo_id == "concurrent_stack":
-        try:
-            num_process, stack_length, event_type = re.split(r'[,\s]+', var_value.strip())
-            num_process = int(num_process)
-            stack_length = int(stack_length)
-            event_type = event_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_process < 2) or (stack_length < 1) or (event_type not in ['tau', 'explicit']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        if event_type == 'tau':
-            lines = []
-            # Header comments and macro definitions.
-            lines.append("////number of processes")
-            lines.append(f"#define N {num_process};")
-            lines.append("//stack size")
-            lines.append(f"#define SIZE {stack_length};")
-            lines.append("")
-            
-            # Shared variables for the concrete implementation.
-            lines.append("//shared head pointer for the concrete implementation")
-            lines.append("var H = 0;")
-            lines.append("//local variable to store the temporary head value")
-            lines.append("var HL[N];")
-            lines.append("")
-            
-            # Shared variables for the abstract implementation.
-            lines.append("//shared head pointer for the abstract implementation")
-            lines.append("var HA = 0;")
-            lines.append("//local variable to store the temporary head value")
-            lines.append("var HLA[N];")
-            lines.append("")
-            
-            # Concrete Implementation Model.
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            
-            # PushLoop procedure – using indentation as in the samples.
-            lines.append("PushLoop(i) = tau{HL[i]=H;} -> (")
-            lines.append("\tifa (HL[i] == H) {")
-            lines.append("\t\ttau{if(H < SIZE) {H = H+1;} HL[i]=H;} -> tau -> push_res.i.HL[i] -> Skip")
-            lines.append("\t} else {")
-            lines.append("\t\tPushLoop(i)")
-            lines.append("\t});")
-            lines.append("")
-            
-            # PopLoop procedure.
-            lines.append("PopLoop(i) = tau{HL[i]=H;} -> ")
-            lines.append("\t(if(HL[i] == 0) {")
-            lines.append("\t\tpop_res.i.0 -> Skip ")
-            lines.append("\t} else {")
-            lines.append("\t\t(ifa(HL[i] != H) { PopLoop(i) } else { tau{H = H-1; HL[i]=H;} -> tau -> pop_res.i.(HL[i]+1) -> Skip")
-            lines.append("\t\t})")
-            lines.append("\t});")
-            lines.append("")
-            
-            # Process and Stack definitions.
-            lines.append("Process(i) = (push_inv.i -> PushLoop(i)[] pop_inv.i -> PopLoop(i));Process(i);")
-            lines.append("Stack() = |||x:{0..N-1}@Process(x);")
-            
-            # Abstract Specification Model.
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("PushAbs(i) = push_inv.i -> tau{if(HA < SIZE) {HA = HA+1;}; HLA[i]=HA;} -> push_res.i.HLA[i] -> Skip;")
-            lines.append("")
-            lines.append("PopAbs(i) = pop_inv.i ->")
-            lines.append("\t(ifa(HA == 0) {")
-            lines.append("\t\ttau-> pop_res.i.0 -> Skip ")
-            lines.append("\t} else {")
-            lines.append("\t\t tau{HA = HA -1; HLA[i]=HA;} -> pop_res.i.(HLA[i]+1) -> Skip")
-            lines.append("\t});")
-            lines.append("")
-            lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
-            lines.append("")
-            lines.append("StackAbs() = |||x:{0..N-1}@ProcessAbs(x);")
-            
-            # Properties.
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Stack() refines StackAbs();")
-            lines.append("#assert StackAbs() refines Stack();")
-
-            processed_code = "\n".join(lines)
-        else: # explicit
-            lines = []
-            # Header macros
-            lines.append("////number of processes")
-            lines.append(f"#define N {num_process};")
-            lines.append("//stack size")
-            lines.append(f"#define SIZE {stack_length};")
-            lines.append("")
-            
-            # Shared variables for the concrete implementation.
-            lines.append("//shared head pointer for the concrete implementation")
-            lines.append("var H = 0;")
-            lines.append("//local variable to store the temporary head value")
-            lines.append("var HL[N];")
-            lines.append("")
-            
-            # Shared variables for the abstract implementation.
-            lines.append("//shared head pointer for the abstract implementation")
-            lines.append("var HA = 0;")
-            lines.append("//local variable to store the temporary head value")
-            lines.append("var HLA[N];")
-            lines.append("")
-            
-            # Concrete Implementation Model
-            lines.append("////////////////The Concrete Implementation Model//////////////////")
-            lines.append("PushLoop(i) = headread.i{HL[i]=H;} -> (")
-            lines.append("\tifa (HL[i] == H) {")
-            lines.append("\t\tpush.i{if(H < SIZE) {H = H+1;} HL[i]=H;} -> tau -> push_res.i.HL[i] -> Skip")
-            lines.append("\t} else {")
-            lines.append("\t\tPushLoop(i)")
-            lines.append("\t});")
-            lines.append("")
-            lines.append("PopLoop(i) = headread.i{HL[i]=H;} -> ")
-            lines.append("\t(if(HL[i] == 0) {")
-            lines.append("\t\tpop_res.i.0 -> Skip ")
-            lines.append("\t} else {")
-            lines.append("\t\t(ifa(HL[i] != H) { PopLoop(i) } else { pop.i{H = H-1; HL[i]=H;} -> tau -> pop_res.i.(HL[i]+1) -> Skip")
-            lines.append("\t\t})")
-            lines.append("\t});")
-            lines.append("")
-            lines.append("Process(i) = (push_inv.i -> PushLoop(i)[] pop_inv.i -> PopLoop(i));Process(i);")
-            
-            # For the concrete model, build the hiding set tokens.
-            concrete_tokens = []
-            for i in range(num_process):
-                concrete_tokens.append(f"headread.{i}")
-                concrete_tokens.append(f"push.{i}")
-                concrete_tokens.append(f"pop.{i}")
-            concrete_hiding = ", ".join(concrete_tokens)
-            lines.append(f"Stack() = (|||x:{{0..N-1}}@Process(x)) \\ {{{concrete_hiding}}};")
-            lines.append("")
-            
-            # Abstract Specification Model
-            lines.append("////////////////The Abstract Specification Model//////////////////")
-            lines.append("PushAbs(i) = push_inv.i -> push.i{if(HA < SIZE) {HA = HA+1;}; HLA[i]=HA;} -> push_res.i.HLA[i] -> Skip;")
-            lines.append("")
-            lines.append("PopAbs(i) = pop_inv.i ->")
-            lines.append("\t(ifa(HA == 0) {")
-            lines.append("\t\ttau-> pop_res.i.0 -> Skip ")
-            lines.append("\t} else {")
-            lines.append("\t\t pop_empty.i{HA = HA -1; HLA[i]=HA;} -> pop_res.i.(HLA[i]+1) -> Skip")
-            lines.append("\t});")
-            lines.append("")
-            lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
-            
-            # For the abstract model, build the hiding set tokens.
-            abstract_tokens = []
-            for i in range(num_process):
-                abstract_tokens.append(f"push.{i}")
-                abstract_tokens.append(f"pop.{i}")
-                abstract_tokens.append(f"pop_empty.{i}")
-            abstract_hiding = ", ".join(abstract_tokens)
-            lines.append(f"StackAbs() = (|||x:{{0..N-1}}@ProcessAbs(x)) \\ {{{abstract_hiding}}};")
-            lines.append("")
-            
-            # Properties
-            lines.append("////////////////The Properties//////////////////")
-            lines.append("#assert Stack() refines StackAbs();")
-            lines.append("#assert StackAbs() refines Stack();")
-            
-            processed_code = "\n".join(lines)
-
-    elif algo_id == "concurrent_stack_linear":
-        try:
-            num_process, stack_length = re.split(r'[,\s]+', var_value.strip())
-            num_process = int(num_process)
-            stack_length = int(stack_length)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the two variables, and separated the values by comma or space!")
-        if (num_process < 2) or (stack_length < 1):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
+    return processed_code
+
+
+@generator("multi_register_1r_1w", Param("num_register_values", minimum=3), Param("implementation_type", choices=('faulty', 'correct')), Param("event_type", choices=('tau', 'explicit')))
+def _generate_multi_register_1r_1w(var_value, implementation_type, event_type):
+    if implementation_type == 'correct' and event_type == 'tau':
         lines = []
-        # Header macros.
+        # Define the shared binary array of size N.
+        # Create an array with all 0's except the last entry is 1.
+        b_elements = [ "0" for _ in range(var_value - 1) ] + ["1"]
+        b_array = "[" + ",".join(b_elements) + "]"
+        lines.append("//shared binary array of size N")
+        lines.append(f"var B = {b_array};")
+        lines.append("")
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_value - 1};")
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M = 0;")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers() = read_inv -> UpScan(0);")
+        lines.append("UpScan(i) = if(B[i] == 1) { DownScan(i - 1, i) } else { UpScan(i + 1) };")
+        lines.append("DownScan(i, v) =")
+        lines.append("\tif(i >= 0) {")
+        lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i) } else { DownScan(i - 1, v) }")
+        lines.append("\t} else {")
+        lines.append("\t\tread_res.v -> Readers()")
+        lines.append("\t};")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
+        lines.append("")
+        # Generate the list of Writers depending on var_value.
+        writer_list = "[]".join([f"Writer({i})" for i in range(var_value)])
+        lines.append(f"Writers() = ({writer_list}); Writers();")
+        lines.append("Register() = Readers() ||| Writers();")
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs() = read_inv -> tau{M=R;} -> read_res.M -> ReadersAbs();")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
+        lines.append("")
+        # Generate the list of WriterAbs processes.
+        writer_abs_list = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
+        lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
+        lines.append("RegisterAbs() = ReadersAbs() ||| WritersAbs();")
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    elif implementation_type == 'correct' and event_type == 'explicit':
+        lines = []
+        # Shared array and register values
+        lines.append("//shared binary array of size N")
+        # Create an array with var_value-1 zeros and a final 1.
+        b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
+        lines.append(f"var B = {b_array};")
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_value - 1};")
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M = 0;")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers() = read_inv -> UpScan(0);")
+        lines.append("UpScan(i) = if(B[i] == 1) { DownScan(i - 1, i) } else { UpScan(i + 1) };")
+        lines.append("DownScan(i, v) =")
+        lines.append("\tif(i >= 0) {")
+        lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i) } else { DownScan(i - 1, v) }")
+        lines.append("\t} else {")
+        lines.append("\t\tread_res.v -> Readers()")
+        lines.append("\t};")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> write.i.1{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0) { write.i.0{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
+        lines.append("")
+
+        # Writers process: list of Writer(i) separated by "[]"
+        writer_list = "[]".join([f"Writer({i})" for i in range(var_value)])
+        lines.append(f"Writers() = ({writer_list}); Writers();")
+
+        # Register: concrete implementation hiding a set of write actions.
+        # For each i in 0..var_value-1, include tokens: write.i.0 and write.i.1.
+        concrete_tokens = []
+        for i in range(var_value):
+            concrete_tokens.append(f"write.{i}.0")
+            concrete_tokens.append(f"write.{i}.1")
+        tokens_concrete = ", ".join(concrete_tokens)
+        lines.append(f"Register() = (Readers() ||| Writers()) \\{{{tokens_concrete}}};")
+        lines.append("")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs() = read_inv -> read{M=R;} -> read_res.M -> ReadersAbs();")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> write.i{R=i;} -> write_res -> Skip;")
+        # List WriterAbs(i) for all pages.
+        writer_abs_list = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
+        lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
+        lines.append("")
+
+        # RegisterAbs: abstract register hiding a different set.
+        # Tokens: for each i in 0..var_value-1, include "write.i" and then add "read".
+        abstract_tokens = [f"write.{i}" for i in range(var_value)]
+        abstract_tokens.append("read")
+        tokens_abstract = ", ".join(abstract_tokens)
+        lines.append(f"RegisterAbs() = (ReadersAbs() ||| WritersAbs()) \\{{{tokens_abstract}}};")
+        lines.append("")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    elif implementation_type == 'faulty' and event_type == 'tau':
+        lines = []
+        # Shared binary array and register parameters
+        lines.append("//shared binary array of size N")
+        # B array: (var_value-1) zeros and a final 1
+        b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
+        lines.append(f"var B = {b_array};")
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_value - 1};")
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M = 0;")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers() = read_inv -> UpScan(0);")
+        lines.append("UpScan(i) = if(B[i] == 1) { read_res.i -> Readers() } else { UpScan(i + 1) };")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
+        lines.append("")
+
+        # Generate the Writers process list: Writer(0)[]Writer(1)...[]Writer(var_value-1)
+        writers = "[]".join([f"Writer({i})" for i in range(var_value)])
+        lines.append(f"Writers() = ({writers}); Writers();")
+        lines.append("Register() = Readers() ||| Writers();")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs() = read_inv -> tau{M=R;} -> read_res.M -> ReadersAbs();")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
+        # Generate the WritersAbs process list similarly: WriterAbs(0)[]WriterAbs(1)...[]WriterAbs(var_value-1)
+        writers_abs = "[]".join([f"WriterAbs({i})" for i in range(var_value)])
+        lines.append(f"WritersAbs() = ({writers_abs}); WritersAbs();")
+        lines.append("RegisterAbs() = ReadersAbs() ||| WritersAbs();")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    else: # faulty & explicit
+        lines = []
+        # Shared binary array and register parameters
+        lines.append("//shared binary array of size N")
+        # Create an array with (var_value-1) zeros followed by a single 1
+        b_array = "[" + ",".join(["0"] * (var_value - 1) + ["1"]) + "]"
+        lines.append(f"var B = {b_array};")
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_value - 1};")
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M = 0;")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers() = read_inv -> UpScan(0);")
+        lines.append("UpScan(i) = if(B[i] == 1) { read_res.i -> Readers() } else { UpScan(i + 1) };")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> write.i.1{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0) { write.i.0{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip };")
+        lines.append("")
+
+        # Writers process: list Writer(0)[]Writer(1)[]...[]Writer(var_value-1)
+        writer_list = "[]".join(f"Writer({i})" for i in range(var_value))
+        lines.append(f"Writers() = ({writer_list}); Writers();")
+
+        # Register (concrete) with hiding of write tokens for each Writer
+        # For each page i, we hide actions write.i.0 and write.i.1.
+        concrete_tokens = []
+        for i in range(var_value):
+            concrete_tokens.append(f"write.{i}.0")
+            concrete_tokens.append(f"write.{i}.1")
+        hiding_concrete = ", ".join(concrete_tokens)
+        lines.append(f"Register() = (Readers() ||| Writers()) \\{{{hiding_concrete}}};")
+        lines.append("")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs() = read_inv -> read{M=R;} -> read_res.M -> ReadersAbs();")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> write.i{R=i;} -> write_res -> Skip;")
+        # WritersAbs: list WriterAbs(0)[]WriterAbs(1)[]...[]WriterAbs(var_value-1)
+        writer_abs_list = "[]".join(f"WriterAbs({i})" for i in range(var_value))
+        lines.append(f"WritersAbs() = ({writer_abs_list}); WritersAbs();")
+        lines.append("")
+
+        # RegisterAbs with hiding of abstract write tokens and the read action.
+        # For each page i, hide action write.i; then also hide "read"
+        abstract_tokens = [f"write.{i}" for i in range(var_value)]
+        abstract_tokens.append("read")
+        hiding_abstract = ", ".join(abstract_tokens)
+        lines.append(f"RegisterAbs() = (ReadersAbs() ||| WritersAbs()) \\{{{hiding_abstract}}};")
+        lines.append("")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("multi_register_mr", Param("num_register_values", minimum=3), Param("num_readers", minimum=1), Param("implementation_type", choices=('faulty', 'correct')))
+def _generate_multi_register_mr(var_register, var_reader, implementation_type):
+    if implementation_type == 'correct':
+        lines = []
+        # The number of readers (N) is given by var_reader.
+        lines.append(f"#define N {var_reader};")
+        lines.append("")
+
+        # Shared binary array B of size var_register:
+        # It is an array of length var_register with all entries 0 except the last one is 1.
+        b_elements = ["0"] * (var_register - 1) + ["1"]
+        b_array = "[" + ",".join(b_elements) + "]"
+        lines.append("//shared binary array of size N")
+        lines.append(f"var B = {b_array};")
+
+        # Register value for the abstract model is R = var_register - 1
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_register - 1};")
+
+        # Temporary array M of size N (number of readers)
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M[N];")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers(id) = read_inv.id -> UpScan(0, id);")
+        lines.append("UpScan(i, id) =  if(B[i] == 1) { DownScan(i - 1, i, id) } else { UpScan(i + 1, id) };")
+        lines.append("DownScan(i, v, id) =")
+        lines.append("\tif(i >= 0) {")
+        lines.append("\t\tif(B[i] == 1) { DownScan(i - 1, i, id) } else { DownScan(i - 1, v, id) }")
+        lines.append("\t} else {")
+        lines.append("\t\tread_res.id.v -> Readers(id)")
+        lines.append("\t};")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0 ) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip } ;")
+        lines.append("")
+
+        # Generate Writers: Writer(0)[]Writer(1)...[]Writer(var_register-1)
+        writers = "[]".join(f"Writer({i})" for i in range(var_register))
+        lines.append(f"Writers() = ({writers}); Writers();")
+        lines.append("Register() = (|||x:{0..N-1}@Readers(x)) ||| Writers();")
+        lines.append("")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs(id) = read_inv.id -> tau{M[id]=R;} -> read_res.id.M[id] -> ReadersAbs(id);")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
+        # Generate WritersAbs similarly:
+        writer_abs = "[]".join(f"WriterAbs({i})" for i in range(var_register))
+        lines.append(f"WritersAbs() = ({writer_abs}); WritersAbs();")
+        lines.append("RegisterAbs() = (|||x:{0..N-1}@ReadersAbs(x))||| WritersAbs();")
+        lines.append("")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    else:
+        lines = []
+        # The number of readers is given by var_reader; N is defined using var_reader.
+        lines.append(f"#define N {var_reader};")
+        lines.append("")
+
+        # Shared binary array: an array of length var_register with (var_register-1) zeros followed by a 1.
+        lines.append("//shared binary array of size N")
+        b_array = "[" + ",".join(["0"] * (var_register - 1) + ["1"]) + "]"
+        lines.append(f"var B = {b_array};")
+
+        # Register value for the abstract model (R) equals var_register - 1.
+        lines.append("//register value used by the abstract model")
+        lines.append(f"var R = {var_register - 1};")
+
+        # Temporary storage for each reader (an array of size N)
+        lines.append("//temporary value for abstract reader to stored the value read from register")
+        lines.append("var M[N];")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("Readers(id) = read_inv.id -> UpScan(0, id);")
+        lines.append("UpScan(i, id) =  if(B[i] == 1) { read_res.id.i -> Readers(id) } else { UpScan(i + 1, id) };")
+        lines.append("")
+        lines.append("Writer(i) = write_inv.i -> tau{B[i] = 1;} -> WriterDownScan(i-1);")
+        lines.append("WriterDownScan(i) = if(i >= 0 ) { tau{B[i] = 0;} -> WriterDownScan(i-1) } else { write_res -> Skip } ;")
+        lines.append("")
+
+        # Compose the Writers: a choice of Writer processes for each page from 0 to var_register-1.
+        writer_items = [f"Writer({i})" for i in range(var_register)]
+        writers_str = "[]".join(writer_items)
+        lines.append(f"Writers() = ({writers_str}); Writers();")
+        lines.append("Register() = (|||x:{0..N-1}@Readers(x)) ||| Writers();")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("ReadersAbs(id) = read_inv.id -> tau{M[id]=R;} -> read_res.id.M[id] -> ReadersAbs(id);")
+        lines.append("")
+        lines.append("WriterAbs(i) = write_inv.i -> tau{R=i;} -> write_res -> Skip;")
+        writer_abs_items = [f"WriterAbs({i})" for i in range(var_register)]
+        writers_abs_str = "[]".join(writer_abs_items)
+        lines.append(f"WritersAbs() = ({writers_abs_str}); WritersAbs();")
+        lines.append("RegisterAbs() = (|||x:{0..N-1}@ReadersAbs(x))||| WritersAbs();")
+        lines.append("")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Register() refines RegisterAbs();")
+        lines.append("#assert RegisterAbs() refines Register();")
+
+        processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("concurrent_stack", Param("num_processes", minimum=2), Param("stack_length", minimum=1), Param("event_type", choices=('tau', 'explicit')))
+def _generate_concurrent_stack(num_process, stack_length, event_type):
+    if event_type == 'tau':
+        lines = []
+        # Header comments and macro definitions.
         lines.append("////number of processes")
         lines.append(f"#define N {num_process};")
         lines.append("//stack size")
         lines.append(f"#define SIZE {stack_length};")
         lines.append("")
-        
-        # Shared variables.
+
+        # Shared variables for the concrete implementation.
         lines.append("//shared head pointer for the concrete implementation")
         lines.append("var H = 0;")
         lines.append("//local variable to store the temporary head value")
         lines.append("var HL[N];")
+        lines.append("")
+
+        # Shared variables for the abstract implementation.
         lines.append("//shared head pointer for the abstract implementation")
         lines.append("var HA = 0;")
+        lines.append("//local variable to store the temporary head value")
+        lines.append("var HLA[N];")
         lines.append("")
-        
+
         # Concrete Implementation Model.
         lines.append("////////////////The Concrete Implementation Model//////////////////")
-        lines.append("Push(i) = ")
-        lines.append("\t    tau{HL[i]=H;} -> ")
-        lines.append("\t    ifa (HL[i] == H) {")
-        lines.append("\t\t    push.i.(H+1){if(H < SIZE) {H = H+1;}} -> Skip")
-        lines.append("\t    } else {")
-        lines.append("\t\t    tau -> Push(i)")
-        lines.append("\t 	};")
-        lines.append("")
-        lines.append("Pop(i) =")
-        lines.append("\t\t    tau{HL[i]=H;} -> ")
-        lines.append("\t\t    ifa(H == 0) {")
-        lines.append("\t\t\t    pop.i.0 -> Skip ")
-        lines.append("\t\t    } else {")
-        lines.append("\t\t\t    tau-> ifa(HL[i] != H) {tau -> Pop(i) } else {pop.i.H{if(H > 0) {H = H -1;}} -> Skip")
-        lines.append("\t\t\t    }")
-        lines.append("\t\t    };")
+
+        # PushLoop procedure – using indentation as in the samples.
+        lines.append("PushLoop(i) = tau{HL[i]=H;} -> (")
+        lines.append("\tifa (HL[i] == H) {")
+        lines.append("\t\ttau{if(H < SIZE) {H = H+1;} HL[i]=H;} -> tau -> push_res.i.HL[i] -> Skip")
+        lines.append("\t} else {")
+        lines.append("\t\tPushLoop(i)")
+        lines.append("\t});")
         lines.append("")
-        lines.append("Process(i) = (Push(i)[]Pop(i));Process(i);")
-        lines.append("Stack() = (|||x:{0..N-1}@Process(x));")
+
+        # PopLoop procedure.
+        lines.append("PopLoop(i) = tau{HL[i]=H;} -> ")
+        lines.append("\t(if(HL[i] == 0) {")
+        lines.append("\t\tpop_res.i.0 -> Skip ")
+        lines.append("\t} else {")
+        lines.append("\t\t(ifa(HL[i] != H) { PopLoop(i) } else { tau{H = H-1; HL[i]=H;} -> tau -> pop_res.i.(HL[i]+1) -> Skip")
+        lines.append("\t\t})")
+        lines.append("\t});")
         lines.append("")
-        
+
+        # Process and Stack definitions.
+        lines.append("Process(i) = (push_inv.i -> PushLoop(i)[] pop_inv.i -> PopLoop(i));Process(i);")
+        lines.append("Stack() = |||x:{0..N-1}@Process(x);")
+
         # Abstract Specification Model.
         lines.append("////////////////The Abstract Specification Model//////////////////")
-        lines.append("PushAbs(i) = push.i.(HA + 1) {if(HA < SIZE) {HA = HA+1;}} -> Skip;")
-        lines.append("PopAbs(i) = pop.i.HA{if(HA > 0) {HA = HA -1;}} -> Skip;")
+        lines.append("PushAbs(i) = push_inv.i -> tau{if(HA < SIZE) {HA = HA+1;}; HLA[i]=HA;} -> push_res.i.HLA[i] -> Skip;")
         lines.append("")
-        lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
+        lines.append("PopAbs(i) = pop_inv.i ->")
+        lines.append("\t(ifa(HA == 0) {")
+        lines.append("\t\ttau-> pop_res.i.0 -> Skip ")
+        lines.append("\t} else {")
+        lines.append("\t\t tau{HA = HA -1; HLA[i]=HA;} -> pop_res.i.(HLA[i]+1) -> Skip")
+        lines.append("\t});")
         lines.append("")
-        lines.append("StackAbs() = (|||x:{0..N-1}@ProcessAbs(x));")
+        lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
         lines.append("")
-        
+        lines.append("StackAbs() = |||x:{0..N-1}@ProcessAbs(x);")
+
         # Properties.
         lines.append("////////////////The Properties//////////////////")
         lines.append("#assert Stack() refines StackAbs();")
         lines.append("#assert StackAbs() refines Stack();")
 
         processed_code = "\n".join(lines)
+    else: # explicit
+        lines = []
+        # Header macros
+        lines.append("////number of processes")
+        lines.append(f"#define N {num_process};")
+        lines.append("//stack size")
+        lines.append(f"#define SIZE {stack_length};")
+        lines.append("")
 
-    elif algo_id == "mailbox":
-        try:
-            var_value, implementation_type, optimization_type = re.split(r'[,\s]+', var_value.strip())
-            var_value = int(var_value)
-            implementation_type = implementation_type.lower()
-            optimization_type = optimization_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (var_value < 2) or (implementation_type not in ['waitfree', 'non_blocking']) or (optimization_type not in ['no_optimization', 'with_optimization']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        if implementation_type == 'non_blocking' and optimization_type == 'no_optimization':
-            ROUND = 2 * var_value
-            MaxROUND = var_value
-            # Use a raw f-string (triple-quoted) with proper doubling of curly braces where needed.
-            processed_code = f'''#import "PAT.Lib.Example";
+        # Shared variables for the concrete implementation.
+        lines.append("//shared head pointer for the concrete implementation")
+        lines.append("var H = 0;")
+        lines.append("//local variable to store the temporary head value")
+        lines.append("var HL[N];")
+        lines.append("")
+
+        # Shared variables for the abstract implementation.
+        lines.append("//shared head pointer for the abstract implementation")
+        lines.append("var HA = 0;")
+        lines.append("//local variable to store the temporary head value")
+        lines.append("var HLA[N];")
+        lines.append("")
+
+        # Concrete Implementation Model
+        lines.append("////////////////The Concrete Implementation Model//////////////////")
+        lines.append("PushLoop(i) = headread.i{HL[i]=H;} -> (")
+        lines.append("\tifa (HL[i] == H) {")
+        lines.append("\t\tpush.i{if(H < SIZE) {H = H+1;} HL[i]=H;} -> tau -> push_res.i.HL[i] -> Skip")
+        lines.append("\t} else {")
+        lines.append("\t\tPushLoop(i)")
+        lines.append("\t});")
+        lines.append("")
+        lines.append("PopLoop(i) = headread.i{HL[i]=H;} -> ")
+        lines.append("\t(if(HL[i] == 0) {")
+        lines.append("\t\tpop_res.i.0 -> Skip ")
+        lines.append("\t} else {")
+        lines.append("\t\t(ifa(HL[i] != H) { PopLoop(i) } else { pop.i{H = H-1; HL[i]=H;} -> tau -> pop_res.i.(HL[i]+1) -> Skip")
+        lines.append("\t\t})")
+        lines.append("\t});")
+        lines.append("")
+        lines.append("Process(i) = (push_inv.i -> PushLoop(i)[] pop_inv.i -> PopLoop(i));Process(i);")
+
+        # For the concrete model, build the hiding set tokens.
+        concrete_tokens = []
+        for i in range(num_process):
+            concrete_tokens.append(f"headread.{i}")
+            concrete_tokens.append(f"push.{i}")
+            concrete_tokens.append(f"pop.{i}")
+        concrete_hiding = ", ".join(concrete_tokens)
+        lines.append(f"Stack() = (|||x:{{0..N-1}}@Process(x)) \\ {{{concrete_hiding}}};")
+        lines.append("")
+
+        # Abstract Specification Model
+        lines.append("////////////////The Abstract Specification Model//////////////////")
+        lines.append("PushAbs(i) = push_inv.i -> push.i{if(HA < SIZE) {HA = HA+1;}; HLA[i]=HA;} -> push_res.i.HLA[i] -> Skip;")
+        lines.append("")
+        lines.append("PopAbs(i) = pop_inv.i ->")
+        lines.append("\t(ifa(HA == 0) {")
+        lines.append("\t\ttau-> pop_res.i.0 -> Skip ")
+        lines.append("\t} else {")
+        lines.append("\t\t pop_empty.i{HA = HA -1; HLA[i]=HA;} -> pop_res.i.(HLA[i]+1) -> Skip")
+        lines.append("\t});")
+        lines.append("")
+        lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
+
+        # For the abstract model, build the hiding set tokens.
+        abstract_tokens = []
+        for i in range(num_process):
+            abstract_tokens.append(f"push.{i}")
+            abstract_tokens.append(f"pop.{i}")
+            abstract_tokens.append(f"pop_empty.{i}")
+        abstract_hiding = ", ".join(abstract_tokens)
+        lines.append(f"StackAbs() = (|||x:{{0..N-1}}@ProcessAbs(x)) \\ {{{abstract_hiding}}};")
+        lines.append("")
+
+        # Properties
+        lines.append("////////////////The Properties//////////////////")
+        lines.append("#assert Stack() refines StackAbs();")
+        lines.append("#assert StackAbs() refines Stack();")
+
+        processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("concurrent_stack_linear", Param("num_processes", minimum=2), Param("stack_length", minimum=1))
+def _generate_concurrent_stack_linear(num_process, stack_length):
+
+    lines = []
+    # Header macros.
+    lines.append("////number of processes")
+    lines.append(f"#define N {num_process};")
+    lines.append("//stack size")
+    lines.append(f"#define SIZE {stack_length};")
+    lines.append("")
+
+    # Shared variables.
+    lines.append("//shared head pointer for the concrete implementation")
+    lines.append("var H = 0;")
+    lines.append("//local variable to store the temporary head value")
+    lines.append("var HL[N];")
+    lines.append("//shared head pointer for the abstract implementation")
+    lines.append("var HA = 0;")
+    lines.append("")
+
+    # Concrete Implementation Model.
+    lines.append("////////////////The Concrete Implementation Model//////////////////")
+    lines.append("Push(i) = ")
+    lines.append("\t    tau{HL[i]=H;} -> ")
+    lines.append("\t    ifa (HL[i] == H) {")
+    lines.append("\t\t    push.i.(H+1){if(H < SIZE) {H = H+1;}} -> Skip")
+    lines.append("\t    } else {")
+    lines.append("\t\t    tau -> Push(i)")
+    lines.append("\t 	};")
+    lines.append("")
+    lines.append("Pop(i) =")
+    lines.append("\t\t    tau{HL[i]=H;} -> ")
+    lines.append("\t\t    ifa(H == 0) {")
+    lines.append("\t\t\t    pop.i.0 -> Skip ")
+    lines.append("\t\t    } else {")
+    lines.append("\t\t\t    tau-> ifa(HL[i] != H) {tau -> Pop(i) } else {pop.i.H{if(H > 0) {H = H -1;}} -> Skip")
+    lines.append("\t\t\t    }")
+    lines.append("\t\t    };")
+    lines.append("")
+    lines.append("Process(i) = (Push(i)[]Pop(i));Process(i);")
+    lines.append("Stack() = (|||x:{0..N-1}@Process(x));")
+    lines.append("")
+
+    # Abstract Specification Model.
+    lines.append("////////////////The Abstract Specification Model//////////////////")
+    lines.append("PushAbs(i) = push.i.(HA + 1) {if(HA < SIZE) {HA = HA+1;}} -> Skip;")
+    lines.append("PopAbs(i) = pop.i.HA{if(HA > 0) {HA = HA -1;}} -> Skip;")
+    lines.append("")
+    lines.append("ProcessAbs(i) = (PushAbs(i)[]PopAbs(i));ProcessAbs(i);")
+    lines.append("")
+    lines.append("StackAbs() = (|||x:{0..N-1}@ProcessAbs(x));")
+    lines.append("")
+
+    # Properties.
+    lines.append("////////////////The Properties//////////////////")
+    lines.append("#assert Stack() refines StackAbs();")
+    lines.append("#assert StackAbs() refines Stack();")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("mailbox", Param("num_operations", minimum=2), Param("implementation_type", choices=('waitfree', 'non_blocking')), Param("optimization_type", choices=('no_optimization', 'with_optimization')))
+def _generate_mailbox(var_value, implementation_type, optimization_type):
+
+    if implementation_type == 'non_blocking' and optimization_type == 'no_optimization':
+        ROUND = 2 * var_value
+        MaxROUND = var_value
+        # Use a raw f-string (triple-quoted) with proper doubling of curly braces where needed.
+        processed_code = f'''#import "PAT.Lib.Example";
 
 #define EQ 0;
 #define NEQ 1;
@@ -1072,11 +1203,11 @@ MailboxAbs() = (PostmanAbs(0) ||| WifeAbs(0)) \{{deliver, check, remove}};
 #assert Mailbox() refines MailboxAbs();
 #assert MailboxAbs() refines Mailbox();
 '''
-            
-        elif implementation_type == 'non_blocking' and optimization_type == 'with_optimization':
-            ROUND = 2 * var_value
-            MaxROUND = var_value
-            code = r'''#import "PAT.Lib.Example";
+
+    elif implementation_type == 'non_blocking' and optimization_type == 'with_optimization':
+        ROUND = 2 * var_value
+        MaxROUND = var_value
+        code = r'''#import "PAT.Lib.Example";
 
 #define EQ 0;
 #define NEQ 1;
@@ -1207,12 +1338,12 @@ MailboxAbs() = (PostmanAbs(0) ||| WifeAbs(0)) \{{deliver, check, remove}};
 #assert MailboxAbs() refines Mailbox();
 '''
 
-            processed_code = code.format(ROUND=ROUND, MaxROUND=MaxROUND)
+        processed_code = code.format(ROUND=ROUND, MaxROUND=MaxROUND)
 
-        elif implementation_type == 'waitfree' and optimization_type == 'no_optimization':
-            ROUND = 2 * var_value
-            MaxROUND = var_value
-            processed_code = f'''#import "PAT.Lib.Example";
+    elif implementation_type == 'waitfree' and optimization_type == 'no_optimization':
+        ROUND = 2 * var_value
+        MaxROUND = var_value
+        processed_code = f'''#import "PAT.Lib.Example";
 
 #define EQ 0;
 #define NEQ 1;
@@ -1343,10 +1474,10 @@ MailboxAbs() = (PostmanAbs(0) ||| WifeAbs(0)) \{{deliver, check, remove}};
 #assert MailboxAbs() refines Mailbox();
 '''
 
-        else: # waitfree & with_optimization
-            ROUND = 2 * var_value
-            MaxROUND = var_value
-            processed_code = f'''#import "PAT.Lib.Example";
+    else: # waitfree & with_optimization
+        ROUND = 2 * var_value
+        MaxROUND = var_value
+        processed_code = f'''#import "PAT.Lib.Example";
 
 #define EQ 0;
 #define NEQ 1;
@@ -1479,20 +1610,14 @@ MailboxAbs() = (PostmanAbs(0) ||| WifeAbs(0)) \{{deliver, check, remove}};
 #assert MailboxAbs() refines Mailbox();
 '''
 
-    elif algo_id == "snzi":
-        try:
-            num_processes, num_treenodes, num_operations, model_type = re.split(r'[,\s]+', var_value.strip())
-            num_processes = int(num_processes)
-            num_treenodes = int(num_treenodes)
-            num_operations = int(num_operations)
-            model_type = model_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_processes < 2) or (num_treenodes < 1) or (num_operations < 1) or (model_type not in ['detailed', 'compact']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        if model_type == 'detailed':
-            processed_code = f'''//This model is for "SNZI: Scalable NonZero Indicators"
+    return processed_code
+
+
+@generator("snzi", Param("num_processes", minimum=2), Param("num_treenodes", minimum=1), Param("num_operations", minimum=1), Param("model_type", choices=('detailed', 'compact')))
+def _generate_snzi(num_processes, num_treenodes, num_operations, model_type):
+
+    if model_type == 'detailed':
+        processed_code = f'''//This model is for "SNZI: Scalable NonZero Indicators"
 
 //number of processes
 #define PRO_SIZE {num_processes};
@@ -1665,8 +1790,8 @@ SNZIAbs() = (||| x:{{0..PRO_SIZE-1}} @ ProcessAbs(x, 0)) \\ {{t}} ||| QueryAbs()
 #assert SNZI() refines SNZIAbs();
 #assert SNZIAbs() refines SNZI();
 '''
-        else: # model_type is "compact"
-            processed_code = f"""//This model is for SNZI:Scalable NonZero Indicators
+    else: # model_type is "compact"
+        processed_code = f"""//This model is for SNZI:Scalable NonZero Indicators
 
 //number of processes
 #define P {num_processes};
@@ -1853,34 +1978,30 @@ SNZIAbs() = (|||x:{{0..P-1}}@PA(x, 0)) ||| QA();
 #assert SNZIAbs() refines SNZI();
 """
 
-    elif algo_id == "kvalued":
-        try:
-            num_register_values, num_readers = re.split(r'[,\s]+', var_value.strip())
-            num_register_values = int(num_register_values)
-            num_readers = int(num_readers)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_register_values < 3) or (num_readers < 1):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        b_elems = [ "0" for _ in range(num_register_values - 1) ]
-        b_elems.append("1")
-        b_array = "[" + ",".join(b_elems) + "]"
-        
-        # Generate the Writers process: a sequence of Writer(i) separated by "[]"
-        # (e.g., for 3 register values: Writer(0)[]Writer(1)[]Writer(2))
-        writers_process = "[]".join(f"Writer({i})" for i in range(num_register_values))
-        
-        # The Register process composition uses num_readers (within |||{num_readers}@Readers())
-        register_process = f"((|||{{{num_readers}}}@Readers()) ||| Writers())"
-        
-        # Compute the final register value index (last index in B)
-        last_index = num_register_values - 1
-        
-        # Generate the chain of all read_res outputs from 0 to last_index.
-        read_res_chain = " ||".join(f"read_res.{i}" for i in range(num_register_values))
-        
-        processed_code = f"""//shared binary array of size N
+    return processed_code
+
+
+@generator("kvalued", Param("num_register_values", minimum=3), Param("num_readers", minimum=1))
+def _generate_kvalued(num_register_values, num_readers):
+
+    b_elems = [ "0" for _ in range(num_register_values - 1) ]
+    b_elems.append("1")
+    b_array = "[" + ",".join(b_elems) + "]"
+
+    # Generate the Writers process: a sequence of Writer(i) separated by "[]"
+    # (e.g., for 3 register values: Writer(0)[]Writer(1)[]Writer(2))
+    writers_process = "[]".join(f"Writer({i})" for i in range(num_register_values))
+
+    # The Register process composition uses num_readers (within |||{num_readers}@Readers())
+    register_process = f"((|||{{{num_readers}}}@Readers()) ||| Writers())"
+
+    # Compute the final register value index (last index in B)
+    last_index = num_register_values - 1
+
+    # Generate the chain of all read_res outputs from 0 to last_index.
+    read_res_chain = " ||".join(f"read_res.{i}" for i in range(num_register_values))
+
+    processed_code = f"""//shared binary array of size N
 var B = {b_array};
 
 ////////////////The Concrete Implementation Model//////////////////
@@ -1905,18 +2026,14 @@ Register() = {register_process};
 #assert Register() |= [](read_inv -> <>({read_res_chain}));
 """
 
-    elif algo_id == "java":
-        try:
-            num_waiting, system_type = re.split(r'[,\s]+', var_value.strip())
-            num_waiting = int(num_waiting)
-            system_type = system_type.lower()
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_waiting < 1) or (system_type not in ['finite_threads', 'infinite_threads']):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        if system_type == "infinite_threads":
-            processed_code = f'''#define N {num_waiting}; /* max num of threads that can wait at waiting state */
+    return processed_code
+
+
+@generator("java", Param("num_waiting", minimum=1), Param("system_type", choices=('finite_threads', 'infinite_threads')))
+def _generate_java(num_waiting, system_type):
+
+    if system_type == "infinite_threads":
+        processed_code = f'''#define N {num_waiting}; /* max num of threads that can wait at waiting state */
 
 /* msg */
 #define put_fast 100;
@@ -1965,8 +2082,8 @@ System() = ((|||{{..}}@my_thread())||| handoff() ||| shared_obj());
 #define someoneaccess access == true;
 #assert System() |= []<>someoneaccess;
 '''
-        else: # finite_threads
-            processed_code = f'''#define N {num_waiting}; /* max num of threads that can wait at waiting state */
+    else: # finite_threads
+        processed_code = f'''#define N {num_waiting}; /* max num of threads that can wait at waiting state */
 
 /* msg */
 #define put_fast 100;
@@ -2016,11 +2133,13 @@ System() = ((|||{{N}}@my_thread())||| handoff() ||| shared_obj());
 #assert System() |= []<>someoneaccess;
 '''
 
-    elif algo_id == "1dchannel":
-        if var_value < 2:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        
-        processed_code = f'''#define N {var_value};
+    return processed_code
+
+
+@generator("1dchannel", Param("num_pipes", minimum=2))
+def _generate_1dchannel(var_value):
+
+    processed_code = f'''#define N {var_value};
 
 //a synchronous channel array
 channel right[N+1] 0;  
@@ -2037,17 +2156,13 @@ System() = PIPE() ||| Send() ||| Receive();
 
 #assert System() deadlockfree;'''
 
-    elif algo_id == "2dchannel":
-        try:
-            num_rows, num_cols = re.split(r'[,\s]+', var_value.strip())
-            num_rows = int(num_rows)
-            num_cols = int(num_cols)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_rows < 2) or (num_cols < 2):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        processed_code = f'''#define M {num_rows}; // row number 
+    return processed_code
+
+
+@generator("2dchannel", Param("num_rows", minimum=2), Param("num_cols", minimum=2))
+def _generate_2dchannel(num_rows, num_cols):
+
+    processed_code = f'''#define M {num_rows}; // row number 
 #define N {num_cols}; // column number
 
 // The following are one-dimension synchrnous channle arrays used to simulate the 2-d synchronous channel array
@@ -2070,18 +2185,14 @@ System() = ||| i:{{0..(M-1)}}@(|||j:{{0..(N-1)}}@(Send(i,j)|||Receive(i,j)|||Cel
 #assert System() deadlockfree;
 '''
 
-    elif algo_id == "dbm":
-        try:
-            num_timers, clock_ceiling = re.split(r'[,\s]+', var_value.strip())
-            num_timers = int(num_timers)
-            clock_ceiling = int(clock_ceiling)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_timers < 1) or (clock_ceiling < 1):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        bound = num_timers * clock_ceiling
-        processed_code = f'''#import "PAT.Lib.DBM";
+    return processed_code
+
+
+@generator("dbm", Param("num_timers", minimum=1), Param("clock_ceiling", minimum=1))
+def _generate_dbm(num_timers, clock_ceiling):
+
+    bound = num_timers * clock_ceiling
+    processed_code = f'''#import "PAT.Lib.DBM";
 #import "PAT.Lib.Set";
 #import "PAT.Math";
 
@@ -2233,12 +2344,15 @@ aDBMTest = DBMTest1 ||| DBMTest2;
 #define goal5 (stopped==true || containsClock1 == false) && (stopped2 ==true || containsClock2 == false);
 #assert aDBMTest |= []<>goal5;
 '''
-    elif algo_id == "peg":
-        if var_value < 1 or var_value > 9:
-            raise ValueError("Please enter a valid number which is at least 2!")
-        
-        if var_value == 1:
-            processed_code = f'''#define X -1;
+
+    return processed_code
+
+
+@generator("peg", Param("game_setting", minimum=1, maximum=9))
+def _generate_peg(var_value):
+
+    if var_value == 1:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2272,8 +2386,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 2:
-            processed_code = f'''#define X -1;
+    elif var_value == 2:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2306,8 +2420,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 3:
-            processed_code = f'''#define X -1;
+    elif var_value == 3:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2340,8 +2454,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 4:
-            processed_code = f'''#define X -1;
+    elif var_value == 4:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2374,8 +2488,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 5:
-            processed_code = f'''#define X -1;
+    elif var_value == 5:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2407,8 +2521,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 6:
-            processed_code = f'''#define X -1;
+    elif var_value == 6:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2443,8 +2557,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 7:
-            processed_code = f'''#define X -1;
+    elif var_value == 7:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2479,8 +2593,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        elif var_value == 8:
-            processed_code = f'''#define X -1;
+    elif var_value == 8:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2515,8 +2629,8 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #define goal pegsCounter == 1 && board[initEmptyX][initEmptyY] == P;
 #assert Game() reaches goal;
 '''
-        else:
-            processed_code = f'''#define X -1;
+    else:
+        processed_code = f'''#define X -1;
 #define P 1;
 #define E 2;
 #define S 1; //sticky has the same value as P now.
@@ -2552,9 +2666,13 @@ Game() = []i:{{0..H-1}};j:{{0..W-1}}@ Peg(i,j);
 #assert Game() reaches goal;
 '''
 
-    elif algo_id == "huarongdao":
-        if var_value.lower() == "general":
-            processed_code = f'''//The version of this Hua Rong Dao game is Bi Yi Heng Kong
+    return processed_code
+
+
+@generator("huarongdao", Param("version", choices=('general', 'optimal')))
+def _generate_huarongdao(var_value):
+    if var_value.lower() == "general":
+        processed_code = f'''//The version of this Hua Rong Dao game is Bi Yi Heng Kong
 
 //The game goal is find a solution which is not required to have minimum number of steps .
 
@@ -2833,8 +2951,8 @@ Game() = Initial();(BingMove()||JiangMove()||CaocaoMove());
 //try to find out the best solution
 #assert Game() reaches goal with min(counter);
 '''
-        elif var_value.lower() == "optimal":
-            processed_code = f'''//The version of this Hua Rong Dao game is Bi Yi Heng Kong
+    elif var_value.lower() == "optimal":
+        processed_code = f'''//The version of this Hua Rong Dao game is Bi Yi Heng Kong
 
 //The game goal is find a solution which has minimum number of steps .
 
@@ -3113,72 +3231,64 @@ Game() = Initial();(BingMove()||JiangMove()||CaocaoMove());
 //try to find out the best solution
 #assert Game() reaches goal with min(counter);
 '''
-        else:
-            raise ValueError("Please enter a valid option!")
-    
-    elif algo_id == "para_stack":
-        try:
-            stack_size, num_process = re.split(r'[,\s]+', var_value.strip())
-            stack_size = int(stack_size)
-            num_process = int(num_process)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_process < 3) or (stack_size < 1):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        lines = []
-        # Header
-        lines.append("// stack size")
-        lines.append(f"#define SIZE {stack_size};")
-        lines.append("")
-        lines.append("// shared head pointer for the concrete implementation")
-        lines.append("var H = 0;")
-        lines.append("")
-        lines.append("//////////////// The Concrete Implementation Model //////////////////")
-        # Push
-        lines.append("Push() = push_inv -> PushLoop(H);")
-        lines.append("")
-        lines.append("PushLoop(v) = (")
-        lines.append("    ifa (v == H) {")
-        lines.append("        t{if(H < SIZE) {H = H+1;}} -> push_res.(v+1) -> Process()")
-        lines.append("    } else {")
-        lines.append("        Push()")
-        lines.append("    });")
-        lines.append("")
-        # Pop
-        lines.append("Pop() = pop_inv -> PopLoop(H);")
-        lines.append("")
-        lines.append("PopLoop(v) =")
-        lines.append("    (if(v == 0) {")
-        lines.append("        pop_res.0 -> Process() ")
-        lines.append("    } else {")
-        lines.append("        (ifa(v != H) { Pop() } else {")
-        lines.append("            t{H = H-1;} -> pop_res.(v-1) -> Process()")
-        lines.append("        })")
-        lines.append("    });")
-        lines.append("")
-        # Process and System
-        lines.append("Process() = (Push()[]Pop());")
-        lines.append(f"Stack() = (|||{{{num_process}}}@Process());")
-        lines.append("")
-        # Assertions
-        lines.append("#assert Stack() deadlockfree;")
-        push_terms = " ||".join(f"push_res.{i}" for i in range(stack_size))
-        lines.append(f"#assert Stack() |= [](push_inv -> <>({push_terms}));")
-        
-        processed_code = "\n".join(lines)
-
-    elif algo_id == "driving_philo":
-        try:
-            num_philosophers, num_resources = re.split(r'[,\s]+', var_value.strip())
-            num_philosophers = int(num_philosophers)
-            num_resources = int(num_resources)
-        except:
-            raise ValueError("Please ensure that you've entered a valid value for each of the three variables, and separated the values by comma or space!")
-        if (num_philosophers < 2) or (num_resources < 1):
-            raise ValueError("Please ensure that the values you entered adhere to the requirements!")
-        
-        processed_code = f'''/***************************************************************************************************
+    else:
+        raise ValueError("Please enter a valid option!")
+
+    return processed_code
+
+
+@generator("para_stack", Param("stack_size", minimum=1), Param("num_processes", minimum=3))
+def _generate_para_stack(stack_size, num_process):
+
+    lines = []
+    # Header
+    lines.append("// stack size")
+    lines.append(f"#define SIZE {stack_size};")
+    lines.append("")
+    lines.append("// shared head pointer for the concrete implementation")
+    lines.append("var H = 0;")
+    lines.append("")
+    lines.append("//////////////// The Concrete Implementation Model //////////////////")
+    # Push
+    lines.append("Push() = push_inv -> PushLoop(H);")
+    lines.append("")
+    lines.append("PushLoop(v) = (")
+    lines.append("    ifa (v == H) {")
+    lines.append("        t{if(H < SIZE) {H = H+1;}} -> push_res.(v+1) -> Process()")
+    lines.append("    } else {")
+    lines.append("        Push()")
+    lines.append("    });")
+    lines.append("")
+    # Pop
+    lines.append("Pop() = pop_inv -> PopLoop(H);")
+    lines.append("")
+    lines.append("PopLoop(v) =")
+    lines.append("    (if(v == 0) {")
+    lines.append("        pop_res.0 -> Process() ")
+    lines.append("    } else {")
+    lines.append("        (ifa(v != H) { Pop() } else {")
+    lines.append("            t{H = H-1;} -> pop_res.(v-1) -> Process()")
+    lines.append("        })")
+    lines.append("    });")
+    lines.append("")
+    # Process and System
+    lines.append("Process() = (Push()[]Pop());")
+    lines.append(f"Stack() = (|||{{{num_process}}}@Process());")
+    lines.append("")
+    # Assertions
+    lines.append("#assert Stack() deadlockfree;")
+    push_terms = " ||".join(f"push_res.{i}" for i in range(stack_size))
+    lines.append(f"#assert Stack() |= [](push_inv -> <>({push_terms}));")
+
+    processed_code = "\n".join(lines)
+
+    return processed_code
+
+
+@generator("driving_philo", Param("num_philosophers", minimum=2), Param("num_resources", minimum=1))
+def _generate_driving_philo(num_philosophers, num_resources):
+
+    processed_code = f'''/***************************************************************************************************
 The Driving Philosophers is a new synchronization problem in mobile ad-hoc systems. 
 In this problem, an unbounded number of driving philosophers (processes) try to access 
 a round-about (set of shared resources, organized along a logical ring).   
@@ -3326,13 +3436,17 @@ The fifth part is the analysis of the system.
 #assert College reaches BadTransition;
 '''
 
-    # elif algo_id == "":
-    #     if var_value < 2:
-    #         raise ValueError("Please enter a valid number which is at least 2!")
-        
-    #     processed_code = 
+# elif algo_id == "":
+#     if var_value < 2:
+#         raise ValueError("Please enter a valid number which is at least 2!")
 
-    else:
-        raise ValueError("Sorry, this algorithm does not exist in our database yet.")
-    
-    return processed_code
\ No newline at end of file
+#     processed_code = 
+
+    return processed_code
+
+
+# A new generator:
+# @generator("", Param("", minimum=2))
+# def _generate_(var_value):
+#     processed_code =
+#     return processed_code
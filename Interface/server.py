@@ -3,32 +3,89 @@ from flask_cors import CORS, cross_origin
 import subprocess
 import json
 import datetime
+import time
 import io
 import os
 import sys
-from openai import OpenAI
-import anthropic
-from rules_classical_algos import process_classical_algos
-from sentence_transformers import SentenceTransformer, util
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-openai_key = os.environ["OPENAI_API_KEY"]
-claude_key = os.environ["CLAUDE_API_KEY"]
+import threading
+import importlib.util
+# pat_runner, llm_client, tracing and the other modules shared with the automated pipelines live in ../Shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Shared'))
+
+from rules_classical_algos import process_classical_algos, describe_parameters, parameter_schema
+from pat_runner import run_verifications, select_engine, split_code_and_assertions
+from pat_output import PatResult, parse_assertion_output, parse_file
+from sweep import run_sweep
+from pat_cache import PAT_CACHE_ENABLED, cache_get, cache_key, cache_put, get_cache_dir, get_pat_version
+from pat_deps import PAT_INCREMENTAL, affected_blocks
+from verify_jobs import FINISHED, JobQueue, QueueFull
+import llm_client  # imports its SDKs and creates its clients on the first LLM call
+import tracing
+import workspaces
+
+
+def lazy_import(name):
+    """
+    Module `name`, executed on first attribute access instead of now, so heavy subsystems
+    (numpy, sklearn, sentence-transformers) do not slow down server startup.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
 
-client = OpenAI(
-    api_key=openai_key,
-)
 
-client_claude = anthropic.Anthropic(api_key=claude_key)
+rag_index = lazy_import('rag_index')  # loads its index, and the embedding model, on first query
 
 app = Flask(__name__, static_folder='./templates', static_url_path='')
 cors = CORS(app, supports_credentials=True)
+# Every session reads and writes its own histories and verification files (workspaces.py)
+workspaces.init_app(app)
+
+# History logs, in the workspace of the request's session
+msg_history_path = 'history.json'
+const_history_path = 'const-history.json'
+action_history_path = 'action-history.json'
+
 
-# File paths
-msg_history_path = './history/history.json'
-const_history_path = './history/const-history.json'
-action_history_path = './history/action-history.json'
+def _stream_answer(start, answer_of, save_answer, model_name=None, endpoint=None):
+    """
+    Server-sent events of a streaming LLM request (llm_client.TextStream(start)): {"text": ...} for every piece of the
+    answer as it arrives, then an "error" event, or a "done" event with what the endpoint returns without streaming
+    (`save_answer(answer_of(response))`, which saves the record once the answer is complete) and the time to the
+    first token. The time to the first token is also recorded as a span of `model_name` (tracing.py).
+    """
+    requested = time.perf_counter()
+    trace_dir = workspaces.current().trace_dir()
+    stream = llm_client.TextStream(start)
+
+    def generate():
+        ttft = None
+        try:
+            for text in stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - requested
+                yield f"data: {json.dumps({'text': text})}\n\n"
+            result = save_answer(answer_of(stream.response))
+            total = time.perf_counter() - requested
+            if model_name:
+                tracing.record_model_span(
+                    model_name, 'llm-stream', 'llm', total, trace_dir=trace_dir, source='interface',
+                    endpoint=endpoint, ttft=ttft
+                )
+            yield f"event: done\ndata: {json.dumps({**result, 'ttft': ttft, 'totalTime': total})}\n\n"
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            stream.close()
+
+    return app.response_class(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 @app.route("/get_planning_model_answers", methods=["POST"])
 def get_planning_model_answers():
@@ -36,68 +93,75 @@ def get_planning_model_answers():
     question = data.get('question')
     context = data.get('context')
     history = data.get('history')
+    workspace = workspaces.current()
+
+    def save_answer(answer):
+        # Create interaction record
+        current_time = datetime.datetime.now()
+        formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
+        
+        interaction = {
+            'timestamp': formatted_time,
+            'question': question,
+            'answerGPT': answer,
+            'context': context,
+            'PAT': ""  # Empty PAT response as specified
+        }
+        history_name = history.strip()  # 去除空格和换行符
+
+        if history_name == 'skip':
+            return {
+                'status': 'success',
+                'data': interaction
+            }
+
+        if history_name == 'const':
+            msg_history_path = 'const-history.json'
+        elif history_name == 'action':
+            msg_history_path = 'action-history.json'
+        elif history_name == 'assertion':
+            msg_history_path = 'assertion-history.json'            
+        else:
+            msg_history_path = 'history.json'
+        
+        
+        # print("saving...",msg_history_path)
+        # Save to history
+        workspace.append(msg_history_path, interaction)
+        
+        return {
+            'status': 'success',
+            'data': interaction
+        }
 
     if question:
+        messages = [
+            {
+                "role": "user",
+                "content": question
+            }
+        ]
+        # With "cache", an identical question asked before is answered from the LLM response cache (llm_cache.py)
+        cache = bool(data.get('cache'))
+        # With "stream", the answer is sent as server-sent events while it is generated
+        if data.get('stream'):
+            return _stream_answer(
+                lambda on_text: llm_client.openai_chat_stream(
+                    messages, on_text, model="o3-mini-2025-01-31", reasoning_effort="high", cache=cache
+                ),
+                lambda completion: completion.choices[0].message.content,
+                save_answer, data.get('model_name'), 'get_planning_model_answers'
+            )
         try:
             # Get model response
-            completion = client.chat.completions.create(
+            completion = llm_client.run(llm_client.openai_chat(
                 model="o3-mini-2025-01-31",
                 reasoning_effort="high",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": question
-                    }
-                ]
-            )
+                cache=cache,
+                messages=messages
+            ))
             answer = completion.choices[0].message.content
-            
-            # Create interaction record
-            current_time = datetime.datetime.now()
-            formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-            
-            interaction = {
-                'timestamp': formatted_time,
-                'question': question,
-                'answerGPT': answer,
-                'context': context,
-                'PAT': ""  # Empty PAT response as specified
-            }
-            history = history.strip()  # 去除空格和换行符
-
-            if history == 'skip':
-                return jsonify({
-                    'status': 'success',
-                    'data': interaction
-                })
-
-            if history == 'const':
-                msg_history_path = './history/const-history.json'
-            elif history == 'action':
-                msg_history_path = './history/action-history.json'
-            elif history == 'assertion':
-                msg_history_path = './history/assertion-history.json'            
-            else:
-                msg_history_path = './history/history.json'
-            
-            
-            # print("saving...",msg_history_path)
-            # Save to history
-            try:
-                with open(msg_history_path, 'r') as file:
-                    history = json.load(file)
-            except FileNotFoundError:
-                history = []
-
-            history.append(interaction)
-
-            with open(msg_history_path, 'w') as file:
-                json.dump(history, file, indent=4)
-            
-            return jsonify({
-                'status': 'success',
-                'data': interaction
-            })
+            return jsonify(save_answer(answer))
         except Exception as e:
             print(f"Error: {str(e)}")
             return jsonify({'error': str(e)}), 500
@@ -111,70 +175,77 @@ def get_chatbot_model_answers():
     context = data.get('context')
     history = data.get('history')
     print("question",question)
+    workspace = workspaces.current()
+
+    def save_answer(answer):
+        # Create interaction record
+        current_time = datetime.datetime.now()
+        formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
+  
+        
+        interaction = {
+            'timestamp': formatted_time,
+            'question': question,
+            'answerGPT': answer,
+            'PAT': ""  # Empty PAT response as specified
+        }
+        
+
+        history_name = history.strip()  # 去除空格和换行符
+
+        if history_name == 'skip':
+            return {
+                'status': 'success',
+                'data': interaction
+            }
+
+        if history_name == 'const':
+            msg_history_path = 'const-history.json'
+        elif history_name == 'action':
+            msg_history_path = 'action-history.json'
+        elif history_name == 'assertion':
+            msg_history_path = 'assertion-history.json'
+        elif history_name == 'chatbot':
+            msg_history_path = 'chatbot-history.json'            
+        else:
+            msg_history_path = 'history.json'
+        
+
+        # Save to history
+        workspace.append(msg_history_path, interaction)
+        
+        return {
+            'status': 'success',
+            'data': interaction
+        }
 
     if question:
+        messages = [
+            {
+                "role": "user",
+                "content": question
+            }
+        ]
+        # With "cache", an identical question asked before is answered from the LLM response cache (llm_cache.py)
+        cache = bool(data.get('cache'))
+        # With "stream", the answer is sent as server-sent events while it is generated
+        if data.get('stream'):
+            return _stream_answer(
+                lambda on_text: llm_client.openai_chat_stream(
+                    messages, on_text, model="o3-mini-2025-01-31", cache=cache
+                ),
+                lambda completion: completion.choices[0].message.content,
+                save_answer, data.get('model_name'), 'get_chatbot_model_answers'
+            )
         try:
             # Get model response: using o3-mini instead of o3-mini-high
-            completion = client.chat.completions.create(
+            completion = llm_client.run(llm_client.openai_chat(
                 model="o3-mini-2025-01-31",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": question
-                    }
-                ]
-            )
+                cache=cache,
+                messages=messages
+            ))
             answer = completion.choices[0].message.content
-            
-            # Create interaction record
-            current_time = datetime.datetime.now()
-            formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-      
-            
-            interaction = {
-                'timestamp': formatted_time,
-                'question': question,
-                'answerGPT': answer,
-                'PAT': ""  # Empty PAT response as specified
-            }
-            
-
-            history = history.strip()  # 去除空格和换行符
-
-            if history == 'skip':
-                return jsonify({
-                    'status': 'success',
-                    'data': interaction
-                })
-
-            if history == 'const':
-                msg_history_path = './history/const-history.json'
-            elif history == 'action':
-                msg_history_path = './history/action-history.json'
-            elif history == 'assertion':
-                msg_history_path = './history/assertion-history.json'
-            elif history == 'chatbot':
-                msg_history_path = './history/chatbot-history.json'            
-            else:
-                msg_history_path = './history/history.json'
-            
-
-            # Save to history
-            try:
-                with open(msg_history_path, 'r') as file:
-                    history = json.load(file)
-            except (FileNotFoundError, json.JSONDecodeError):
-                history = []
-
-            history.append(interaction)
-
-            with open(msg_history_path, 'w') as file:
-                json.dump(history, file, indent=4)
-            
-            return jsonify({
-                'status': 'success',
-                'data': interaction
-            })
+            return jsonify(save_answer(answer))
         except Exception as e:
             print(f"Error: {str(e)}")
             return jsonify({'error': str(e)}), 500
@@ -183,13 +254,13 @@ def get_chatbot_model_answers():
 
 @app.route("/get_prev_code_model_answers_claude", methods=["GET"])
 def get_prev_code_model_answers_claude():
-    filename = './history/claude-code.json'
-    with open(filename, 'r') as file:
-        history_data = json.load(file)
+    last_entry = workspaces.current().latest('claude-code.json')
+    if last_entry is None:
+        return jsonify({'error': 'No code generation history available'}), 404
     
     return jsonify({
                 'status': 'success',
-                'data': history_data[len(history_data)-1]
+                'data': last_entry
             })
     
 @app.route("/get_code_model_answers_claude", methods=["POST"])
@@ -198,60 +269,69 @@ def get_code_model_answers_claude():
     question = data.get('question')
     context = data.get('context')
     history = data.get('history')
+    content = question
+    # The question may come as parts ({"text", "cache"}): the parts marked "cache" are the prompt prefix that
+    # Claude caches between requests (see llm_client.cached_prompt)
+    if isinstance(question, list):
+        content = llm_client.cached_prompt([(part.get('text', ''), part.get('cache', False)) for part in question])
+        question = "".join(part.get('text', '') for part in question)
     print("Question: ", question)
+    workspace = workspaces.current()
+
+    def save_answer(answer):
+        # Create interaction record
+        current_time = datetime.datetime.now()
+        formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
+    
+
+        interaction = {
+            'timestamp': formatted_time,
+            'question': question,
+            'answerClaude': answer,  # Labeling the answer for Claude
+            'PAT': ""  # Empty PAT response as specified
+        }
 
+        print(answer)
+
+  
+        history_name = history.strip()  # Remove any whitespace or newline characters
+        if history_name != './history/claude-code.json':
+            print("An error in the saving path")
+        
+ 
+        # Append to the history log, in the session's history directory whatever the path
+        workspace.append(os.path.basename(history_name), interaction)
+        
+        return {
+            'status': 'success',
+            'data': interaction
+        }
 
     if question:
+        messages = [
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+        # With "stream", the code is sent as server-sent events while it is generated
+        if data.get('stream'):
+            return _stream_answer(
+                lambda on_text: llm_client.claude_messages_stream(
+                    messages, on_text, model="claude-3-7-sonnet-20250219", max_tokens=8192
+                ),
+                lambda response: response.content[0].text,
+                save_answer, data.get('model_name'), 'get_code_model_answers_claude'
+            )
         try:
             # Get model response from Claude
-            response = client_claude.messages.create(
+            response = llm_client.run(llm_client.claude_messages(
                 model="claude-3-7-sonnet-20250219",  # or update to a newer version if available
                 max_tokens = 8192,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": question
-                    }
-                ]
-            )
+                messages=messages
+            ))
             answer = response.content[0].text
-
-            # Create interaction record
-            current_time = datetime.datetime.now()
-            formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-        
-
-            interaction = {
-                'timestamp': formatted_time,
-                'question': question,
-                'answerClaude': answer,  # Labeling the answer for Claude
-                'PAT': ""  # Empty PAT response as specified
-            }
-
-            print(answer)
-
-      
-            history = history.strip()  # Remove any whitespace or newline characters
-            if history != './history/claude-code.json':
-                print("An error in the saving path")
-            
-     
-            # Read existing history data, or create new list if file not found
-            try:
-                with open(history, 'r') as file:
-                    history_data = json.load(file)
-            except (FileNotFoundError, json.JSONDecodeError):
-                history_data = []
-
-            history_data.append(interaction)
-
-            with open(history, 'w') as file:
-                json.dump(history_data, file, indent=4)
-            
-            return jsonify({
-                'status': 'success',
-                'data': interaction
-            })
+            return jsonify(save_answer(answer))
         except Exception as e:
             print(f"Error: {str(e)}")
             return jsonify({'error': str(e)}), 500
@@ -278,18 +358,7 @@ def save_assertion_history():
             'PAT': pat
         }
 
-        path = './history/assertion-history.json'
-
-        try:
-            with open(path, 'r') as f:
-                history = json.load(f)
-        except FileNotFoundError:
-            history = []
-
-        history.append(interaction)
-
-        with open(path, 'w') as f:
-            json.dump(history, f, indent=2)  # json.dump will handle answerGPT correctly
+        workspaces.current().append('assertion-history.json', interaction)  # json.dumps will handle answerGPT correctly
 
         return jsonify({'status': 'success'})
     except Exception as e:
@@ -340,10 +409,10 @@ def GPT4_output(input, context=None):
         }
     ])
 
-    completion = client.chat.completions.create(
+    completion = llm_client.run(llm_client.openai_chat(
         model="gpt-4",
         messages=messages
-    )
+    ))
     return completion.choices[0].message.content
 
 def our_output(input):
@@ -394,67 +463,31 @@ def get_answers():
         }
         
         # Save to history
-        try:
-            with open(msg_history_path, 'r') as file:
-                history = json.load(file)
-        except FileNotFoundError:
-            history = []
-
-        history.append(interaction)
-
-        with open(msg_history_path, 'w') as file:
-            json.dump(history, file, indent=4)
+        workspaces.current().append(msg_history_path, interaction)
         
-        return jsonify(history)
+        return jsonify(workspaces.current().read(msg_history_path))
     
     return jsonify({'error': 'No question provided'}), 400
 
 @app.route("/get_history", methods=["GET"])
 def load_history():
-    try:
-        with open(msg_history_path, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print("File not found. Returning an empty list.")
-        return []
+    return workspaces.current().read(msg_history_path)
     
 @app.route("/get_const_history", methods=["GET"])
 def load_const_history():
-    msg_history_path = './history/const-history.json'
-    try:
-        with open(msg_history_path, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print("File not found. Returning an empty list.")
-        return []
+    return workspaces.current().read(const_history_path)
 
 @app.route("/get_action_history", methods=["GET"])
 def load_action_history():
-    msg_history_path = './history/action-history.json'
-    try:
-        with open(msg_history_path, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print("File not found. Returning an empty list.")
-        return []   
+    return workspaces.current().read(action_history_path)
     
 @app.route("/get_assertion_history", methods=["GET"])
 def get_assertion_history():
-    try:
-        with open('./history/assertion-history.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return workspaces.current().read('assertion-history.json')
 
 @app.route("/get_last_nl_instruction_claude", methods=["GET"])
 def get_last_nl_instruction_claude():
-    filename = "./history/nl-instruction-claude.json"
-    try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-    return jsonify(data)
+    return jsonify(workspaces.current().read('nl-instruction-claude.json'))
 
 @app.route("/save_nl_instruction_parts", methods=["POST"])
 def save_nl_parts():
@@ -474,20 +507,8 @@ def save_nl_parts():
         "data3": data3
     }
 
-    # Read existing JSON array (or start a new one if file not found/empty)
-    filename = "./history/nl-instruction-part.json"
-    try:
-        with open(filename, "r") as f:
-            existing_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_data = []
-
-    # Append the new entry to the array
-    existing_data.append(new_entry)
-
-    # Write back the updated array
-    with open(filename, "w") as f:
-        json.dump(existing_data, f, indent=2)
+    # Append the new entry to the history log
+    workspaces.current().append('nl-instruction-part.json', new_entry)
 
     return jsonify({"status": "success"})
 
@@ -500,29 +521,140 @@ def save_nl_claude():
     """
     data = request.get_json()
     full_text = data.get("fullText", "")
-    filename = "./history/nl-instruction-claude.json"
 
-    # 1. Read existing file or create a new list if file doesn't exist or is invalid
-    try:
-        with open(filename, "r") as f:
-            existing_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_data = []
-
-    # 2. Build the new entry
+    # 1. Build the new entry
     new_entry = {
         "fullText": full_text
     }
 
-    # 3. Append it to the existing array
-    existing_data.append(new_entry)
-
-    # 4. Write the updated array back
-    with open(filename, "w") as f:
-        json.dump(existing_data, f, indent=2)
+    # 2. Append it to the history log
+    workspaces.current().append('nl-instruction-claude.json', new_entry)
 
     return jsonify({"status": "success"})
 
+# Verifications run as jobs on a bounded pool of workers (see verify_jobs.py)
+verification_jobs = JobQueue()
+# Jobs verifying the same model folder run one after the other, so one job does not wipe the files of another.
+# The folder's path picks one of a fixed set of locks, so the locks do not grow with the sessions and models
+# the server has seen; two folders sharing a lock only wait for each other.
+_FOLDER_LOCK_STRIPES = 64
+_folder_locks = [threading.Lock() for _ in range(_FOLDER_LOCK_STRIPES)]
+
+
+def _folder_lock(folder_path):
+    return _folder_locks[hash(os.path.normpath(folder_path)) % _FOLDER_LOCK_STRIPES]
+
+
+def _verify_model(job, root_path, folder_path, code_blocks, incremental):
+    """
+    Verify the blocks of a /verify_pat_code request, one after the other, adding each assertion's result to the job.
+    The job's output is that of the last block verified, as /verify_pat_code used to return it.
+    """
+    with _folder_lock(folder_path):
+        # With "incremental", the outputs of the model's previous verification are kept for the assertions
+        # the change to the code cannot have affected (see pat_deps.py)
+        reused_outputs = {}
+        if incremental:
+            previous_blocks, previous_outputs = [], []
+            try:
+                while os.path.exists(f"{folder_path}/{len(previous_blocks)}.csp"):
+                    k = len(previous_blocks)
+                    with open(f"{folder_path}/{k}.csp", 'r', encoding='utf-8') as f:
+                        previous_blocks.append(f.read())
+                    with open(f"{folder_path}/pat_output_{k}.txt", 'r', encoding='utf-8') as f:
+                        previous_outputs.append(f.read())
+            except OSError:
+                previous_blocks = previous_blocks[:len(previous_outputs)]
+            if len(previous_blocks) == len(code_blocks):
+                affected = set(affected_blocks(previous_blocks, code_blocks))
+                reused_outputs = {
+                    i: previous_outputs[i] for i in range(len(code_blocks))
+                    if i not in affected and parse_assertion_output(previous_outputs[i]).verdict
+                }
+
+        # Remove any existing files in the model's folder (both .csp and .txt)
+        if os.path.exists(folder_path):
+            # Remove all files in the folder
+            for file_name in os.listdir(folder_path):
+                file_path = os.path.join(folder_path, file_name)
+                if os.path.isfile(file_path):
+                    try:
+                        os.remove(file_path)
+                    except Exception as remove_err:
+                        print(f"Error removing file {file_path}: {remove_err}")
+        else:
+            os.makedirs(folder_path, exist_ok=True)
+
+        cache_dir = get_cache_dir(root_path)
+        pat_version = get_pat_version(root_path)
+
+        for i in range(len(code_blocks)):
+            if job.cancelled:
+                return
+            input_file = f"{folder_path}/{i}.csp"
+            output_file = f"{folder_path}/pat_output_{i}.txt"
+            # 保存 code 到 .csp 文件
+            try:
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(code_blocks[i])
+            except Exception as e:
+                print("error happened during saving codes")
+                raise RuntimeError(f'Failed to save file: {str(e)}')
+
+            reused = i in reused_outputs
+            engine = select_engine(code_blocks[i])
+            key = cache_key(code_blocks[i], engine, pat_version)
+            # Reuse the cached PAT output if this block has been verified before
+            cached_output = None
+            if not reused and PAT_CACHE_ENABLED:
+                cached_output = cache_get(cache_dir, key)
+
+            if reused or cached_output is not None:
+                output = reused_outputs[i] if reused else cached_output
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(output)
+            else:
+                job_status = run_verifications(root_path, [(input_file, output_file, engine)], cancel=job.cancel_event)[0]
+                if job_status['status'] == 'cancelled':
+                    return
+                if job_status['status'] == 'timeout':
+                    print(f"PAT execution timed out for assertion {i}")
+                    # If execution exceeds 5 minutes, stop the verification here
+                    job.output = ""
+                    job.any_empty = True
+                    job.add_result({'status': 'timeout', 'index': i})
+                    return
+                if job_status['status'] != 'ok':
+                    raise RuntimeError(f"PAT execution failed: {job_status['error']}")
+                try:
+                    with open(output_file, 'r', encoding='utf-8') as f:
+                        output = f.read()
+                except FileNotFoundError:
+                    raise RuntimeError('Output file not found')
+                if output == "":
+                    job.any_empty = True
+                if PAT_CACHE_ENABLED:
+                    cache_put(cache_dir, key, output, engine, pat_version)
+
+            job.output = output
+            pat_output = parse_assertion_output(output)
+            assertion_line = ""
+            for line in code_blocks[i].splitlines():
+                if line.strip().startswith("#assert"):
+                    assertion_line = line.strip()
+                    break
+            job.add_result({
+                'index': i,
+                'assertion': assertion_line,
+                'patResult': pat_output.result_text or "",
+                'actualResult': pat_output.verdict,
+                'trace': pat_output.trace,
+                'engine': pat_output.engine,
+                'statistics': pat_output.statistics,
+                'cached': reused or cached_output is not None
+            })
+
+
 @app.route("/verify_pat_code", methods=['POST'])
 def verify_pat_code():
     data = request.get_json()
@@ -538,15 +670,7 @@ def verify_pat_code():
             "answerClaude": code,   # the (possibly edited) PAT code
             "PAT": ""
         }
-        filename = "./history/claude-refinement.json"
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                refinement_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            refinement_data = []
-        refinement_data.append(new_record)
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(refinement_data, f, indent=2)
+        workspaces.current().append('claude-refinement.json', new_record)
     except Exception as e:
         print("Error saving claude-refinement.json:", e)
         # Optionally, you can continue even if saving fails.
@@ -555,74 +679,86 @@ def verify_pat_code():
 
     modelName = data.get("model_name", "")
     root_path = "path_to_your_root_directory"  # Adjust this path as needed
-    
-    # Remove any existing files in the model's folder (both .csp and .txt)
-    folder_path = f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PATfiles/{modelName}"
-    if os.path.exists(folder_path):
-        # Remove all files in the folder
-        for file_name in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file_name)
-            if os.path.isfile(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as remove_err:
-                    print(f"Error removing file {file_path}: {remove_err}")
-    else:
-        os.makedirs(folder_path, exist_ok=True)
+    workspace = workspaces.current()
+    folder_path = workspace.pat_dir(root_path, modelName)
+    incremental = data.get("incremental", PAT_INCREMENTAL)
 
-    anyEmpty = False
-    for i in range(len(code_blocks)):
-        input_file = f"{folder_path}/{i}.csp"
-        output_file = f"{folder_path}/pat_output_{i}.txt"
-        # 保存 code 到 .csp 文件
-        try:
-            with open(input_file, 'w', encoding='utf-8') as f:
-                f.write(code_blocks[i])
-        except Exception as e:
-            print("error happened during saving codes")
-            return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
-        
-        if ('reaches' in code_blocks[i]) or ('deadlockfree' in code_blocks[i]):
-            command = [ "mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe",
-              "-csp", "-engine", "1", input_file, output_file]
-        else:
-            command = [ "mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe",
-              "-csp", input_file, output_file]
-        try:
-            subprocess.run(command, check=True, timeout=300)
-            with open(output_file, 'r', encoding='utf-8') as f:
-                output = f.read()
-            if output == "":
-                anyEmpty = True
-        except subprocess.TimeoutExpired:
-            print(f"PAT execution timed out for assertion {i}")
-            # If execution exceeds 5 minutes, return immediately for this loop
-            return jsonify({'output': "", 'anyEmpty': True})
-        except subprocess.CalledProcessError as e:
-            return jsonify({'error': f'PAT execution failed: {str(e)}'}), 500
-        except FileNotFoundError:
-            return jsonify({'error': 'Output file not found'}), 500
-        
+    try:
+        job = verification_jobs.submit(
+            workspace.session_id, modelName, len(code_blocks),
+            lambda job: _verify_model(job, root_path, folder_path, code_blocks, incremental)
+        )
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
 
-    # # 保存 code 到 .csp 文件
-    # try:
-    #     with open(input_file, 'w', encoding='utf-8') as f:
-    #         f.write(code)
-    # except Exception as e:
-    #     return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
-    # # 构造 PAT 命令
-    # command = [
-    #     "mono",
-    #     f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe",
-    #     "-csp", input_file, output_file
-    # ]
-    # # 运行命令并获取输出
-    
+    # With "async", the client gets the job id at once and follows the job on /verify_jobs/<id>
+    if data.get("async"):
+        return jsonify({'jobId': job.id, 'status': job.status}), 202
 
+    job.join()
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    return jsonify({'output': job.output, 'anyEmpty': job.any_empty})
 
-    return jsonify({'output': output, 'anyEmpty': anyEmpty})
 
-import re
+def _session_job(job_id):
+    return verification_jobs.get(job_id, workspaces.current().session_id)
+
+
+@app.route("/verify_jobs/stats", methods=['GET'])
+def verify_jobs_stats():
+    return jsonify(verification_jobs.stats())
+
+
+@app.route("/verify_jobs/<job_id>", methods=['GET'])
+def verify_job_status(job_id):
+    """
+    Status of a verification job and its results from index `since` on (all of them by default).
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    since = request.args.get("since", 0, type=int)
+    return jsonify(job.snapshot(max(0, since)))
+
+
+@app.route("/verify_jobs/<job_id>/events", methods=['GET'])
+def verify_job_events(job_id):
+    """
+    The results of a verification job as server-sent events, one per assertion, then a "done" event with its status.
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    since = max(0, request.args.get("since", 0, type=int))
+
+    def generate():
+        sent = since
+        while True:
+            job.wait(sent, 15.0)
+            snapshot = job.snapshot(sent)
+            for result in snapshot['results']:
+                yield f"data: {json.dumps(result)}\n\n"
+            sent += len(snapshot['results'])
+            if snapshot['status'] in FINISHED:
+                del snapshot['results']
+                yield f"event: done\ndata: {json.dumps(snapshot)}\n\n"
+                return
+            if not snapshot['results']:
+                # Keeps proxies from closing the connection while PAT runs
+                yield ": keep-alive\n\n"
+
+    return app.response_class(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route("/verify_jobs/<job_id>/cancel", methods=['POST'])
+def cancel_verify_job(job_id):
+    job = verification_jobs.cancel(job_id, workspaces.current().session_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'jobId': job.id, 'status': job.status})
+
 
 @app.route("/verify_classical_code", methods=['POST'])
 def verify_classical_code():
@@ -634,83 +770,82 @@ def verify_classical_code():
         code_blocks = split_code_and_assertions(code)
         verification_results = []
         root_path = "path_to_your_root_directory"  # Adjust this path as needed
-        folder_path = f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PATfiles/{model_name}"
+        folder_path = workspaces.current().pat_dir(root_path, model_name)
 
-        if os.path.exists(folder_path):
-            # Remove all files in the folder
-            for file_name in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, file_name)
-                if os.path.isfile(file_path):
-                    try:
-                        os.remove(file_path)
-                    except Exception as remove_err:
-                        print(f"Error removing file {file_path}: {remove_err}")
-        else:
-            os.makedirs(folder_path, exist_ok=True)
+        cache_dir = get_cache_dir(root_path)
+        pat_version = get_pat_version(root_path)
 
         def generate():
-            for i in range(len(code_blocks)):
-                input_file = f"{folder_path}/{i}.csp"
-                output_file = f"{folder_path}/pat_output_{i}.txt"
+            # Same model folder as /verify_pat_code: wait for the verifications running in it
+            with _folder_lock(folder_path):
+                if os.path.exists(folder_path):
+                    # Remove all files in the folder
+                    for file_name in os.listdir(folder_path):
+                        file_path = os.path.join(folder_path, file_name)
+                        if os.path.isfile(file_path):
+                            try:
+                                os.remove(file_path)
+                            except Exception as remove_err:
+                                print(f"Error removing file {file_path}: {remove_err}")
+                else:
+                    os.makedirs(folder_path, exist_ok=True)
 
-                try:
-                    with open(input_file, 'w', encoding='utf-8') as f:
-                        f.write(code_blocks[i])
-                except Exception as e:
-                    yield json.dumps({'error': f'Failed to save file: {str(e)}'}) + '\n'
-                    return
+                for i in range(len(code_blocks)):
+                    input_file = f"{folder_path}/{i}.csp"
+                    output_file = f"{folder_path}/pat_output_{i}.txt"
 
-                command = [
-                    "mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe", "-csp", input_file, output_file
-                ]
-                try:
-                    subprocess.run(command, check=True, timeout=300)
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        output = f.read()
-                    
-                    # process pat output
-                    start_marker = "********Verification Result********"
-                    end_marker = "********Verification Setting********"
-                    start_idx = output.find(start_marker)
-                    end_idx = output.find(end_marker)
-                    if start_idx != -1 and end_idx != -1:
-                        pat_result = output[start_idx + len(start_marker):end_idx].strip()
-
-                    # Extracting the actual outcome from the output
-                    match = re.search(r"is\s+(\w+)", pat_result, re.IGNORECASE)
-                    actual_outcome = ""
-                    if match and match.group(1):
-                        word = match.group(1).upper()
-                        if word == "VALID":
-                            actual_outcome = "Valid"
+                    try:
+                        with open(input_file, 'w', encoding='utf-8') as f:
+                            f.write(code_blocks[i])
+                    except Exception as e:
+                        yield json.dumps({'error': f'Failed to save file: {str(e)}'}) + '\n'
+                        return
+
+                    try:
+                        # Reuse the cached PAT output if this block has been verified before
+                        key = cache_key(code_blocks[i], None, pat_version)
+                        output = cache_get(cache_dir, key) if PAT_CACHE_ENABLED else None
+                        if output is not None:
+                            with open(output_file, 'w', encoding='utf-8') as f:
+                                f.write(output)
                         else:
-                            actual_outcome = "Invalid"
-
-                    # Extract the assertion line from the code block
-                    assertion_line = ""
-                    for line in code_blocks[i].splitlines():
-                        if line.strip().startswith("#assert"):
-                            assertion_line = line.strip()
-                            break
-
-                    result = {
-                        'index': i,
-                        'assertion': assertion_line,
-                        'patResult': pat_result,
-                        'actualResult': actual_outcome
-                    }
-                    yield json.dumps(result) + '\n'
-
-                except subprocess.TimeoutExpired:
-                    print(f"PAT execution timed out for assertion {i}")
-                    yield json.dumps({'status': 'timeout', 'index': i}) + '\n'
-                    return
-                except subprocess.CalledProcessError as e:
-                    yield json.dumps({'error': f'PAT execution failed: {str(e)}'}) + '\n'
-                    return
-                except FileNotFoundError:
-                    yield json.dumps({'error': 'Output file not found'}) + '\n'
-                    return
+                            job_status = run_verifications(root_path, [(input_file, output_file, None)])[0]
+                            if job_status['status'] == 'timeout':
+                                print(f"PAT execution timed out for assertion {i}")
+                                yield json.dumps({'status': 'timeout', 'index': i}) + '\n'
+                                return
+                            if job_status['status'] != 'ok':
+                                yield json.dumps({'error': f"PAT execution failed: {job_status['error']}"}) + '\n'
+                                return
+                            with open(output_file, 'r', encoding='utf-8') as f:
+                                output = f.read()
+                            if PAT_CACHE_ENABLED:
+                                cache_put(cache_dir, key, output, None, pat_version)
+                    
+                        # process pat output
+                        pat_output = parse_assertion_output(output)
+
+                        # Extract the assertion line from the code block
+                        assertion_line = ""
+                        for line in code_blocks[i].splitlines():
+                            if line.strip().startswith("#assert"):
+                                assertion_line = line.strip()
+                                break
+
+                        result = {
+                            'index': i,
+                            'assertion': assertion_line,
+                            'patResult': pat_output.result_text or "",
+                            'actualResult': pat_output.verdict,
+                            'trace': pat_output.trace,
+                            'engine': pat_output.engine,
+                            'statistics': pat_output.statistics
+                        }
+                        yield json.dumps(result) + '\n'
+
+                    except FileNotFoundError:
+                        yield json.dumps({'error': 'Output file not found'}) + '\n'
+                        return
 
         return app.response_class(generate(), mimetype='text/event-stream')
 
@@ -722,27 +857,19 @@ def get_most_relevant_example():
     try:
         data = request.get_json()
         instruction = data["instruction"]
+        k = int(data.get("k", 1))
 
-        with open('./database-rag-claude.json', 'r') as f:
-            database = json.load(f)
-        
-        nls = [entry["nl"] for entry in database if entry.get("nl")]
-        if not nls:
+        # 计算 instruction 与每个 nl 的余弦相似度 (persistent TF-IDF index, rebuilt when the database changes)
+        matches = rag_index.search('./database-rag-claude.json', instruction, k=k)
+        if not matches:
             return jsonify({'error': 'No valid NL entries in database'}), 500
-        
-        
-        vectorizer = TfidfVectorizer().fit(nls + [instruction])
-        vectors = vectorizer.transform(nls + [instruction])
-        
-         # 计算 instruction 与每个 nl 的余弦相似度
-        similarity_scores = cosine_similarity(vectors[-1], vectors[:-1])[0]
-        most_similar_idx = similarity_scores.argmax()
 
-        # 返回最相似的一条 nl 和 code
-        matched_entry = database[most_similar_idx]
+        # 返回最相似的一条 nl 和 code, and the top k matches with their scores
         return jsonify({
-            'nl': matched_entry["nl"],
-            'code': matched_entry["code"]
+            'nl': matches[0]["nl"],
+            'code': matches[0]["code"],
+            'score': matches[0]["score"],
+            'matches': matches
         })
 
     except Exception as e:
@@ -750,71 +877,46 @@ def get_most_relevant_example():
     
 
 
-def split_code_and_assertions(code):
-    # Match any number of `#define…\n` lines, then one `#assert…;?`
-    pat = re.compile(
-        r'(?m)'                   # multiline mode
-        r'(?:'                    # start group for repeated #defines
-            r'^(?!\s*//)\s*'        # ── must be at line start, not // comment
-            r'#define[^\n]*\n'      # ── a real #define line
-        r')*'                     # repeat zero or more times
-        r'^(?!\s*//)\s*'          # ── now for the #assert line…
-        r'#assert[^\n]*;?'        # ── a real #assert
-        )
-    # body = everything except those define/assert pairs
-    body = pat.sub('', code).strip()
-    # capture each define+assert block
-    blocks = pat.findall(code)
-    defs, asserts = [], []
-    for blk in blocks:
-        lines = blk.splitlines()
-        # if it starts with a define, collect it
-        for line in lines[:-1]:
-            if line.startswith('#define'):
-                defs.append(line)
-        # the last line is always the #assert
-        asserts.append(lines[-1])
-    # dedupe while preserving order
-    seen = set()
-    uniq_defs = [d for d in defs if not (d in seen or seen.add(d))]
-    # build one output per assertion
-    return [
-        body + '\n\n' + '\n'.join(uniq_defs + [a])
-        for a in asserts
-    ]
+@app.route("/add_rag_example", methods=["POST"])
+def add_rag_example():
+    """
+    Add a verified <NL, Code> pair to database-rag-claude.json and to its retrieval index.
+    """
+    try:
+        data = request.get_json()
+        nl = data.get("nl", "").strip()
+        code = data.get("code", "").strip()
+        if not nl or not code:
+            return jsonify({'error': 'Both nl and code are required'}), 400
+        rag_index.add_examples('./database-rag-claude.json', [{"nl": nl, "code": code}])
+        return jsonify({'message': 'Example added'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 
 @app.route("/save_run_time", methods=["POST"])
 def save_run_time():
+    """
+    Stage times measured by the front-end, recorded as spans (tracing.py) of the model.
+    `stage` keeps the run_time_record key format, e.g. 'codegen-time_<timestamp>' or 'refine-time_<round>_<timestamp>'.
+    """
     data = request.get_json()
     model_name = data.get("modelName", "")
     stage = data.get("stage", "")
     run_time = data.get("runTime", "")
     hasMismatch = data.get("hasMismatch", None)  # <-- default to None
 
-    run_time_record_path = f'./run_time_record/{model_name}.json'
-
-    # Make sure the directory exists
-    os.makedirs('./run_time_record', exist_ok=True)
-
     try:
-        with open(run_time_record_path, 'r') as file:
-            run_time_data = json.load(file)
-    except FileNotFoundError:
-        print("File not found. Creating a new one.")
-        run_time_data = {}
-
-    # Create the data to save
-    save_content = {"runTime": run_time}
+        run_time = float(run_time)
+    except (TypeError, ValueError):
+        return jsonify({'error': f"Invalid runTime: {run_time}"}), 400
 
+    name, kind, attributes = tracing.legacy_stage(stage)
     if hasMismatch is not None and hasMismatch != "":
-        save_content["hasMismatch"] = hasMismatch
-
-    # Update the dictionary
-    run_time_data[stage] = save_content
-
-    # Save back to file
-    with open(run_time_record_path, 'w') as file:
-        json.dump(run_time_data, file, indent=4)
+        attributes["hasMismatch"] = hasMismatch
+    tracing.record_model_span(
+        model_name, name, kind, run_time, trace_dir=workspaces.current().trace_dir(), source='interface', **attributes
+    )
 
     return {"message": "Run time saved successfully."}
 
@@ -825,13 +927,9 @@ def process_assertions():
         data = request.get_json()
         # print("data:", data)
 
-        response = load_const_history()
-        # print("response:", response)
-        # print("response type:", type(response))
-        history = response
-        # print("history:", history)
-        if history and len(history) > 0:
-            latestEntry = history[-1]
+        latestEntry = workspaces.current().latest(const_history_path)
+        # print("latestEntry:", latestEntry)
+        if latestEntry is not None:
             ctx = latestEntry["context"]               # grab the nested dict
             modelName    = ctx["modelName"]            # dict indexing
         else:
@@ -967,7 +1065,7 @@ def get_verification_data():
         
         # Define the root and base directory for the PAT files.
         root_path = "path_to_your_root_directory"  # Adjust this path as needed
-        base_dir = os.path.join(root_path, "PAT.Console", "Process-Analysis-Toolkit", "PATfiles", model_name)
+        base_dir = workspaces.current().pat_dir(root_path, model_name)
         
         # List all .csp files in the base directory.
         csp_files = [f for f in os.listdir(base_dir) if f.endswith(".csp")]
@@ -977,10 +1075,8 @@ def get_verification_data():
         # Try to load the desired outcomes from assertion-history.json.
         desired_assertions = []
         try:
-            with open("./history/assertion-history.json", "r", encoding="utf-8") as f:
-                history = json.load(f)
-            # Assume history is an array; take the last entry.
-            last_entry = history[-1]
+            # Take the last entry of the history.
+            last_entry = workspaces.current().latest('assertion-history.json')
             # The answerGPT is assumed to be a JSON string containing a key "assertions"
             answer_gpt_dict = last_entry.get("answerGPT", {})
             desired_assertions = answer_gpt_dict.get("assertions", [])
@@ -1007,27 +1103,13 @@ def get_verification_data():
                     assertion_line = line.strip()
                     break
             
-            # 2. Extract the PAT verification result from the .txt file.
-            pat_result = ""
+            # 2. Parse the PAT verification result, trace and statistics from the .txt file.
+            pat_output = PatResult()
             if os.path.exists(txt_path):
-                with open(txt_path, "r", encoding="utf-8") as f:
-                    txt_content = f.read()
-                start_marker = "********Verification Result********"
-                end_marker = "********Verification Setting********"
-                start_idx = txt_content.find(start_marker)
-                end_idx = txt_content.find(end_marker)
-                if start_idx != -1 and end_idx != -1:
-                    pat_result = txt_content[start_idx + len(start_marker):end_idx].strip()
+                pat_output = (parse_file(txt_path) or [pat_output])[0]
             
-            # 3. Compute the actual outcome from the PAT result.
-            actual_outcome = ""
-            match = re.search(r"is\s+(\w+)", pat_result, re.IGNORECASE)
-            if match and match.group(1):
-                word = match.group(1).upper()
-                if word == "VALID":
-                    actual_outcome = "Valid"
-                else:
-                    actual_outcome = "Invalid"
+            # 3. The actual outcome is the verdict of the PAT result.
+            actual_outcome = pat_output.verdict
             
             # 4. Retrieve the desired outcome from the desired assertions.
             desired_outcome = "Valid"
@@ -1039,9 +1121,12 @@ def get_verification_data():
             
             verification_groups.append({
                 "assertion": assertion_line,
-                "patResult": pat_result,
+                "patResult": pat_output.result_text or "",
                 "desiredOutcome": desired_outcome,
-                "actualResult": actual_outcome
+                "actualResult": actual_outcome,
+                "trace": pat_output.trace,
+                "engine": pat_output.engine,
+                "statistics": pat_output.statistics
             })
         
         return jsonify(verification_groups)
@@ -1051,13 +1136,10 @@ def get_verification_data():
     
 @app.route("/get_last_claude_refinement", methods=["GET"])
 def get_last_claude_refinement():
-    filename = "./history/claude-refinement.json"
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            refinement_data = json.load(f)
-        if not refinement_data:
+        last_entry = workspaces.current().latest('claude-refinement.json')
+        if last_entry is None:
             return jsonify({"error": "No refinement data available"}), 404
-        last_entry = refinement_data[-1]
         # Return the code from the last record
         return jsonify({"data": {"answerClaude": last_entry.get("answerClaude", "")}})
     except Exception as e:
@@ -1085,7 +1167,7 @@ def save_verified_code():
         return jsonify({"error": "No code provided"}), 400
 
     root_path = "path_to_your_root_directory"  # Adjust this path as needed
-    folder = os.path.join(root_path, "PAT.Console", "Process-Analysis-Toolkit", "PATfiles", model_name)
+    folder = workspaces.current().pat_dir(root_path, model_name)
     # Ensure the target folder exists.
     os.makedirs(folder, exist_ok=True)
     file_path = os.path.join(folder, "verifiedCode.csp")
@@ -1110,8 +1192,9 @@ def save_mismatch_traces():
     """
     data = request.get_json()
     mismatches = data.get("mismatches", [])
-    filename = "./history/mismatch_traces.json"
+    filename = workspaces.current().history_path('mismatch_traces.json')
     try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(mismatches, f, indent=2)
         return jsonify({"status": "success"})
@@ -1120,7 +1203,7 @@ def save_mismatch_traces():
     
 @app.route("/get_mismatch_traces", methods=["GET"])
 def get_mismatch_traces():
-    filename = "./history/mismatch_traces.json"
+    filename = workspaces.current().history_path('mismatch_traces.json')
     try:
         with open(filename, "r", encoding="utf-8") as f:
             mismatches = json.load(f)
@@ -1186,13 +1269,24 @@ def process_traces():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def with_parameters(algo):
+    """
+    Entry of database-algorithm.json with the parameters of its generator in rules_classical_algos.py:
+    "parameters" (schema) and "variable" (text shown to the user, empty if the implementation is fixed).
+    """
+    return {
+        **algo,
+        "parameters": parameter_schema(algo.get("id")),
+        "variable": describe_parameters(algo.get("id"))
+    }
+
 @app.route("/get_classical_algorithms", methods=["GET"])
 def get_classical_algorithms():
     filename = "database-algorithm.json"
     try:
         with open(filename, "r", encoding="utf-8") as f:
             data = json.load(f)
-        return jsonify({"status": "success", "data": data})
+        return jsonify({"status": "success", "data": [with_parameters(algo) for algo in data]})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -1205,7 +1299,7 @@ def get_classical_algorithm_details():
             algorithms = json.load(f)
         for algo in algorithms:
             if algo.get("id") == algorithm_id:
-                return jsonify({"status": "success", "data": algo})
+                return jsonify({"status": "success", "data": with_parameters(algo)})
         return jsonify({"status": "error", "message": "Algorithm not found"}), 404
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -1215,10 +1309,35 @@ def process_algos():
     data = request.get_json()
     algo_id = data.get("id", "")
     var_value = data.get("value", "")
-    processed_code = process_classical_algos(algo_id, var_value)
+    try:
+        processed_code = process_classical_algos(algo_id, var_value)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     
     return jsonify({"status": "success", "processed_code": processed_code})
 
+@app.route("/sweep_classical_algos", methods=["POST"])
+def sweep_classical_algos():
+    """
+    Generate and verify a classical algorithm over ranges of its parameters (see sweep.py).
+    Body: {"id": "peterson", "specs": ["2..8"]}, one spec per parameter. Returns one row of PAT statistics per instance.
+    """
+    data = request.get_json()
+    algo_id = data.get("id", "")
+    specs = data.get("specs", [])
+    if isinstance(specs, str):
+        specs = specs.split()
+    root_path = "path_to_your_root_directory"  # Adjust this path as needed
+    sweep_dir = workspaces.current().pat_dir(root_path, f"sweep_{algo_id}")
+    try:
+        with _folder_lock(sweep_dir):
+            rows = run_sweep(root_path, algo_id, specs, sweep_dir=sweep_dir)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "success", "rows": rows})
+
 @app.route("/add_new_classical_algorithm", methods=["POST"])
 def add_new_classical_algorithm():
     """
@@ -1238,9 +1357,11 @@ def add_new_classical_algorithm():
         # 1) Ask Claude for a description from the code
         description = get_description_from_claude(code)
         
-        # 2) Ask GPT-o3 for an ID and name from the description
-        new_id = get_id_from_gpt_o3(description)
-        new_name = get_name_from_gpt_o3(description)
+        # 2) Ask GPT-o3 for an ID and name from the description (independent, so sent concurrently)
+        new_id, new_name = llm_client.run_all([get_id_from_gpt_o3(description), get_name_from_gpt_o3(description)])
+        for result in (new_id, new_name):
+            if isinstance(result, Exception):
+                raise result
         
         # 3) Clean up the ID (remove spaces, punctuation, etc.)
         new_id = "".join(ch for ch in new_id if ch.isalnum() or ch == '_').lower()
@@ -1251,7 +1372,6 @@ def add_new_classical_algorithm():
             "name": new_name,
             "matchtype": "exact match",
             "description": description,
-            "variable": "",
             "implementation": code
         }
         add_to_database_algorithm(new_entry)
@@ -1265,34 +1385,41 @@ def get_description_from_claude(code):
     response = call_claude_model(prompt)
     return response.strip()
 
-def get_id_from_gpt_o3(description):
+async def get_id_from_gpt_o3(description):
     prompt = f"Based on this description, create an id for the model, note, the id **MUST FOLLOW THE FORMAT like 'car_owner_key_door_motor' to be a single connected string**, **DO NOT INCLUDE ANY WORDS OTHER THAN THE ID**\n{description}"
-    response = call_gpt_o3_model(prompt)
+    response = await call_gpt_o3_model(prompt)
     return response.strip()
 
-def get_name_from_gpt_o3(description):
+async def get_name_from_gpt_o3(description):
     prompt = f"Based on this description, create a name for the model, note, the name should be a few words describing the model, ideally capturing the number of components, **DO NOT INCLUDE ANY WORDS OTHER THAN THE NAME**:\n{description}"
-    response = call_gpt_o3_model(prompt)
+    response = await call_gpt_o3_model(prompt)
     return response.strip()
 
+# database-algorithm.json is shared by all sessions
+_database_lock = threading.Lock()
+
 def add_to_database_algorithm(new_entry):
     """
     Append the new entry to database-algorithm.json
     """
     filename = "database-algorithm.json"
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-    
-    data.append(new_entry)
-    
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    with _database_lock:
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = []
+        
+        data.append(new_entry)
+        
+        # Written whole and then renamed, so readers never see a partial file
+        tmp_path = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, filename)
 
 def call_claude_model(prompt):
-    response = client_claude.messages.create(
+    response = llm_client.run(llm_client.claude_messages(
         model="claude-3-7-sonnet-20250219",  # or update to a newer version if available
         max_tokens = 1024,
         messages=[
@@ -1301,11 +1428,11 @@ def call_claude_model(prompt):
                 "content": prompt
             }
         ]
-    )
+    ))
     return response.content[0].text
 
-def call_gpt_o3_model(prompt):
-    completion = client.chat.completions.create(
+async def call_gpt_o3_model(prompt):
+    completion = await llm_client.openai_chat(
         model="o3-mini-2025-01-31",
         messages=[
             {
@@ -1324,8 +1451,7 @@ def delMsg():
 
     if index is not None and 0 <= index < len(msg_history):
         del msg_history[index]
-        with open(msg_history_path, 'w') as file:
-            json.dump(msg_history, file)
+        workspaces.current().rewrite(msg_history_path, msg_history)
         return jsonify(msg_history)
     else:
         return jsonify({"error": "Invalid index"}), 400
@@ -1366,27 +1492,15 @@ def save_modified_const():
             "processes": modified_data
         }
         
-        # Load existing history
-        history_file = './history/const-history.json'
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        else:
-            history = []
-            
         # Get the last entry from history
-        if history:
-            last_entry = history[-1].copy()  # Create a copy of the last entry
+        last_entry = workspaces.current().latest(const_history_path)
+        if last_entry is not None:
             # Update only the answerGPT part with the formatted data
             last_entry['answerGPT'] = json.dumps(formatted_data)
             last_entry['timestamp'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Append the new entry to history
-            history.append(last_entry)
-            
-            # Save back to file
-            with open(history_file, 'w') as f:
-                json.dump(history, f, indent=2)
+            workspaces.current().append(const_history_path, last_entry)
                 
             return jsonify({"status": "success", "message": "Constants updated successfully"})
         else:
@@ -0,0 +1,231 @@
+###### Parameter sweep of the classical algorithms
+# Generates every instance of a classical algorithm (rules_classical_algos.py) over ranges of its parameters,
+# verifies all of them at once on the PAT worker pool and collects PAT's verification statistics per instance,
+# to find where the state space of a model blows up.
+# One spec per parameter of the algorithm, in order: a value ("tau"), a range ("2..8", "2..10..2" with a step)
+# or a list ("tau,explicit"). Every combination of the specs is one instance.
+# Usage:
+#   python sweep.py peterson 2..8 --root-path path_to_your_root_directory
+#   python sweep.py concurrent_stack 2..4 1..3 tau,explicit [--workers 4] [--timeout 600] [--output stack.csv]
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+import itertools
+
+# The PAT modules (pat_runner, pat_output, pat_cache) are shared with the automated pipelines, in ../Shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Shared'))
+
+from rules_classical_algos import get_generator, process_classical_algos
+from pat_runner import run_verifications, split_code_and_assertions
+from pat_output import parse_assertion_output
+from pat_cache import PAT_CACHE_ENABLED, cache_get, cache_key, cache_put, get_cache_dir, get_pat_version, is_cacheable
+
+# Refuse sweeps with more instances than this (the specs multiply)
+SWEEP_MAX_INSTANCES = int(os.environ.get("SWEEP_MAX_INSTANCES", 200))
+
+COLUMNS = ('parameters', 'status', 'assertions', 'valid', 'visitedStates', 'totalTransitions', 'timeUsed', 'memoryKB', 'growth')
+
+
+def expand_spec(param, spec):
+    """
+    Values of `param` described by `spec`: "3", "2..8", "2..10..2" or "tau,explicit".
+    """
+    spec = str(spec).strip()
+    match = re.fullmatch(r'(-?\d+)\s*\.\.\s*(-?\d+)(?:\s*\.\.\s*(\d+))?', spec)
+    if match:
+        start, stop = int(match.group(1)), int(match.group(2))
+        step = int(match.group(3) or 1)
+        if step < 1 or stop < start:
+            raise ValueError(f"Invalid range '{spec}' for {param.name}")
+        texts = [str(value) for value in range(start, stop + 1, step)]
+    else:
+        texts = [text for text in re.split(r'[,\s]+', spec) if text]
+    values = []
+    for text in texts:
+        value = param.parse(text)
+        if value is None:
+            raise ValueError(f"'{text}' is not a valid value for {param.describe()}")
+        values.append(value)
+    return values
+
+
+def sweep_instances(algo_id, specs):
+    """
+    Parameter tuples of all instances of the sweep, in sweep order (the last parameter varies fastest).
+    """
+    params = get_generator(algo_id).params
+    if len(specs) != len(params):
+        expected = ", ".join(param.describe() for param in params)
+        raise ValueError(f"{algo_id} takes {len(params)} parameter spec(s): {expected}")
+    instances = list(itertools.product(*[expand_spec(param, spec) for param, spec in zip(params, specs)]))
+    if len(instances) > SWEEP_MAX_INSTANCES:
+        raise ValueError(f"The sweep has {len(instances)} instances, more than SWEEP_MAX_INSTANCES ({SWEEP_MAX_INSTANCES})")
+    return instances
+
+
+def _summarize(values, assertions):
+    """
+    One table row per instance: the largest state space and memory of its assertions, and their total time.
+    """
+    finished = [assertion for assertion in assertions if assertion['status'] == 'ok']
+    if not assertions:
+        status = 'no assertions'
+    elif len(finished) == len(assertions):
+        status = 'ok'
+    else:
+        status = next(assertion['status'] for assertion in assertions if assertion['status'] != 'ok')
+
+    def largest(name):
+        numbers = [assertion[name] for assertion in finished if assertion[name] is not None]
+        return max(numbers) if numbers else None
+
+    times = [assertion['timeUsed'] for assertion in finished if assertion['timeUsed'] is not None]
+    return {
+        'parameters': values,
+        'status': status,
+        'assertions': len(assertions),
+        'valid': sum(assertion['result'] == 'Valid' for assertion in finished),
+        'visitedStates': largest('visitedStates'),
+        'totalTransitions': largest('totalTransitions'),
+        'timeUsed': sum(times) if times else None,
+        'memoryKB': largest('memoryKB'),
+        'details': assertions
+    }
+
+
+def run_sweep(root_path, algo_id, specs, max_workers=None, timeout=None, sweep_dir=None):
+    """
+    Generate and verify every instance of the sweep. Returns one row per instance (see COLUMNS), in sweep order;
+    'growth' is the ratio of its visited states to those of the previous instance.
+    All assertions of all instances are queued together, so they run in parallel up to the PAT worker limit.
+    The files of each instance go to a folder of `sweep_dir` (default: PATfiles/sweep_<algo_id> under PAT).
+    """
+    params = get_generator(algo_id).params
+    instances = sweep_instances(algo_id, specs)
+    cache_dir = get_cache_dir(root_path)
+    pat_version = get_pat_version(root_path)
+    if sweep_dir is None:
+        sweep_dir = f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PATfiles/sweep_{algo_id}"
+
+    # (instance, assertion) -> cached output or pending job
+    outputs = {}
+    pending = []
+    blocks_per_instance = []
+    for n, values in enumerate(instances):
+        code = process_classical_algos(algo_id, " ".join(str(value) for value in values))
+        blocks = split_code_and_assertions(code)
+        blocks_per_instance.append(blocks)
+        folder_path = os.path.join(sweep_dir, "_".join(str(value) for value in values))
+        os.makedirs(folder_path, exist_ok=True)
+        for i, block in enumerate(blocks):
+            key = cache_key(block, None, pat_version)
+            output = cache_get(cache_dir, key) if PAT_CACHE_ENABLED else None
+            if output is not None:
+                outputs[(n, i)] = (output, {'status': 'ok', 'error': ''}, True)
+                continue
+            input_file = f"{folder_path}/{i}.csp"
+            output_file = f"{folder_path}/pat_output_{i}.txt"
+            with open(input_file, 'w', encoding='utf-8') as f:
+                f.write(block)
+            pending.append(((n, i), key, input_file, output_file))
+
+    job_statuses = run_verifications(
+        root_path, [(input_file, output_file, None) for _, _, input_file, output_file in pending],
+        max_workers=max_workers, timeout=timeout
+    )
+    for ((n, i), key, _, output_file), job_status in zip(pending, job_statuses):
+        output = ""
+        if job_status['status'] == 'ok':
+            try:
+                with open(output_file, 'r', encoding='utf-8') as f:
+                    output = f.read()
+            except FileNotFoundError:
+                job_status = {'status': 'failed', 'error': 'Output file not found'}
+        if PAT_CACHE_ENABLED and job_status['status'] == 'ok' and is_cacheable(output):
+            cache_put(cache_dir, key, output, None, pat_version)
+        outputs[(n, i)] = (output, job_status, False)
+
+    rows = []
+    previous_states = None
+    for n, values in enumerate(instances):
+        assertions = []
+        for i, block in enumerate(blocks_per_instance[n]):
+            output, job_status, cached = outputs[(n, i)]
+            assertion_line = next((line.strip() for line in block.splitlines() if line.strip().startswith("#assert")), "")
+            pat_output = parse_assertion_output(output)
+            assertions.append({
+                'assertion': assertion_line,
+                'status': job_status['status'],
+                'error': job_status['error'],
+                'cached': cached,
+                'result': pat_output.verdict,
+                'engine': pat_output.engine,
+                **pat_output.statistics
+            })
+        row = _summarize(dict(zip([param.name for param in params], values)), assertions)
+        states = row['visitedStates']
+        row['growth'] = states / previous_states if states and previous_states else None
+        previous_states = states
+        rows.append(row)
+    return rows
+
+
+def _cell(row, column):
+    value = row[column]
+    if column == 'parameters':
+        return " ".join(f"{name}={parameter}" for name, parameter in value.items())
+    if value is None:
+        return "-"
+    if column == 'timeUsed':
+        return f"{value:.3f}"
+    if column in ('memoryKB', 'growth'):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def format_table(rows):
+    cells = [[_cell(row, column) for column in COLUMNS] for row in rows]
+    widths = [max([len(column)] + [len(line[k]) for line in cells]) for k, column in enumerate(COLUMNS)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(COLUMNS, widths))]
+    for line in cells:
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(line, widths)))
+    return "\n".join(lines)
+
+
+def save_rows(rows, path):
+    """
+    .csv: the table, one parameter per column. Anything else: JSON, including the per-assertion details.
+    """
+    if path.endswith('.csv'):
+        parameter_names = list(rows[0]['parameters']) if rows else []
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(parameter_names + list(COLUMNS[1:]))
+            for row in rows:
+                writer.writerow([row['parameters'][name] for name in parameter_names] + [row[column] for column in COLUMNS[1:]])
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate and verify a classical algorithm over ranges of its parameters")
+    parser.add_argument('algo_id')
+    parser.add_argument('specs', nargs='+', help="one per parameter: a value, a range 2..8[..step] or a list a,b")
+    parser.add_argument('--root-path', default="path_to_your_root_directory")
+    parser.add_argument('--workers', type=int, default=None, help="PAT processes at once (default: PAT_MAX_WORKERS)")
+    parser.add_argument('--timeout', type=int, default=None, help="seconds per assertion (default: PAT_JOB_TIMEOUT)")
+    parser.add_argument('--output', default=None, help="save the results as .csv or .json")
+    args = parser.parse_args()
+
+    try:
+        rows = run_sweep(args.root_path, args.algo_id, args.specs, max_workers=args.workers, timeout=args.timeout)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(format_table(rows))
+    if args.output:
+        save_rows(rows, args.output)
+        print(f"Results saved to {args.output}")
@@ -10,6 +10,7 @@
  * - text: The text to display (default: "Loading...")
  * - showDots: Whether to show the animated dots (default: true)
  * - showWaitText: Whether to show "Please wait a moment" (default: true)
+ * - preview: Text shown below, e.g. an answer while it is streamed (default: none)
  */
 
 (function() {
@@ -24,6 +25,7 @@
           <div class="loader-dot"></div>
         </div>
         <div v-if="showWaitText" class="wait-text">Please wait</div>
+        <pre v-if="preview" class="loading-preview">{{ preview }}</pre>
       </div>
     </div>
   `;
@@ -105,6 +107,19 @@
       }
     }
 
+    .loading-preview {
+      max-width: 70vw;
+      max-height: 40vh;
+      overflow: auto;
+      margin: 15px 0 0;
+      padding: 10px;
+      font-size: 12px;
+      text-align: left;
+      white-space: pre-wrap;
+      background: rgba(0, 0, 0, 0.3);
+      border-radius: 8px;
+    }
+
     .wait-text {
       opacity: 0.8;
       font-size: 0.9em;
@@ -137,6 +152,10 @@
       showWaitText: {
         type: Boolean,
         default: true
+      },
+      preview: {
+        type: String,
+        default: ''
       }
     }
   });
@@ -141,23 +141,34 @@ Note that some actions **may not have any conditions or state changes**. In such
 Please ensure your response is a valid JSON string that can be parsed directly.`;
 }
 
-function genCodePrompt(general_info, pitfalls_rules, retrieved, system_description, nlInstruction){
-  return `You are an expert in PAT (Process Analysis Toolkit), and you already possess a strong understanding of PAT concepts as outlined in the documentation. As a reminder, here are a few key guidelines:
+// The code generation prompt as parts ({ text, cache }): the PAT guidelines and the retrieved example are the same
+// from one request to the next, so they are marked for Claude's prompt caching; the system annotation is not.
+function genCodePromptParts(general_info, pitfalls_rules, retrieved, system_description, nlInstruction){
+  return [
+    { text: `You are an expert in PAT (Process Analysis Toolkit), and you already possess a strong understanding of PAT concepts as outlined in the documentation. As a reminder, here are a few key guidelines:
 --- Quick Reference ---
 General Information: ${general_info}
 
 Pitfalls and Syntax Guidelines: ${pitfalls_rules}
 
-Your task is to generate the PAT code given the corresponding natural language annotation for the system.
+`, cache: true },
+    { text: `Your task is to generate the PAT code given the corresponding natural language annotation for the system.
 ### Example:
 **Input NL Annotation:** ${retrieved.nl}
 **Expected Output:** ${retrieved.code}
 
-Given the general system description: ${system_description}, now generate the PAT code corresponding to the **following system annotation**. Refer to the system description **only** if explicitly guided in the annotation, or if there is a contradiction between the annotation and the description.
+`, cache: true },
+    { text: `Given the general system description: ${system_description}, now generate the PAT code corresponding to the **following system annotation**. Refer to the system description **only** if explicitly guided in the annotation, or if there is a contradiction between the annotation and the description.
 
 ### System Annotation:\n${nlInstruction}
 \nThe PAT code should be:
-### Response:`;
+### Response:`, cache: false }
+  ];
+}
+
+function genCodePrompt(general_info, pitfalls_rules, retrieved, system_description, nlInstruction){
+  return genCodePromptParts(general_info, pitfalls_rules, retrieved, system_description, nlInstruction)
+    .map(part => part.text).join('');
 }
 
 
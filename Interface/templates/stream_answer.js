@@ -0,0 +1,43 @@
+// Ask an LLM-backed endpoint (/get_code_model_answers_claude, /get_planning_model_answers, /get_chatbot_model_answers)
+// for a streamed answer: onText(delta, answerSoFar) is called for every piece of the answer as it arrives.
+// Resolves to what the endpoint returns without streaming ({ status, data }), plus the time to the first token
+// (ttft) and the total time in seconds, once the server has saved the answer.
+async function streamModelAnswer(url, body, onText) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({ model_name: localStorage.getItem('modelName') }, body, { stream: true }))
+    });
+    if (!response.ok) {
+        const failed = await response.json();
+        throw new Error(failed.error || `Request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            throw new Error('The answer stream ended early');
+        }
+        buffer += decoder.decode(value, { stream: true });
+        // Server-sent events are separated by a blank line
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const lines = buffer.slice(0, end).split('\n');
+            buffer = buffer.slice(end + 2);
+            const event = (lines.find(line => line.startsWith('event: ')) || 'event: message').slice('event: '.length);
+            const data = JSON.parse(lines.filter(line => line.startsWith('data: ')).map(line => line.slice(6)).join('\n'));
+            if (event === 'error') {
+                throw new Error(data.error);
+            }
+            if (event === 'done') {
+                return data;
+            }
+            answer += data.text;
+            onText && onText(data.text, answer);
+        }
+    }
+}
@@ -0,0 +1,34 @@
+// Verify PAT code as a job on the server (see verify_jobs.py): submit it, then poll the job until it is finished.
+// onResult, if given, is called with the result of every assertion as soon as PAT is done with it.
+// Resolves to the same { output, anyEmpty } as the synchronous /verify_pat_code.
+const VERIFY_JOB_POLL_MS = 500;
+
+async function verifyPatCode(body, onResult) {
+    const response = await fetch('/verify_pat_code', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({}, body, { async: true }))
+    });
+    const submitted = await response.json();
+    if (!response.ok) {
+        throw new Error(submitted.error || `Verification could not be queued (${response.status})`);
+    }
+
+    let since = 0;
+    while (true) {
+        const poll = await fetch(`/verify_jobs/${submitted.jobId}?since=${since}`);
+        const job = await poll.json();
+        if (!poll.ok) {
+            throw new Error(job.error || `Verification job lost (${poll.status})`);
+        }
+        job.results.forEach(result => onResult && onResult(result));
+        since += job.results.length;
+        if (job.status === 'failed') {
+            throw new Error(job.error);
+        }
+        if (job.status === 'done' || job.status === 'cancelled') {
+            return { output: job.output, anyEmpty: job.anyEmpty, jobId: job.jobId, status: job.status };
+        }
+        await new Promise(resolve => setTimeout(resolve, VERIFY_JOB_POLL_MS));
+    }
+}
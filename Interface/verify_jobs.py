@@ -0,0 +1,206 @@
+###### Verification job queue of the Interface server
+# A verification runs as a job on a bounded pool of VERIFY_JOB_WORKERS threads instead of in the request that asked
+# for it: the request gets a job id at once, and the job keeps running (and saving its PAT outputs) even if the
+# client goes away. Each assertion's result is added to the job as soon as PAT is done with it, so clients can
+# follow a job by polling (GET /verify_jobs/<id>?since=<n>) or as server-sent events (GET /verify_jobs/<id>/events),
+# and cancel it (POST /verify_jobs/<id>/cancel), which kills its running PAT process.
+# Queue depth, running jobs and worker utilisation, to size the pool: GET /verify_jobs/stats
+# At most VERIFY_JOB_QUEUE_MAX jobs wait for a worker; finished jobs are kept for VERIFY_JOB_RETENTION seconds.
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pat_runner import PAT_MAX_WORKERS
+
+VERIFY_JOB_WORKERS = int(os.environ.get("VERIFY_JOB_WORKERS", PAT_MAX_WORKERS))
+VERIFY_JOB_QUEUE_MAX = int(os.environ.get("VERIFY_JOB_QUEUE_MAX", 64))
+VERIFY_JOB_RETENTION = float(os.environ.get("VERIFY_JOB_RETENTION", 3600))
+
+FINISHED = ('done', 'failed', 'cancelled')
+# Wait and run times of the most recent jobs, for the stats
+_RECENT_JOBS = 100
+
+
+class QueueFull(Exception):
+    pass
+
+
+class VerificationJob:
+    """
+    One verification: its status ('queued', 'running', then 'done', 'failed' or 'cancelled'), the results of the
+    assertions verified so far, and when it was queued, started and finished.
+    """
+
+    def __init__(self, session_id, model_name, total):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.model_name = model_name
+        self.total = total
+        self.status = 'queued'
+        self.results = []
+        self.output = ""
+        self.any_empty = False
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self._changed = threading.Condition()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def add_result(self, result):
+        with self._changed:
+            self.results.append(result)
+            self._changed.notify_all()
+
+    def _set_status(self, status, error=None):
+        with self._changed:
+            self.status = status
+            if error is not None:
+                self.error = error
+            if status == 'running':
+                self.started = time.time()
+            elif status in FINISHED:
+                self.finished = time.time()
+            self._changed.notify_all()
+
+    def wait(self, since, timeout):
+        """
+        Wait until the job has more than `since` results or is finished, at most `timeout` seconds.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.results) > since or self.status in FINISHED, timeout)
+
+    def join(self, timeout=None):
+        """
+        Wait until the job is finished, at most `timeout` seconds. Returns whether it is.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.status in FINISHED, timeout)
+
+    def snapshot(self, since=0):
+        with self._changed:
+            return {
+                'jobId': self.id,
+                'modelName': self.model_name,
+                'status': self.status,
+                'total': self.total,
+                'completed': len(self.results),
+                'results': self.results[since:],
+                'since': since,
+                'output': self.output,
+                'anyEmpty': self.any_empty,
+                'error': self.error,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished
+            }
+
+
+class JobQueue:
+    def __init__(self, workers=None, max_queued=None, retention=None):
+        self.workers = workers or VERIFY_JOB_WORKERS
+        self.max_queued = VERIFY_JOB_QUEUE_MAX if max_queued is None else max_queued
+        self.retention = VERIFY_JOB_RETENTION if retention is None else retention
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='verify-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._counts = {status: 0 for status in FINISHED}
+        self._busy = 0
+        self._busy_seconds = 0.0
+        self._busy_since = {}
+        self._started = time.monotonic()
+        self._recent = deque(maxlen=_RECENT_JOBS)
+
+    def submit(self, session_id, model_name, total, run):
+        """
+        Queue `run(job)`, which verifies the model and adds its results to the job. Raises QueueFull when
+        VERIFY_JOB_QUEUE_MAX jobs are already waiting.
+        """
+        job = VerificationJob(session_id, model_name, total)
+        with self._lock:
+            self._prune()
+            if sum(queued.status == 'queued' for queued in self._jobs.values()) >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} verification jobs are already waiting")
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, run)
+        return job
+
+    def _run(self, job, run):
+        with self._lock:
+            # A job cancelled while it was queued is already finished
+            if job.cancelled:
+                return
+            self._busy += 1
+            self._busy_since[job.id] = time.monotonic()
+            job._set_status('running')
+        try:
+            run(job)
+            status, error = ('cancelled', None) if job.cancelled else ('done', None)
+        except Exception as e:
+            status, error = 'failed', str(e)
+        with self._lock:
+            self._busy -= 1
+            self._busy_seconds += time.monotonic() - self._busy_since.pop(job.id)
+            self._finish(job, status, error)
+
+    def _finish(self, job, status, error=None):
+        job._set_status(status, error)
+        self._counts[status] += 1
+        if job.started is not None:
+            self._recent.append((job.started - job.created, job.finished - job.started))
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id, session_id=None):
+        """
+        The job, None if it does not exist or belongs to another session.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (session_id is not None and job.session_id != session_id):
+            return None
+        return job
+
+    def cancel(self, job_id, session_id=None):
+        """
+        Cancel a job: a queued job is finished at once, a running one once its PAT process is killed.
+        """
+        job = self.get(job_id, session_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status not in FINISHED:
+                job.cancel_event.set()
+                if job.status == 'queued':
+                    self._finish(job, 'cancelled')
+        return job
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            busy_seconds = self._busy_seconds + sum(now - since for since in self._busy_since.values())
+            uptime = now - self._started
+            statuses = [job.status for job in self._jobs.values()]
+            recent = list(self._recent)
+            return {
+                'workers': self.workers,
+                'busyWorkers': self._busy,
+                'queued': statuses.count('queued'),
+                'running': statuses.count('running'),
+                'maxQueued': self.max_queued,
+                # Share of the workers' time spent on jobs since the server started
+                'utilisation': busy_seconds / (self.workers * uptime) if uptime > 0 else 0.0,
+                'finished': dict(self._counts),
+                'meanWaitSeconds': sum(wait for wait, _ in recent) / len(recent) if recent else None,
+                'meanRunSeconds': sum(run for _, run in recent) / len(recent) if recent else None
+            }
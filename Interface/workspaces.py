@@ -0,0 +1,195 @@
+###### Per-session workspaces of the Interface server
+# Every browser session works in a directory of its own, so one server process can serve several users at once
+# without their histories or verification files overwriting each other:
+#   <WORKSPACE_DIR>/<session id>/history/              chat, planning and code generation histories
+#   <WORKSPACE_DIR>/<session id>/PATfiles/<modelName>/ verification inputs and PAT outputs
+#   <WORKSPACE_DIR>/<session id>/traces/               stage times sent by the front-end
+# The session id comes from the X-Session-Id header or the pat_session cookie. A request without one starts a new
+# session, whose id is returned as the cookie, so browsers keep their session without any change to the pages.
+# The databases (database-algorithm.json, database-rag-claude.json) are shared by all sessions.
+# Open sessions are kept in memory (with the latest record of each history, so pages do not re-read the logs);
+# sessions idle for SESSION_IDLE_SECONDS, or the least recently used ones beyond SESSION_MAX_ACTIVE, are evicted
+# from memory and reloaded from disk if they come back. Workspaces unused for WORKSPACE_RETENTION_DAYS are deleted.
+# SESSION_WORKSPACES=0 restores the single shared workspace: ./history and PATfiles/<modelName> under PAT.
+import os
+import re
+import copy
+import time
+import uuid
+import shutil
+import threading
+from collections import OrderedDict
+
+from flask import g, request
+
+from history_store import append_record, latest_record, read_records, rewrite_records
+
+SESSION_WORKSPACES = os.environ.get("SESSION_WORKSPACES", "1") != "0"
+WORKSPACE_DIR = os.path.abspath(os.environ.get("WORKSPACE_DIR", "./workspaces"))
+SESSION_IDLE_SECONDS = float(os.environ.get("SESSION_IDLE_SECONDS", 30 * 60))
+SESSION_MAX_ACTIVE = int(os.environ.get("SESSION_MAX_ACTIVE", 100))
+# 0: keep workspaces on disk forever
+WORKSPACE_RETENTION_DAYS = float(os.environ.get("WORKSPACE_RETENTION_DAYS", 7))
+
+SESSION_COOKIE = 'pat_session'
+SESSION_HEADER = 'X-Session-Id'
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# How often the last use of a workspace is written to disk, and workspaces past their retention are looked for
+_TOUCH_INTERVAL = 60.0
+_PRUNE_INTERVAL = 3600.0
+
+_lock = threading.Lock()
+# session id -> Workspace, least recently used first
+_sessions = OrderedDict()
+_last_prune = [0.0]
+
+
+class Workspace:
+    """
+    Files and in-memory state of one session. The shared workspace (session_id None) keeps the layout of a
+    single-user server: ./history, and PATfiles/<modelName> next to PAT.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.directory = os.path.join(WORKSPACE_DIR, session_id) if session_id else '.'
+        self.last_used = time.monotonic()
+        self._last_touch = 0.0
+        # history name -> its latest record
+        self._latest = {}
+
+    def history_path(self, name):
+        return os.path.join(self.directory, 'history', name)
+
+    def pat_dir(self, root_path, model_name):
+        if self.session_id is None:
+            return f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PATfiles/{model_name}"
+        return os.path.join(self.directory, 'PATfiles', model_name)
+
+    def trace_dir(self):
+        # None: tracing's own TRACE_DIR
+        return os.path.join(self.directory, 'traces') if self.session_id else None
+
+    def append(self, name, record):
+        append_record(self.history_path(name), record)
+        self._latest[name] = record
+
+    def latest(self, name):
+        """
+        Latest record of a history (a copy the caller may change), None if it is empty.
+        """
+        if name not in self._latest:
+            self._latest[name] = latest_record(self.history_path(name))
+        return copy.deepcopy(self._latest[name])
+
+    def read(self, name):
+        return read_records(self.history_path(name))
+
+    def rewrite(self, name, records):
+        rewrite_records(self.history_path(name), records)
+        self._latest[name] = records[-1] if records else None
+
+    def touch(self):
+        self.last_used = time.monotonic()
+        if self.session_id is None or self.last_used - self._last_touch < _TOUCH_INTERVAL:
+            return
+        self._last_touch = self.last_used
+        try:
+            # The directory is created by the first file the session writes
+            if os.path.isdir(self.directory):
+                os.utime(self.directory)
+        except OSError as e:
+            print(f"Error updating workspace {self.session_id}: {e}")
+
+
+_shared = Workspace(None)
+
+
+def get_workspace(session_id):
+    """
+    Workspace of a session, loaded into memory if it is not open.
+    """
+    if not SESSION_WORKSPACES:
+        return _shared
+    with _lock:
+        workspace = _sessions.pop(session_id, None) or Workspace(session_id)
+        workspace.touch()
+        _sessions[session_id] = workspace
+        _evict()
+    return workspace
+
+
+def _evict():
+    now = time.monotonic()
+    while _sessions:
+        session_id, workspace = next(iter(_sessions.items()))
+        if len(_sessions) <= SESSION_MAX_ACTIVE and now - workspace.last_used < SESSION_IDLE_SECONDS:
+            break
+        del _sessions[session_id]
+
+
+def active_sessions():
+    with _lock:
+        return list(_sessions)
+
+
+def prune_workspaces(retention_days=None):
+    """
+    Delete the workspaces not used for `retention_days` (default: WORKSPACE_RETENTION_DAYS) that are not open.
+    Returns the deleted session ids.
+    """
+    if retention_days is None:
+        retention_days = WORKSPACE_RETENTION_DAYS
+    if retention_days <= 0 or not os.path.isdir(WORKSPACE_DIR):
+        return []
+    cutoff = time.time() - retention_days * 24 * 3600
+    open_sessions = set(active_sessions())
+    deleted = []
+    for session_id in os.listdir(WORKSPACE_DIR):
+        directory = os.path.join(WORKSPACE_DIR, session_id)
+        try:
+            if session_id in open_sessions or os.path.getmtime(directory) >= cutoff:
+                continue
+            shutil.rmtree(directory)
+            deleted.append(session_id)
+        except OSError as e:
+            print(f"Error deleting workspace {session_id}: {e}")
+    return deleted
+
+
+def _maybe_prune():
+    now = time.monotonic()
+    with _lock:
+        if _last_prune[0] and now - _last_prune[0] < _PRUNE_INTERVAL:
+            return
+        _last_prune[0] = now
+    threading.Thread(target=prune_workspaces, daemon=True).start()
+
+
+def current():
+    """
+    Workspace of the session of the current request.
+    """
+    return g.get('workspace') or _shared
+
+
+def init_app(app):
+    """
+    Resolve the session of every request of `app`, and hand new sessions their cookie.
+    """
+    @app.before_request
+    def _open_session():
+        if not SESSION_WORKSPACES:
+            return
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        g.new_session = not (session_id and _SESSION_ID.match(session_id))
+        if g.new_session:
+            session_id = uuid.uuid4().hex
+        g.workspace = get_workspace(session_id)
+        _maybe_prune()
+
+    @app.after_request
+    def _set_session_cookie(response):
+        if g.get('new_session'):
+            response.set_cookie(SESSION_COOKIE, g.workspace.session_id, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,76 @@
+###### On-disk cache directories
+# What the PAT result cache (pat_cache.py) and the LLM response cache (llm_cache.py) have in common: one JSON file
+# per entry, written atomically, hit/miss counters for the current process, and a size bound enforced by evicting
+# the least recently used entries (reading an entry touches its file, so the mtime is the time of last use).
+import os
+import json
+import threading
+
+
+class CacheStats(dict):
+    """
+    Hit/miss counters of a cache for the current process: {'hits': ..., 'misses': ...}.
+    """
+
+    def __init__(self):
+        super().__init__(hits=0, misses=0)
+        self._lock = threading.Lock()
+
+    def count(self, hit):
+        with self._lock:
+            self['hits' if hit else 'misses'] += 1
+
+
+def touch(entry_path):
+    """
+    Mark an entry as recently used.
+    """
+    os.utime(entry_path, None)
+
+
+def write_entry(entry_path, entry):
+    """
+    Write the entry through a temporary file, so concurrent readers never see it half written.
+    """
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+    tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    os.replace(tmp_path, entry_path)
+
+
+def cache_entries(cache_dir):
+    """
+    (last use, size, path) of every entry under `cache_dir`, subdirectories included.
+    """
+    entries = []
+    for dir_path, _, file_names in os.walk(cache_dir):
+        for file_name in file_names:
+            if not file_name.endswith('.json'):
+                continue
+            path = os.path.join(dir_path, file_name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict(cache_dir, max_bytes):
+    """
+    Remove least recently used entries until the cache fits in `max_bytes`.
+    """
+    entries = cache_entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
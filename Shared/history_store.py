@@ -0,0 +1,216 @@
+###### History store
+# Append-only backend for the ./history logs. A history that used to be a JSON array in
+# ./history/<name>.json lives in ./history/<name>.jsonl, one record per line:
+#   - appending a record writes one line instead of rewriting the whole file,
+#   - the latest record is read from the end of the file without parsing the rest,
+#   - writers from different threads and processes are serialised by a lock file.
+# Callers keep using the legacy .json paths. A log without a .jsonl file yet is migrated from its
+# legacy .json array on first write; the legacy file is only read, never modified.
+# append_record_async hands records to a background writer thread, for callers that only log.
+# Usage (migrate a whole history directory up front):
+#   python history_store.py ./history [--remove-legacy]
+import os
+import sys
+import json
+import queue
+import atexit
+import argparse
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows, threads are still serialised
+    fcntl = None
+
+# Histories that are logs (JSON arrays that only ever grow). Other files in ./history,
+# e.g. mismatch_traces.json, are snapshots that get overwritten and stay plain JSON.
+HISTORY_LOGS = (
+    'history.json', 'const-history.json', 'action-history.json', 'assertion-history.json',
+    'chatbot-history.json', 'claude-code.json', 'claude-refinement.json',
+    'nl-instruction-part.json', 'nl-instruction-claude.json'
+)
+
+_CHUNK_SIZE = 64 * 1024
+_thread_lock = threading.RLock()
+
+_write_queue = queue.Queue()
+_writer = None
+
+
+def log_path(path):
+    """
+    ./history/const-history.json -> ./history/const-history.jsonl
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.jsonl" if ext == '.json' else f"{path}.jsonl"
+
+
+@contextmanager
+def _locked(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _thread_lock:
+        with open(f"{log_path(path)}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _load_legacy(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    return records if isinstance(records, list) else [records]
+
+
+def _write_lines(target, records):
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, target)
+
+
+def _migrate_unlocked(path):
+    target = log_path(path)
+    if not os.path.exists(target):
+        _write_lines(target, _load_legacy(path))
+
+
+def _decode(line):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        # A line cut short by a crash mid-append is skipped
+        return None
+
+
+def append_record(path, record):
+    """
+    Append one record to the history at `path` (the legacy .json path).
+    """
+    with _locked(path):
+        _migrate_unlocked(path)
+        with open(log_path(path), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+
+
+def _drain_write_queue():
+    while True:
+        path, record = _write_queue.get()
+        try:
+            append_record(path, record)
+        except Exception as e:
+            print(f"Error appending to history {path}: {e}")
+        finally:
+            _write_queue.task_done()
+
+
+def append_record_async(path, record):
+    """
+    Queue a record to be appended by a background thread, so the caller does not wait for the disk.
+    Records are written in the order they were queued; flush() waits until all of them are written.
+    """
+    global _writer
+    with _thread_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_drain_write_queue, name="history-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush)
+    # Resolve now: the working directory may change before the record is written
+    _write_queue.put((os.path.abspath(path), record))
+
+
+def flush():
+    _write_queue.join()
+
+
+def read_records(path):
+    """
+    All records of the history at `path`, oldest first (same content as the legacy JSON array).
+    """
+    target = log_path(path)
+    if not os.path.exists(target):
+        return _load_legacy(path)
+    records = []
+    with open(target, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = _decode(line)
+            if record is not None:
+                records.append(record)
+    return records
+
+
+def latest_record(path):
+    """
+    The most recent record of the history at `path`, or None if it is empty.
+    Reads backwards from the end of the log, so the cost does not grow with the history.
+    """
+    target = log_path(path)
+    if not os.path.exists(target):
+        records = _load_legacy(path)
+        return records[-1] if records else None
+    with open(target, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        partial = b''
+        while position > 0:
+            step = min(_CHUNK_SIZE, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + partial).split(b'\n')
+            # The first line may continue in the previous chunk
+            partial = lines.pop(0) if position > 0 else b''
+            for line in reversed(lines):
+                record = _decode(line.decode('utf-8'))
+                if record is not None:
+                    return record
+    return None
+
+
+def rewrite_records(path, records):
+    """
+    Replace the whole history at `path`. Only for edits of past records (e.g. deleting a message).
+    """
+    with _locked(path):
+        _write_lines(log_path(path), records)
+
+
+def migrate(history_dir, remove_legacy=False):
+    """
+    Convert every legacy history log in `history_dir` that has no .jsonl file yet.
+    """
+    migrated = []
+    for name in HISTORY_LOGS:
+        path = os.path.join(history_dir, name)
+        if not os.path.exists(path):
+            continue
+        with _locked(path):
+            if not os.path.exists(log_path(path)):
+                records = _load_legacy(path)
+                _write_lines(log_path(path), records)
+                migrated.append((name, len(records)))
+            if remove_legacy:
+                os.remove(path)
+    return migrated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Migrate ./history JSON arrays to append-only JSONL logs")
+    parser.add_argument('history_dir', nargs='?', default='./history')
+    parser.add_argument('--remove-legacy', action='store_true', help="delete the .json files after migrating them")
+    args = parser.parse_args()
+    if not os.path.isdir(args.history_dir):
+        sys.exit(f"Not a directory: {args.history_dir}")
+    for name, count in migrate(args.history_dir, args.remove_legacy):
+        print(f"Migrated {name}: {count} records")
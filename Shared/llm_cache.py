@@ -0,0 +1,104 @@
+###### LLM response cache
+# Exact-match on-disk cache of LLM responses, so a rerun that sends a byte-identical request (same provider, model,
+# reasoning effort, max_tokens, system prompt and messages; see llm_replay.request_key) gets the earlier answer
+# without a network round trip.
+# Caching is opt-in per call site (cache=True in llm_client.openai_chat / claude_messages and their streaming
+# variants): only requests whose answer is used once, such as the planning prompts, should be cached; a request that
+# is sent again on purpose to get another answer (the code regeneration attempts) must not be.
+# The cache is used in LLM_MODE=live only: recording needs the provider's answer, and replaying is offline already.
+# Entries older than LLM_CACHE_TTL seconds are misses; beyond LLM_CACHE_MAX_BYTES the least recently used are evicted.
+# Entries: <LLM_CACHE_DIR>/<provider>/<key>.json
+# Usage:
+#   python llm_cache.py ./llm_cache   (entries per provider and model, with their size)
+import os
+import sys
+import json
+import time
+
+from disk_cache import CacheStats, cache_entries, evict, touch, write_entry
+from llm_replay import as_dict, as_response, request_key
+
+# Set LLM_CACHE=0 to send every request, including those of call sites that opt in
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", "./llm_cache")
+# Seconds an answer stays valid (0: forever)
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+# Total size of the cache directory before least recently used entries are evicted
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Hit/miss counters for the current process
+cache_stats = CacheStats()
+
+
+def _entry_path(provider, key, cache_dir=None):
+    return os.path.join(cache_dir or LLM_CACHE_DIR, provider, f"{key}.json")
+
+
+def _text(provider, response):
+    if provider == 'openai':
+        return response.choices[0].message.content
+    return response.content[0].text
+
+
+def is_cacheable(provider, response):
+    """
+    Only answers with text are cached; an empty answer is worth asking for again.
+    """
+    try:
+        return bool(_text(provider, response))
+    except (AttributeError, IndexError, TypeError):
+        return False
+
+
+def cache_get(provider, params, cache_dir=None):
+    """
+    The cached response to this request, None on a miss.
+    """
+    entry_path = _entry_path(provider, request_key(provider, params), cache_dir)
+    try:
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        if LLM_CACHE_TTL > 0 and time.time() - entry.get('created', 0) > LLM_CACHE_TTL:
+            os.remove(entry_path)
+            raise FileNotFoundError(entry_path)
+        touch(entry_path)
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        cache_stats.count(hit=False)
+        return None
+    cache_stats.count(hit=True)
+    return as_response(entry['response'])
+
+
+def cache_put(provider, params, response, cache_dir=None):
+    if not is_cacheable(provider, response):
+        return
+    try:
+        entry = {
+            'created': time.time(),
+            'provider': provider,
+            'model': params.get('model'),
+            'response': as_dict(response)
+        }
+        write_entry(_entry_path(provider, request_key(provider, params), cache_dir), entry)
+        evict(cache_dir or LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES)
+    except Exception as e:
+        print(f"Error saving {provider} response to cache: {e}")
+
+
+if __name__ == '__main__':
+    cache_dir = sys.argv[1] if len(sys.argv) > 1 else LLM_CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        sys.exit(f"Not a directory: {cache_dir}")
+    summary = {}
+    for _, size, path in cache_entries(cache_dir):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        key = (entry.get('provider') or '', entry.get('model') or '')
+        count, total = summary.get(key, (0, 0))
+        summary[key] = (count + 1, total + size)
+    print(f"{'provider':<10} {'model':<32} {'entries':>8} {'KB':>10}")
+    for (provider, model), (count, total) in sorted(summary.items()):
+        print(f"{provider:<10} {model:<32} {count:>8} {total / 1024:>10.1f}")
@@ -0,0 +1,382 @@
+###### LLM client
+# One asyncio event loop, running on a background thread, owns the OpenAI and Anthropic clients for the whole process.
+# Synchronous callers (the pipelines, the Flask routes) submit coroutines to it with run() / run_all(), so all
+# requests share one pool of HTTP connections and one set of per-provider concurrency and rate limits.
+# The SDKs (openai, anthropic, httpx) are only imported when the first request to a provider is made,
+# so importing this module is cheap.
+# Every request is an 'llm' span (tracing.py) of the caller's current span: tokens in and out, prompt size, retries.
+# Streaming requests (*_stream, iterated with TextStream) pass the text on as it arrives and also record the time to
+# the first token (ttft).
+# With LLM_MODE=record / replay, responses are recorded / replayed offline by llm_replay.py.
+# Requests made with cache=True are answered from the on-disk response cache (llm_cache.py) when they were sent before.
+# Claude prompts built with cached_prompt() mark their stable prefix for Anthropic's prompt caching; the prompt tokens
+# read from / written to the provider's cache are recorded on the span (cachedTokensIn, cacheWriteTokens).
+import os
+import queue
+import random
+import asyncio
+import threading
+import contextvars
+import time
+
+import tracing
+import llm_cache
+import llm_replay
+
+# Maximum number of in-flight requests per provider
+LLM_OPENAI_CONCURRENCY = int(os.environ.get("LLM_OPENAI_CONCURRENCY", 4))
+LLM_CLAUDE_CONCURRENCY = int(os.environ.get("LLM_CLAUDE_CONCURRENCY", 4))
+# Requests per minute allowed per provider (0: no limit)
+LLM_OPENAI_RPM = float(os.environ.get("LLM_OPENAI_RPM", 0))
+LLM_CLAUDE_RPM = float(os.environ.get("LLM_CLAUDE_RPM", 0))
+# Retries after the first attempt for rate limits, timeouts, connection errors and 5xx responses
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 5))
+LLM_RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", 1.0))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", 60.0))
+# Set LLM_PROMPT_CACHING=0 to send cached_prompt() prompts as plain text, without prompt caching markers
+LLM_PROMPT_CACHING = os.environ.get("LLM_PROMPT_CACHING", "1") != "0"
+# Size of the shared HTTP connection pool
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+LLM_REQUEST_TIMEOUT = float(os.environ.get("LLM_REQUEST_TIMEOUT", 600))
+
+_loop = None
+_loop_lock = threading.Lock()
+_providers = {}
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second on average, with bursts of up to `capacity` requests.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _Provider:
+    def __init__(self, client, concurrency, rpm, retryable_errors):
+        self.client = client
+        # Rate limits, timeouts, connection errors and 5xx responses of the provider's SDK
+        self.retryable_errors = retryable_errors
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.bucket = TokenBucket(rpm / 60.0) if rpm > 0 else None
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def _get_provider(name):
+    """
+    Import the provider's SDK and create its client on first use, on the event loop thread.
+    The SDKs' own retries are disabled so that _call is the only retry layer.
+    """
+    if name not in _providers:
+        import httpx
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+            timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=10.0)
+        )
+        if name == 'openai':
+            import openai
+            client = openai.AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"], http_client=http_client, max_retries=0)
+            retryable_errors = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+            _providers[name] = _Provider(client, LLM_OPENAI_CONCURRENCY, LLM_OPENAI_RPM, retryable_errors)
+        else:
+            import anthropic
+            client = anthropic.AsyncAnthropic(api_key=os.environ["CLAUDE_API_KEY"], http_client=http_client, max_retries=0)
+            retryable_errors = (anthropic.RateLimitError, anthropic.APIConnectionError, anthropic.InternalServerError)
+            _providers[name] = _Provider(client, LLM_CLAUDE_CONCURRENCY, LLM_CLAUDE_RPM, retryable_errors)
+    return _providers[name]
+
+
+def _retry_delay(error, attempt):
+    """
+    Honour the server's Retry-After header when there is one, otherwise exponential backoff with full jitter.
+    """
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(LLM_RETRY_MAX_DELAY, float(response.headers.get('retry-after')))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+def _prompt_chars(messages, system=None):
+    size = len(system) if isinstance(system, str) else 0
+    for message in messages:
+        content = message.get('content', "")
+        if isinstance(content, str):
+            size += len(content)
+        else:
+            size += sum(len(part.get('text', "")) for part in content if isinstance(part, dict))
+    return size
+
+
+def _record_usage(span, response):
+    """
+    Token counts of an OpenAI completion (prompt/completion_tokens) or an Anthropic message (input/output_tokens),
+    and the prompt tokens read from the provider's prompt cache (prompt_tokens_details.cached_tokens /
+    cache_read_input_tokens) or written to it (cache_creation_input_tokens). Anthropic's input_tokens leaves out both.
+    """
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    tokens_in = getattr(usage, 'prompt_tokens', None)
+    if tokens_in is None:
+        tokens_in = getattr(usage, 'input_tokens', None)
+    tokens_out = getattr(usage, 'completion_tokens', None)
+    if tokens_out is None:
+        tokens_out = getattr(usage, 'output_tokens', None)
+    cached_in = getattr(usage, 'cache_read_input_tokens', None)
+    if cached_in is None:
+        cached_in = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None)
+    span.set(
+        tokensIn=tokens_in, tokensOut=tokens_out,
+        cachedTokensIn=cached_in, cacheWriteTokens=getattr(usage, 'cache_creation_input_tokens', None)
+    )
+
+
+def _response_text(name, response):
+    if name == 'openai':
+        return response.choices[0].message.content
+    return response.content[0].text
+
+
+def cached_prompt(parts):
+    """
+    Content of a Claude message made of (text, cacheable) parts, in order. Each cacheable part ends a prefix that
+    Anthropic's prompt caching keeps for a few minutes, so put the parts that repeat across requests first.
+    Up to 4 parts can be cacheable; a prefix shorter than the model's minimum (1024 tokens for Sonnet) is not cached.
+    """
+    if not LLM_PROMPT_CACHING:
+        return ''.join(text for text, _ in parts)
+    blocks = []
+    for text, cacheable in parts:
+        if not text:
+            continue
+        block = {'type': 'text', 'text': text}
+        if cacheable:
+            block['cache_control'] = {'type': 'ephemeral'}
+        blocks.append(block)
+    return blocks
+
+
+async def _call(name, request, params, prompt_chars=None, on_text=None, cache=False):
+    """
+    Run `request(client)` under the provider's concurrency and rate limits, retrying transient errors.
+    `params` are the request's parameters, which identify it for llm_replay and llm_cache.
+    With `on_text`, the request streams: `request(client, emit)` passes every text delta to emit(), which hands it on
+    to on_text(). Once text has been handed on, errors are no longer retried.
+    """
+    model = params.get('model')
+    with tracing.span(name, kind='llm', llmModel=model, promptChars=prompt_chars, retries=0) as span:
+        requested = time.perf_counter()
+        emitted = []
+
+        def emit(text):
+            if not emitted:
+                span.set(ttft=time.perf_counter() - requested)
+            emitted.append(len(text))
+            on_text(text)
+
+        if llm_replay.LLM_MODE == 'replay':
+            response = await llm_replay.replay(name, params)
+            span.set(replayed=True)
+            _record_usage(span, response)
+            if on_text is not None:
+                # A replayed answer arrives as one delta
+                emit(_response_text(name, response))
+            return response
+        cache = cache and llm_cache.LLM_CACHE_ENABLED and llm_replay.LLM_MODE == 'live'
+        if cache:
+            response = llm_cache.cache_get(name, params)
+            span.set(cached=response is not None)
+            if response is not None:
+                _record_usage(span, response)
+                if on_text is not None:
+                    emit(_response_text(name, response))
+                return response
+        provider = _get_provider(name)
+        attempt = 0
+        while True:
+            if provider.bucket is not None:
+                await provider.bucket.acquire()
+            try:
+                async with provider.semaphore:
+                    start = time.perf_counter()
+                    if on_text is None:
+                        response = await request(provider.client)
+                    else:
+                        response = await request(provider.client, emit)
+                    latency = time.perf_counter() - start
+                _record_usage(span, response)
+                if llm_replay.LLM_MODE == 'record':
+                    llm_replay.save(name, params, response, latency)
+                if cache:
+                    llm_cache.cache_put(name, params, response)
+                return response
+            except provider.retryable_errors as e:
+                if attempt >= LLM_MAX_RETRIES or emitted:
+                    raise
+                delay = _retry_delay(e, attempt)
+                print(f"{name} request failed ({type(e).__name__}), retrying in {delay:.1f} seconds")
+                await asyncio.sleep(delay)
+                attempt += 1
+                span.set(retries=attempt)
+
+
+async def openai_chat(messages, model="o3-mini-2025-01-31", cache=False, **kwargs):
+    """
+    Chat completion from OpenAI. Returns the full completion object.
+    With `cache`, a request sent before is answered from llm_cache.
+    """
+    params = dict(model=model, messages=messages, **kwargs)
+    return await _call(
+        'openai', lambda client: client.chat.completions.create(**params),
+        params, prompt_chars=_prompt_chars(messages), cache=cache
+    )
+
+
+async def claude_messages(messages, model="claude-3-7-sonnet-20250219", max_tokens=8192, cache=False, **kwargs):
+    """
+    Message from Anthropic. Returns the full message object.
+    With `cache`, a request sent before is answered from llm_cache.
+    """
+    params = dict(model=model, max_tokens=max_tokens, messages=messages, **kwargs)
+    return await _call(
+        'claude', lambda client: client.messages.create(**params),
+        params, prompt_chars=_prompt_chars(messages, kwargs.get('system')), cache=cache
+    )
+
+
+async def openai_chat_stream(messages, on_text, model="o3-mini-2025-01-31", cache=False, **kwargs):
+    """
+    Streamed chat completion from OpenAI: on_text(delta) for every piece of the answer as it arrives.
+    Returns the full completion, assembled from the stream with the fields openai_chat's callers read
+    (choices[0].message.content, usage).
+    """
+    params = dict(model=model, messages=messages, **kwargs)
+
+    async def request(client, emit):
+        stream = await client.chat.completions.create(**params, stream=True, stream_options={'include_usage': True})
+        parts = []
+        finish_reason = None
+        usage = None
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage.model_dump(mode='json')
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            text = chunk.choices[0].delta.content
+            if text:
+                parts.append(text)
+                emit(text)
+        return llm_replay.as_response({
+            'model': model,
+            'object': 'chat.completion',
+            'choices': [{
+                'index': 0,
+                'finish_reason': finish_reason,
+                'message': {'role': 'assistant', 'content': ''.join(parts)}
+            }],
+            'usage': usage
+        })
+
+    return await _call('openai', request, params, prompt_chars=_prompt_chars(messages), on_text=on_text, cache=cache)
+
+
+async def claude_messages_stream(messages, on_text, model="claude-3-7-sonnet-20250219", max_tokens=8192, cache=False,
+                                 **kwargs):
+    """
+    Streamed message from Anthropic: on_text(delta) for every piece of the answer as it arrives.
+    Returns the full message object.
+    """
+    params = dict(model=model, max_tokens=max_tokens, messages=messages, **kwargs)
+
+    async def request(client, emit):
+        async with client.messages.stream(**params) as stream:
+            async for text in stream.text_stream:
+                emit(text)
+            return await stream.get_final_message()
+
+    return await _call(
+        'claude', request, params, prompt_chars=_prompt_chars(messages, kwargs.get('system')), on_text=on_text,
+        cache=cache
+    )
+
+
+async def _in_context(context, coro):
+    # A task copies the context it is created in, so the request runs inside the caller's current span
+    return await context.run(asyncio.ensure_future, coro)
+
+
+def run(coro):
+    """
+    Block until `coro` has finished on the shared event loop and return its result.
+    """
+    return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), _get_loop()).result()
+
+
+def run_all(coros):
+    """
+    Run independent coroutines concurrently and return their results in order.
+    A coroutine that raises yields its exception in place of a result.
+    """
+    async def gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+    return run(gather())
+
+
+class TextStream:
+    """
+    Iterate over the text of a streaming request (e.g. openai_chat_stream) on the calling thread while it runs on
+    the shared event loop: TextStream(lambda on_text: llm_client.openai_chat_stream(messages, on_text)).
+    Once the iteration ends, `response` is the request's full response; an error of the request is raised there.
+    """
+    _END = object()
+
+    def __init__(self, start):
+        self.response = None
+        self._deltas = queue.Queue()
+        self._future = asyncio.run_coroutine_threadsafe(
+            _in_context(contextvars.copy_context(), start(self._deltas.put)), _get_loop()
+        )
+        self._future.add_done_callback(lambda _: self._deltas.put(self._END))
+
+    def __iter__(self):
+        while True:
+            text = self._deltas.get()
+            if text is self._END:
+                break
+            yield text
+        self.response = self._future.result()
+
+    def close(self):
+        """
+        Stop the request if it is still running (e.g. the client went away).
+        """
+        self._future.cancel()
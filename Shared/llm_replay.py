@@ -0,0 +1,176 @@
+###### LLM record / replay
+# Offline stand-in for the OpenAI and Anthropic APIs, so the pipelines and the server can be run, profiled and
+# regression-tested without API keys or network access. Selected with LLM_MODE:
+#   live    (default) every request goes to the provider
+#   record  requests go to the provider, and every response is also saved with its latency
+#   replay  responses are answered from the recordings only; neither the SDKs nor the API keys are needed
+# A recording is keyed on a hash of the provider and the full request (model, messages, system prompt, options).
+# Identical requests (e.g. the regeneration attempts of the same prompt) are recorded one after the other and
+# replayed in the same order, so a replayed run takes the same path as the recorded one.
+# Replayed responses wait for the recorded latency (LLM_REPLAY_LATENCY=recorded) or a fixed number of seconds,
+# scaled by LLM_REPLAY_LATENCY_SCALE (0: answer at once).
+# Recordings are append-only logs (history_store.py): <LLM_RECORDING_DIR>/<provider>/<key>.jsonl
+# Usage:
+#   LLM_MODE=record python pipeline.py
+#   LLM_MODE=replay LLM_REPLAY_LATENCY_SCALE=0 python pipeline.py
+#   python llm_replay.py ./llm_recordings   (recordings per provider and model, with their latencies)
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import datetime
+import threading
+from types import SimpleNamespace
+
+from history_store import append_record, read_records
+
+LLM_MODE = os.environ.get("LLM_MODE", "live")
+LLM_RECORDING_DIR = os.environ.get("LLM_RECORDING_DIR", "./llm_recordings")
+# 'recorded' or a number of seconds
+LLM_REPLAY_LATENCY = os.environ.get("LLM_REPLAY_LATENCY", "recorded")
+LLM_REPLAY_LATENCY_SCALE = float(os.environ.get("LLM_REPLAY_LATENCY_SCALE", 1.0))
+
+MODES = ('live', 'record', 'replay')
+if LLM_MODE not in MODES:
+    raise ValueError(f"LLM_MODE must be one of {', '.join(MODES)}, not '{LLM_MODE}'")
+
+_lock = threading.Lock()
+# key -> recorded responses, and how many of them this process has replayed
+_recordings = {}
+_replayed = {}
+
+
+def request_key(provider, params):
+    payload = json.dumps({'provider': provider, **params}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def recording_path(provider, key, recording_dir=None):
+    # history_store keeps the log next to this path as <key>.jsonl
+    return os.path.join(recording_dir or LLM_RECORDING_DIR, provider, f"{key}.json")
+
+
+def as_dict(response):
+    """
+    JSON form of an SDK response object (both SDKs' responses are pydantic models), or of one made by as_response().
+    """
+    if isinstance(response, SimpleNamespace):
+        return json.loads(json.dumps(response, default=vars))
+    if hasattr(response, 'model_dump'):
+        return response.model_dump(mode='json')
+    return json.loads(response.to_json())
+
+
+def _to_object(value):
+    """
+    Recorded response as an object with attribute access, e.g. completion.choices[0].message.content,
+    so callers read a replayed response as they read the SDK's.
+    """
+    if isinstance(value, dict):
+        return SimpleNamespace(**{name: _to_object(item) for name, item in value.items()})
+    if isinstance(value, list):
+        return [_to_object(item) for item in value]
+    return value
+
+
+def as_response(value):
+    """
+    Response assembled by the caller (e.g. from a stream) as a dict, read and recorded like an SDK response.
+    """
+    return _to_object(value)
+
+
+def save(provider, params, response, latency, recording_dir=None):
+    key = request_key(provider, params)
+    record = {
+        'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'provider': provider,
+        'model': params.get('model'),
+        'latency': round(latency, 3),
+        'response': as_dict(response)
+    }
+    try:
+        append_record(recording_path(provider, key, recording_dir), record)
+    except Exception as e:
+        print(f"Error recording {provider} response: {e}")
+
+
+def _replay_delay(record):
+    if LLM_REPLAY_LATENCY == 'recorded':
+        latency = record.get('latency', 0.0)
+    else:
+        latency = float(LLM_REPLAY_LATENCY)
+    return max(0.0, latency * LLM_REPLAY_LATENCY_SCALE)
+
+
+def next_recording(provider, params, recording_dir=None):
+    """
+    The next recorded response to this request in this process: the n-th identical request gets the n-th recording,
+    and the last one once they are used up. Raises LookupError if the request was never recorded.
+    """
+    key = request_key(provider, params)
+    with _lock:
+        if key not in _recordings:
+            _recordings[key] = read_records(recording_path(provider, key, recording_dir))
+        records = _recordings[key]
+        if not records:
+            raise LookupError(
+                f"No recorded {provider} response for this {params.get('model')} request ({key[:12]}); "
+                f"record it first with LLM_MODE=record"
+            )
+        n = _replayed.get(key, 0)
+        _replayed[key] = n + 1
+    return records[min(n, len(records) - 1)]
+
+
+async def replay(provider, params, recording_dir=None):
+    """
+    Recorded response to the request, after the simulated latency.
+    """
+    record = next_recording(provider, params, recording_dir)
+    delay = _replay_delay(record)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return _to_object(record['response'])
+
+
+def reset():
+    """
+    Replay every request from its first recording again (e.g. between two replayed benchmark runs).
+    """
+    with _lock:
+        _replayed.clear()
+
+
+def summarize(recording_dir):
+    """
+    {(provider, model): (requests, responses, total latency)} of the recordings in `recording_dir`.
+    """
+    summary = {}
+    for provider in sorted(os.listdir(recording_dir)):
+        provider_dir = os.path.join(recording_dir, provider)
+        if not os.path.isdir(provider_dir):
+            continue
+        for name in sorted(os.listdir(provider_dir)):
+            if not name.endswith('.jsonl'):
+                continue
+            # One request per log, all of its responses come from the same model
+            records = read_records(os.path.join(provider_dir, name[:-len('l')]))
+            if not records:
+                continue
+            model = records[0].get('model') or ''
+            requests, responses, latency = summary.get((provider, model), (0, 0, 0.0))
+            summary[(provider, model)] = (
+                requests + 1, responses + len(records), latency + sum(record.get('latency', 0.0) for record in records)
+            )
+    return summary
+
+
+if __name__ == '__main__':
+    recording_dir = sys.argv[1] if len(sys.argv) > 1 else LLM_RECORDING_DIR
+    if not os.path.isdir(recording_dir):
+        sys.exit(f"Not a directory: {recording_dir}")
+    print(f"{'provider':<10} {'model':<32} {'requests':>9} {'responses':>10} {'mean latency (s)':>17}")
+    for (provider, model), (requests, responses, latency) in summarize(recording_dir).items():
+        print(f"{provider:<10} {model:<32} {requests:>9} {responses:>10} {latency / responses:>17.2f}")
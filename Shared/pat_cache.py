@@ -0,0 +1,97 @@
+###### PAT verification result cache
+import os
+import re
+import json
+import hashlib
+import datetime
+
+from disk_cache import CacheStats, evict, touch, write_entry
+
+# Set PAT_CACHE=0 to always launch PAT
+PAT_CACHE_ENABLED = os.environ.get("PAT_CACHE", "1") != "0"
+# Total size of the cache directory before least recently used entries are evicted
+PAT_CACHE_MAX_BYTES = int(os.environ.get("PAT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Hit/miss counters for the current process
+cache_stats = CacheStats()
+
+_pat_versions = {}
+
+
+def get_cache_dir(root_path):
+    """
+    The cache lives next to PAT itself, so the pipelines and the Interface server share it.
+    """
+    return os.environ.get("PAT_CACHE_DIR", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/verification_cache")
+
+
+def get_pat_version(root_path):
+    """
+    Fingerprint of the PAT build, so results are not reused across PAT upgrades.
+    """
+    exe_path = f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe"
+    if exe_path not in _pat_versions:
+        try:
+            with open(exe_path, 'rb') as f:
+                _pat_versions[exe_path] = hashlib.sha256(f.read()).hexdigest()[:16]
+        except OSError:
+            _pat_versions[exe_path] = "unknown"
+    return _pat_versions[exe_path]
+
+
+def normalize_block(block):
+    """
+    Drop what cannot change the verification result: line endings, trailing spaces,
+    blank lines and whole-line // comments.
+    """
+    lines = []
+    for line in block.replace('\r\n', '\n').split('\n'):
+        line = line.rstrip()
+        if not line or re.match(r'\s*//', line):
+            continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def cache_key(block, engine, pat_version):
+    payload = json.dumps([normalize_block(block), engine, pat_version])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_cacheable(output):
+    """
+    Only outputs that carry a verification result are cached; empty outputs may come from a crashed run.
+    """
+    return "********Verification Result********" in output
+
+
+def cache_get(cache_dir, key):
+    """
+    Return the cached PAT console output for `key`, or None on a miss.
+    """
+    entry_path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(entry_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        touch(entry_path)
+    except (FileNotFoundError, json.JSONDecodeError, OSError):
+        cache_stats.count(hit=False)
+        return None
+    cache_stats.count(hit=True)
+    return entry.get('output')
+
+
+def cache_put(cache_dir, key, output, engine=None, pat_version=""):
+    if not is_cacheable(output):
+        return
+    try:
+        entry = {
+            'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'engine': engine,
+            'patVersion': pat_version,
+            'output': output
+        }
+        write_entry(os.path.join(cache_dir, f"{key}.json"), entry)
+        evict(cache_dir, PAT_CACHE_MAX_BYTES)
+    except Exception as e:
+        print(f"Error saving PAT result to cache: {e}")
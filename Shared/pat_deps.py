@@ -0,0 +1,199 @@
+###### CSP# dependency analysis for incremental re-verification
+# Splits a PAT model into its top-level declarations (#define, var, channel, enum, process definitions, ...), at every
+# `;` outside of brackets and at every line that starts a declaration, and follows the names each #assert refers to,
+# transitively, to the declarations it depends on: its dependency cone.
+# Two verification blocks (model + one #assert, as verify_code builds them) whose cones are identical get the same
+# verdict from PAT, so after a refinement only the assertions whose cone changed need to be verified again.
+# The analysis works on names, not on semantics: it may see a dependency that is not there, never miss one.
+# Declarations and text it does not recognise (#import, C# libraries, ...) are part of every cone, and so is every
+# declaration they refer to.
+# Usage:
+#   python pat_deps.py previous.csp refined.csp   (assertions affected by the change)
+import os
+import re
+import sys
+import hashlib
+
+# Set PAT_INCREMENTAL=1 to reuse the previous verdicts of assertions the refinement did not affect
+PAT_INCREMENTAL = os.environ.get("PAT_INCREMENTAL", "0") == "1"
+
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+# What a declaration starts with: a directive, a declaration keyword or a process definition `Name(params) =`
+# (`Name =` for a process without parameters)
+_DECLARATION = r'(?:#[A-Za-z]+|h?var\b|channel\b|enum\b|[A-Za-z_]\w*[ \t]*(?:\([^()\n]*\))?[ \t]*=(?!=))'
+_DECLARATION_START = re.compile(r'^[ \t]*' + _DECLARATION, re.M)
+_STARTS_DECLARATION = re.compile(_DECLARATION)
+_PROCESS_DEFINITION = re.compile(r'([A-Za-z_]\w*)\s*(?:\([^()]*\))?\s*=(?!=)')
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+_NAMED = [
+    re.compile(r'#define\s+([A-Za-z_]\w*)'),
+    re.compile(r'#alphabet\s+([A-Za-z_]\w*)'),
+    re.compile(r'channel\s+([A-Za-z_]\w*)'),
+    _PROCESS_DEFINITION,
+]
+
+
+def _normalize(text):
+    return ' '.join(text.split())
+
+
+def _segments(code):
+    """
+    The code cut at every `;` outside of brackets (kept with the text before it) and before every line that starts
+    a declaration outside of brackets.
+    """
+    line_starts = {match.start() for match in _DECLARATION_START.finditer(code)}
+    segments = []
+    start = 0
+    depth = 0
+    for position, char in enumerate(code):
+        if position in line_starts and depth <= 0 and code[start:position].strip():
+            segments.append(code[start:position])
+            start, depth = position, 0
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ';' and depth <= 0:
+            segments.append(code[start:position + 1])
+            start, depth = position + 1, 0
+    segments.append(code[start:])
+    return segments
+
+
+def split_declarations(code):
+    """
+    Top-level declarations of a PAT model, comments removed and whitespace normalised, in order.
+    A `;` outside of brackets ends a declaration, except in a process expression, where it is sequential
+    composition (`P() = Q(); R();`): what follows it is part of the same process definition.
+    """
+    declarations = []
+    for segment in _segments(_COMMENT.sub(' ', code)):
+        declaration = _normalize(segment)
+        if not declaration:
+            continue
+        if declarations and not _STARTS_DECLARATION.match(declaration) and \
+                _PROCESS_DEFINITION.match(declarations[-1]):
+            declarations[-1] += ' ' + declaration
+        else:
+            declarations.append(declaration)
+    return declarations
+
+
+def _top_level_parts(text):
+    """
+    `text` split at the commas outside of brackets.
+    """
+    parts = []
+    start = 0
+    depth = 0
+    for position, char in enumerate(text):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth <= 0:
+            parts.append(text[start:position])
+            start = position + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _declared_names(declaration):
+    if declaration.startswith('enum'):
+        return _IDENTIFIER.findall(declaration[len('enum'):])
+    match = re.match(r'h?var\b\s*(?:<[^>]*>)?', declaration)
+    if match:
+        # var x = 0, y = 1;
+        names = [_IDENTIFIER.match(part.strip()) for part in _top_level_parts(declaration[match.end():])]
+        return [name.group(0) for name in names if name]
+    for pattern in _NAMED:
+        match = pattern.match(declaration)
+        if match:
+            return [match.group(1)]
+    return []
+
+
+def parse_model(code):
+    """
+    (declarations by name, declarations without a name, #asserts) of a PAT model.
+    """
+    named = {}
+    unnamed = []
+    asserts = []
+    for declaration in split_declarations(code):
+        if declaration.startswith('#assert'):
+            asserts.append(declaration)
+            continue
+        names = _declared_names(declaration)
+        if not names:
+            unnamed.append(declaration)
+        for name in names:
+            named.setdefault(name, []).append(declaration)
+    return named, unnamed, asserts
+
+
+def dependency_cone(named, assertion):
+    """
+    Declarations an assertion depends on: those of the names it refers to, and of the names they refer to.
+    """
+    cone = set()
+    seen = set()
+    pending = set(_IDENTIFIER.findall(assertion))
+    while pending:
+        name = pending.pop()
+        seen.add(name)
+        for declaration in named.get(name, []):
+            if declaration not in cone:
+                cone.add(declaration)
+                pending.update(set(_IDENTIFIER.findall(declaration)) - seen)
+    return cone
+
+
+def assertion_fingerprint(block):
+    """
+    Hash of the single #assert of a verification block and of its dependency cone, None if the block
+    does not hold exactly one #assert.
+    """
+    named, unnamed, asserts = parse_model(block)
+    if len(asserts) != 1:
+        return None
+    # What the analysis does not recognise may depend on anything it refers to
+    cone = sorted(dependency_cone(named, ' '.join([asserts[0]] + unnamed)))
+    payload = '\n'.join([asserts[0]] + unnamed + cone)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def affected_blocks(previous_blocks, blocks):
+    """
+    Indices of the verification blocks whose verdict may differ from that of the previous block at the same index.
+    Every block is affected if the number of assertions changed.
+    """
+    if len(previous_blocks) != len(blocks):
+        return list(range(len(blocks)))
+    affected = []
+    for i, (previous_block, block) in enumerate(zip(previous_blocks, blocks)):
+        fingerprint = assertion_fingerprint(block)
+        if fingerprint is None or fingerprint != assertion_fingerprint(previous_block):
+            affected.append(i)
+    if not affected and blocks and any(
+        split_declarations(previous_block) != split_declarations(block)
+        for previous_block, block in zip(previous_blocks, blocks)
+    ):
+        # The model only changed outside of every cone: PAT still has to parse the new model once
+        affected = [0]
+    return affected
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python pat_deps.py previous.csp refined.csp")
+    from pat_runner import split_code_and_assertions
+    codes = []
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            codes.append(f.read())
+    previous_blocks, blocks = (split_code_and_assertions(code) for code in codes)
+    affected = affected_blocks(previous_blocks, blocks)
+    for i, block in enumerate(blocks):
+        print(f"{i:>3} {'verify' if i in affected else 'reuse':<6}  {parse_model(block)[2][0]}")
@@ -0,0 +1,174 @@
+###### PAT output parser
+# Turns the console output of PAT into one PatResult per verified assertion:
+#   verdict ('Valid' / 'Invalid' / '' if PAT gave none), the witness or counterexample trace as a list of events,
+#   the verification settings (search engine, ...) and statistics (visited states, transitions, time, memory).
+# The parser works line by line, so an output file is parsed while it is read, without loading it whole,
+# and a multi-assertion output (one PAT launch for several #asserts) yields its results one after the other.
+# Usage:
+#   python pat_output.py pat_output_0.txt [more outputs...]
+import re
+import sys
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_RESULT_HEADER = "********Verification Result********"
+_SETTING_HEADER = "********Verification Setting********"
+_STATISTICS_HEADER = "********Verification Statistics********"
+_SECTIONS = {_RESULT_HEADER: 'result', _SETTING_HEADER: 'setting', _STATISTICS_HEADER: 'statistics'}
+
+# "********Verification Statistics********" lines
+_STATISTICS = {
+    'visitedStates': (re.compile(r'Visited States:\s*([\d.]+)'), int),
+    'totalTransitions': (re.compile(r'Total Transitions:\s*([\d.]+)'), int),
+    'timeUsed': (re.compile(r'Time Used:\s*([\d.]+)\s*s'), float),
+    'memoryKB': (re.compile(r'Estimated Memory Used:\s*([\d.]+)\s*KB'), float),
+}
+
+
+def empty_statistics():
+    return {name: None for name in _STATISTICS}
+
+
+@dataclass
+class PatResult:
+    """
+    What PAT reported for one assertion.
+    `result_text` is the "Verification Result" section, None if the output has none (e.g. a syntax error).
+    """
+    assertion: str = ""
+    result_text: Optional[str] = None
+    verdict: str = ""
+    trace: List[str] = field(default_factory=list)
+    settings: Dict[str, str] = field(default_factory=dict)
+    statistics: Dict[str, Optional[float]] = field(default_factory=empty_statistics)
+
+    @property
+    def engine(self):
+        return self.settings.get('Search Engine', "")
+
+    @property
+    def trace_text(self):
+        """
+        The trace as PAT prints it, "<init -> a -> b>", or "" if there is none.
+        """
+        return format_trace(self.trace) if self.trace else ""
+
+    def to_dict(self):
+        return {
+            'verdict': self.verdict,
+            'trace': self.trace,
+            'engine': self.engine,
+            'settings': self.settings,
+            'statistics': self.statistics
+        }
+
+
+def format_trace(events):
+    return "<" + " -> ".join(events) + ">"
+
+
+def _verdict(result_text):
+    match = re.search(r"is\s+(\w+)", result_text, re.IGNORECASE)
+    if not match:
+        return ""
+    return "Valid" if match.group(1).upper() == "VALID" else "Invalid"
+
+
+def _trace(result_text):
+    for line in result_text.split("\n"):
+        line = line.strip()
+        if line.startswith("<") and "->" in line:
+            return [event.strip() for event in line.strip("<>").split("->")]
+    return []
+
+
+class _Builder:
+    def __init__(self):
+        self.result = PatResult()
+        self.section = None
+        self.result_lines = []
+        self.started = False
+
+    def feed(self, line):
+        self.started = True
+        if line.startswith("Assertion:"):
+            self.result.assertion = line[len("Assertion:"):].strip()
+            return
+        stripped = line.strip()
+        if stripped in _SECTIONS:
+            if self.section == 'result' and _SECTIONS[stripped] == 'setting':
+                # Same span as the text between the result and setting headers
+                self.result.result_text = "\n".join(self.result_lines).strip()
+            self.section = _SECTIONS[stripped]
+            return
+        if self.section == 'result':
+            self.result_lines.append(line)
+        elif self.section == 'setting' and ':' in stripped:
+            name, value = stripped.split(':', 1)
+            self.result.settings[name.strip()] = value.strip()
+        elif self.section == 'statistics':
+            for name, (pattern, convert) in _STATISTICS.items():
+                match = pattern.match(stripped)
+                if match:
+                    self.result.statistics[name] = convert(float(match.group(1)))
+
+    def finish(self):
+        if self.result.result_text is not None:
+            self.result.verdict = _verdict(self.result.result_text)
+            self.result.trace = _trace(self.result.result_text)
+        return self.result
+
+
+def iter_results(lines):
+    """
+    PatResult of every assertion in `lines` (an iterable of output lines, e.g. an open file), as each one ends.
+    """
+    builder = _Builder()
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if re.match(r'=+\s*$', line):
+            # The separator before the "Assertion:" header of the next assertion
+            if builder.started:
+                yield builder.finish()
+                builder = _Builder()
+            continue
+        builder.feed(line)
+    if builder.started:
+        yield builder.finish()
+
+
+def parse_output(output):
+    """
+    PatResult of every assertion of an output string.
+    """
+    return list(iter_results(output.splitlines()))
+
+
+def parse_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_results(f))
+
+
+def parse_assertion_output(output):
+    """
+    PatResult of a single-assertion output. An empty or unparseable output gives an empty PatResult.
+    """
+    return next(iter_results(output.splitlines()), PatResult())
+
+
+def total_visited_states(results):
+    """
+    Sum of the visited states over a list of verification results (dicts with 'statistics'), None if none is known.
+    """
+    counts = [(result.get('statistics') or {}).get('visitedStates') for result in results]
+    counts = [count for count in counts if count is not None]
+    return sum(counts) if counts else None
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python pat_output.py pat_output_0.txt [more outputs...]")
+    for path in sys.argv[1:]:
+        for result in parse_file(path):
+            print(json.dumps({'file': path, 'assertion': result.assertion, **result.to_dict()}, indent=2))
@@ -0,0 +1,200 @@
+###### PAT runner
+import os
+import re
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrency limit and per-job timeout (seconds) for PAT runs, overridable via environment
+PAT_MAX_WORKERS = int(os.environ.get("PAT_MAX_WORKERS", os.cpu_count() or 1))
+PAT_JOB_TIMEOUT = int(os.environ.get("PAT_JOB_TIMEOUT", 300))
+# Verify all assertions sharing a search engine in a single PAT launch instead of one launch per assertion
+PAT_SINGLE_LAUNCH = os.environ.get("PAT_SINGLE_LAUNCH", "0") == "1"
+
+# PAT prints a line of '=' before the "Assertion:" header of every verified assertion
+_ASSERTION_HEADER = re.compile(r'(?m)^=+[ \t]*\r?\n(?=Assertion:)')
+# How often a cancellable PAT run checks whether it was cancelled (seconds)
+_CANCEL_POLL_INTERVAL = 0.2
+
+# PAT launches requested by the current process
+launch_stats = {'launches': 0}
+
+_lock = threading.Lock()
+
+
+def select_engine(block):
+    """
+    Reachability and deadlock checks use engine 1 (shortest witness trace, BFS),
+    everything else uses PAT's default engine.
+    """
+    if ('reaches' in block) or ('deadlockfree' in block):
+        return "1"
+    return None
+
+
+def build_pat_command(root_path, input_file, output_file, engine=None):
+    command = ["mono", f"{root_path}/PAT.Console/Process-Analysis-Toolkit/PAT3.Console.exe", "-csp"]
+    if engine is not None:
+        command += ["-engine", engine]
+    command += [input_file, output_file]
+    return command
+
+
+def _run_cancellable(command, timeout, cancel):
+    """
+    subprocess.run(command, check=True, timeout=timeout), killing PAT as soon as the `cancel` event is set.
+    Returns False if the run was cancelled.
+    """
+    with subprocess.Popen(command) as process:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                returncode = process.wait(timeout=max(0.0, min(_CANCEL_POLL_INTERVAL, deadline - time.monotonic())))
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    process.kill()
+                    process.wait()
+                    return False
+                if time.monotonic() >= deadline:
+                    process.kill()
+                    process.wait()
+                    raise subprocess.TimeoutExpired(command, timeout)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command)
+    return True
+
+
+def run_pat_job(command, timeout=None, cancel=None):
+    """
+    Run one PAT command and report how it ended instead of raising,
+    so a single failing job does not tear down the rest of the pool.
+    'elapsed' is the wall time of the run in seconds.
+    Setting the `cancel` event (threading.Event) kills the PAT process and ends the job with status 'cancelled'.
+    """
+    if timeout is None:
+        timeout = PAT_JOB_TIMEOUT
+    start = time.perf_counter()
+    try:
+        if cancel is None:
+            subprocess.run(command, check=True, timeout=timeout)
+            status = {'status': 'ok', 'error': ''}
+        elif cancel.is_set() or not _run_cancellable(command, timeout, cancel):
+            status = {'status': 'cancelled', 'error': 'Cancelled'}
+        else:
+            status = {'status': 'ok', 'error': ''}
+    except subprocess.TimeoutExpired as e:
+        status = {'status': 'timeout', 'error': str(e)}
+    except subprocess.CalledProcessError as e:
+        status = {'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        status = {'status': 'error', 'error': str(e)}
+    status['elapsed'] = time.perf_counter() - start
+    return status
+
+
+def run_pat_jobs(commands, max_workers=None, timeout=None, cancel=None):
+    """
+    Run PAT commands on a bounded worker pool.
+    Returns one status dict per command, in the same order as `commands`.
+    Setting the `cancel` event kills the running commands and cancels the others.
+    """
+    if not commands:
+        return []
+    if max_workers is None:
+        max_workers = PAT_MAX_WORKERS
+    max_workers = max(1, min(max_workers, len(commands)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda command: run_pat_job(command, timeout, cancel), commands))
+
+
+def run_verifications(root_path, jobs, max_workers=None, timeout=None, cancel=None):
+    """
+    Run PAT on a list of (input_file, output_file, engine) jobs, on a pool of at most `max_workers` PAT processes.
+    Returns one status dict per job ({'status': 'ok' | 'timeout' | 'failed' | 'error', 'error': ...}), in job order.
+    Setting the `cancel` event (threading.Event) kills the running PAT processes (status 'cancelled').
+    """
+    if not jobs:
+        return []
+    with _lock:
+        launch_stats['launches'] += len(jobs)
+    commands = [build_pat_command(root_path, input_file, output_file, engine) for input_file, output_file, engine in jobs]
+    return run_pat_jobs(commands, max_workers=max_workers, timeout=timeout, cancel=cancel)
+
+
+def split_assertion_outputs(output):
+    """
+    Split the console output of a multi-assertion PAT run into one chunk per assertion.
+    PAT verifies assertions in the order they are declared, so chunk k belongs to the k-th #assert of the file.
+    Each chunk keeps its separator line, so it reads exactly like the output of a single-assertion run.
+    """
+    starts = [m.start() for m in _ASSERTION_HEADER.finditer(output)]
+    return [output[start:end] for start, end in zip(starts, starts[1:] + [len(output)])]
+
+
+def parse_code_and_assertions(code):
+    """
+    Separate PAT code into the model body, the (deduplicated) #define lines that go
+    with the assertions, and the #assert lines themselves.
+    """
+    # Match any number of `#define…\n` lines, then one `#assert…;?`
+    pat = re.compile(
+        r'(?m)'                   # multiline mode
+        r'(?:'                    # start group for repeated #defines
+            r'^(?!\s*//)\s*'        # ── must be at line start, not // comment
+            r'#define[^\n]*\n'      # ── a real #define line
+        r')*'                     # repeat zero or more times
+        r'^(?!\s*//)\s*'          # ── now for the #assert line…
+        r'#assert[^\n]*;?'        # ── a real #assert
+        )
+    # body = everything except those define/assert pairs
+    body = pat.sub('', code).strip()
+    # capture each define+assert block
+    blocks = pat.findall(code)
+    defs, asserts = [], []
+    for blk in blocks:
+        lines = blk.splitlines()
+        # if it starts with a define, collect it
+        for line in lines[:-1]:
+            if line.startswith('#define'):
+                defs.append(line)
+        # the last line is always the #assert
+        asserts.append(lines[-1])
+    # dedupe while preserving order
+    seen = set()
+    uniq_defs = [d for d in defs if not (d in seen or seen.add(d))]
+    return body, uniq_defs, asserts
+
+
+def split_code_and_assertions(code):
+    """
+    Split PAT code into separate blocks for verification, one per assertion.
+    """
+    body, uniq_defs, asserts = parse_code_and_assertions(code)
+    # build one output per assertion
+    return [
+        body + '\n\n' + '\n'.join(uniq_defs + [a])
+        for a in asserts
+    ]
+
+
+def group_code_by_engine(code, indices=None):
+    """
+    Build one verification file per PAT search engine, holding the model body, the #defines
+    and every #assert (restricted to `indices` if given) that would be verified with that engine.
+    Returns a list of (engine, assertion indices, code) tuples.
+    """
+    body, uniq_defs, asserts = parse_code_and_assertions(code)
+    if indices is None:
+        indices = range(len(asserts))
+    groups = {}
+    for i in indices:
+        a = asserts[i]
+        # same engine choice as for the single-assertion block
+        engine = select_engine(body + '\n\n' + '\n'.join(uniq_defs + [a]))
+        groups.setdefault(engine, []).append(i)
+    return [
+        (engine, indices, body + '\n\n' + '\n'.join(uniq_defs + [asserts[i] for i in indices]))
+        for engine, indices in groups.items()
+    ]
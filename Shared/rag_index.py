@@ -0,0 +1,439 @@
+###### RAG index
+# Persistent retrieval indexes over the example databases (database-rag-claude.json: {"nl", "code"} entries,
+# database-algorithm.json: {"id", "name", "description", ...} entries), used to pick few-shot examples without
+# refitting or re-encoding the database on every call. Two backends, selected with RAG_RETRIEVER:
+#   - 'tfidf' (default): TF-IDF rows of the text field as a memory-mapped .npy matrix, with the fitted vocabulary
+#     and IDF weights. Scores are cosine similarities, as with TfidfVectorizer + cosine_similarity.
+#   - 'embedding': sentence embeddings of the text field (RAG_EMBEDDING_MODEL) as a float16 .npy matrix. The model
+#     is only loaded when a database or query has to be encoded; RAG_EMBEDDING_DEVICE=cpu keeps it off the GPU.
+# An index lives next to its database, in <database>.rag-index/<backend>-<field>/, together with the database's
+# size / mtime / sha256, so that an edited database is detected and the index rebuilt on the next query.
+# add() appends entries to the database and the index without refitting (TF-IDF: until the database has doubled
+# since the last fit).
+# Usage:
+#   python rag_index.py ./database-rag-claude.json [--backend embedding] [--rebuild] [--query "NL annotation" -k 3]
+import os
+import re
+import json
+import uuid
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows, threads are still serialised
+    fcntl = None
+
+INDEX_VERSION = 2
+RAG_RETRIEVER = os.environ.get("RAG_RETRIEVER", "tfidf")
+RAG_EMBEDDING_MODEL = os.environ.get("RAG_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Device for the embedding model ('cpu', 'cuda', ...; default: picked by sentence-transformers)
+RAG_EMBEDDING_DEVICE = os.environ.get("RAG_EMBEDDING_DEVICE") or None
+RAG_EMBEDDING_BATCH_SIZE = int(os.environ.get("RAG_EMBEDDING_BATCH_SIZE", 32))
+
+# TfidfVectorizer's default tokenisation (lowercase, tokens of 2+ word characters)
+_TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+_thread_lock = threading.RLock()
+_indexes = {}
+_models = {}
+
+
+def index_dir_for(source_path, backend, text_field):
+    """
+    ./database-rag-claude.json -> ./database-rag-claude.rag-index/tfidf-nl
+    """
+    return os.path.join(f"{os.path.splitext(source_path)[0]}.rag-index", f"{backend}-{text_field}")
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_state(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns}
+
+
+@contextmanager
+def _locked(index_dir):
+    os.makedirs(os.path.dirname(index_dir), exist_ok=True)
+    with _thread_lock:
+        with open(f"{index_dir}.lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _top_k(scores, k):
+    # Stable, so ties go to the earlier entry as with argmax
+    return np.argsort(-scores, kind='stable')[:max(1, k)]
+
+
+class _PersistentIndex:
+    """
+    Storage, invalidation and insertion shared by the backends. A backend stores named arrays per build
+    (`_fit` / `_extend`) and scores queries against them (`_scores`).
+    """
+    backend = None
+    _ARRAYS = ()
+
+    def __init__(self, source_path, text_field='nl', index_dir=None):
+        self.source_path = os.path.abspath(source_path)
+        self.text_field = text_field
+        self.index_dir = index_dir or index_dir_for(self.source_path, self.backend, text_field)
+        self.meta = None
+        self.entries = []
+        self.arrays = {}
+        self.rows = None  # database position of each row (entries without the text field have no row)
+
+    # --- backend hooks ---
+
+    def _params(self):
+        """
+        Settings the stored index depends on; a change triggers a rebuild.
+        """
+        return {}
+
+    def _fit(self, texts):
+        """
+        Arrays and json-serialisable state of a new index over `texts`.
+        """
+        raise NotImplementedError
+
+    def _extend(self, texts):
+        """
+        Arrays of the current index with `texts` appended, or None if the index has to be refit.
+        """
+        raise NotImplementedError
+
+    def _scores(self, texts):
+        """
+        (len(texts), rows) similarity matrix.
+        """
+        raise NotImplementedError
+
+    def _on_load(self):
+        pass
+
+    # --- loading and building ---
+
+    def _load(self):
+        with open(os.path.join(self.index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION or meta.get('params') != self._params():
+            raise ValueError("index settings changed")
+        build = meta['build']
+        self.arrays = {
+            name: np.load(os.path.join(self.index_dir, f"{name}.{build}.npy"), mmap_mode='r')
+            for name in self._ARRAYS
+        }
+        self.rows = np.load(os.path.join(self.index_dir, f"rows.{build}.npy"))
+        self.meta = meta
+        self._on_load()
+
+    def _is_fresh(self):
+        """
+        Whether the loaded index matches the database. Cheap when the file is untouched (one stat call);
+        a changed size or mtime is confirmed by hashing the file.
+        """
+        if self.meta is None:
+            return False
+        try:
+            state = _source_state(self.source_path)
+        except FileNotFoundError:
+            return False
+        if state == self.meta['source']['state']:
+            return True
+        if state['size'] == self.meta['source']['state']['size'] and _file_hash(self.source_path) == self.meta['source']['sha256']:
+            # Touched but not changed
+            self.meta['source']['state'] = state
+            return True
+        return False
+
+    def _read_entries(self):
+        with open(self.source_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, list) else []
+
+    def _write(self, entries, arrays, state, rows, fitted_count):
+        """
+        Write a new build of the index. The files of a build are never modified: meta.json, replaced last,
+        names the current build, so readers always see a consistent set of files.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        build = uuid.uuid4().hex[:12]
+        for name, array in arrays.items():
+            np.save(os.path.join(self.index_dir, f"{name}.{build}.npy"), array)
+        np.save(os.path.join(self.index_dir, f"rows.{build}.npy"), rows)
+        meta = {
+            'version': INDEX_VERSION,
+            'backend': self.backend,
+            'params': self._params(),
+            'build': build,
+            'source': {
+                'path': self.source_path,
+                'field': self.text_field,
+                'state': _source_state(self.source_path),
+                'sha256': _file_hash(self.source_path)
+            },
+            'count': len(entries),
+            'fittedCount': fitted_count,
+            'state': state
+        }
+        _write_json(os.path.join(self.index_dir, 'meta.json'), meta)
+        for name in os.listdir(self.index_dir):
+            if name != 'meta.json' and f".{build}." not in name:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+        self.entries = entries
+        self._load()
+
+    def build(self):
+        """
+        Fit the index on the text field of every database entry and write it.
+        """
+        entries = self._read_entries()
+        rows = np.array([position for position, entry in enumerate(entries) if entry.get(self.text_field)], dtype=np.int64)
+        arrays, state = self._fit([entries[position][self.text_field] for position in rows])
+        self._write(entries, arrays, state, rows, len(entries))
+        print(f"Built {self.backend} index for {self.source_path} ({self.text_field}): {len(rows)} entries")
+
+    def _try_load(self):
+        try:
+            self._load()
+            return self._is_fresh()
+        except (FileNotFoundError, ValueError, KeyError, json.JSONDecodeError):
+            return False
+
+    def ensure_fresh(self):
+        if self._is_fresh():
+            return self
+        with _locked(self.index_dir):
+            # Another process may have rebuilt the index while we waited for the lock
+            if self._try_load():
+                self.entries = self._read_entries()
+            else:
+                self.build()
+        return self
+
+    # --- querying ---
+
+    def search_many(self, texts, k=1):
+        """
+        For each of `texts`, the `k` database entries most similar to it, best first, as
+        [{'index', 'score', <entry fields>}, ...]. All texts are scored in one batch.
+        """
+        self.ensure_fresh()
+        if not len(self.rows):
+            return [[] for _ in texts]
+        scores = self._scores(texts)
+        results = []
+        for text, text_scores in zip(texts, scores):
+            if not text:
+                results.append([])
+                continue
+            matches = []
+            for row in _top_k(text_scores, k):
+                position = int(self.rows[row])
+                matches.append({**self.entries[position], 'index': position, 'score': float(text_scores[row])})
+            results.append(matches)
+        return results
+
+    def search(self, text, k=1):
+        return self.search_many([text], k)[0]
+
+    # --- insertion ---
+
+    def add(self, new_entries):
+        """
+        Append entries to the database and to the index, refitting only if the backend requires it.
+        """
+        with _locked(self.index_dir):
+            fresh = self._try_load()
+            entries = self._read_entries()
+            offset = len(entries)
+            entries += new_entries
+            _write_json(self.source_path, entries)
+            positions = [offset + n for n, entry in enumerate(new_entries) if entry.get(self.text_field)]
+            arrays = self._extend([entries[position][self.text_field] for position in positions]) if fresh else None
+            if arrays is None:
+                self.build()
+                return
+            rows = np.concatenate([self.rows, np.array(positions, dtype=np.int64)])
+            self._write(entries, arrays, self.meta['state'], rows, self.meta['fittedCount'])
+
+
+class TfidfIndex(_PersistentIndex):
+    backend = 'tfidf'
+    _ARRAYS = ('idf', 'vectors')
+
+    def _on_load(self):
+        self.vocabulary = self.meta['state']['vocabulary']
+
+    def _fit(self, texts):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        if not texts:
+            empty = {'idf': np.zeros(0, dtype=np.float32), 'vectors': np.zeros((0, 0), dtype=np.float32)}
+            return empty, {'vocabulary': {}}
+        vectorizer = TfidfVectorizer(dtype=np.float32)
+        vectors = vectorizer.fit_transform(texts).toarray()
+        vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+        return {'idf': vectorizer.idf_.astype(np.float32), 'vectors': vectors}, {'vocabulary': vocabulary}
+
+    def _vectorize(self, texts):
+        """
+        TF-IDF rows for `texts` with the stored vocabulary and IDF, L2-normalised.
+        """
+        vectors = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN_PATTERN.findall((text or '').lower()):
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    vectors[row, column] += 1
+        if len(self.vocabulary):
+            vectors *= self.arrays['idf']
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _extend(self, texts):
+        if self.meta['count'] + len(texts) >= 2 * max(1, self.meta['fittedCount']):
+            return None
+        return {'idf': self.arrays['idf'], 'vectors': np.concatenate([np.asarray(self.arrays['vectors']), self._vectorize(texts)])}
+
+    def _scores(self, texts):
+        if len(texts) == 1:
+            # Only the columns of the query's terms contribute
+            counts = {}
+            for token in _TOKEN_PATTERN.findall((texts[0] or '').lower()):
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            if not counts:
+                return np.zeros((1, len(self.rows)), dtype=np.float32)
+            columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.arrays['idf'][columns]
+            return (self.arrays['vectors'][:, columns] @ (weights / np.linalg.norm(weights)))[None, :]
+        return self._vectorize(texts) @ np.asarray(self.arrays['vectors']).T
+
+
+def _get_model(name, device):
+    """
+    The sentence-transformers model, loaded on first use and shared by every embedding index of the process.
+    """
+    with _thread_lock:
+        if (name, device) not in _models:
+            from sentence_transformers import SentenceTransformer
+            print(f"Loading embedding model {name} on {device or 'default device'}...")
+            _models[(name, device)] = SentenceTransformer(name, device=device)
+        return _models[(name, device)]
+
+
+class EmbeddingIndex(_PersistentIndex):
+    backend = 'embedding'
+    _ARRAYS = ('embeddings',)
+
+    def __init__(self, source_path, text_field='nl', index_dir=None, model_name=None, device=None):
+        self.model_name = model_name or RAG_EMBEDDING_MODEL
+        self.device = device or RAG_EMBEDDING_DEVICE
+        super().__init__(source_path, text_field, index_dir)
+
+    def _params(self):
+        return {'model': self.model_name}
+
+    def _on_load(self):
+        # Stored as float16 to halve the file; scored in float32, which numpy multiplies much faster
+        self.matrix = np.asarray(self.arrays['embeddings'], dtype=np.float32)
+
+    def _encode(self, texts):
+        model = _get_model(self.model_name, self.device)
+        return model.encode(list(texts), batch_size=RAG_EMBEDDING_BATCH_SIZE, convert_to_numpy=True,
+                            normalize_embeddings=True, show_progress_bar=False).astype(np.float32)
+
+    def _fit(self, texts):
+        if not texts:
+            return {'embeddings': np.zeros((0, 0), dtype=np.float16)}, {}
+        return {'embeddings': self._encode(texts).astype(np.float16)}, {}
+
+    def _extend(self, texts):
+        if not texts:
+            return {'embeddings': self.arrays['embeddings']}
+        if not len(self.rows):
+            return None
+        return {'embeddings': np.concatenate([np.asarray(self.arrays['embeddings']), self._encode(texts).astype(np.float16)])}
+
+    def _scores(self, texts):
+        return self._encode([text or '' for text in texts]) @ self.matrix.T
+
+
+BACKENDS = {
+    TfidfIndex.backend: TfidfIndex,
+    EmbeddingIndex.backend: EmbeddingIndex
+}
+
+
+def get_index(source_path, text_field='nl', backend=None):
+    """
+    The index of the database at `source_path`, loaded once per process and checked for changes on every use.
+    """
+    backend = backend or RAG_RETRIEVER
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown retriever backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    key = (os.path.abspath(source_path), text_field, backend)
+    with _thread_lock:
+        if key not in _indexes:
+            _indexes[key] = BACKENDS[backend](source_path, text_field)
+        return _indexes[key]
+
+
+def search(source_path, text, k=1, text_field='nl', backend=None):
+    with _thread_lock:
+        return get_index(source_path, text_field, backend).search(text, k)
+
+
+def add_examples(source_path, new_entries, text_field='nl', backend=None):
+    with _thread_lock:
+        get_index(source_path, text_field, backend).add(new_entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build or query the retrieval index of an example database")
+    parser.add_argument('source', nargs='?', default='./database-rag-claude.json')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=RAG_RETRIEVER)
+    parser.add_argument('--field', default='nl', help="entry field that is indexed (database-algorithm.json: description)")
+    parser.add_argument('--rebuild', action='store_true', help="refit the index even if the database is unchanged")
+    parser.add_argument('--query', default=None, help="print the most similar entries to this text")
+    parser.add_argument('-k', type=int, default=3)
+    args = parser.parse_args()
+    index = get_index(args.source, args.field, args.backend)
+    if args.rebuild:
+        with _locked(index.index_dir):
+            index.build()
+    else:
+        index.ensure_fresh()
+    if args.query is not None:
+        for result in index.search(args.query, args.k):
+            print(f"{result['score']:.4f}  #{result['index']}  {str(result[args.field])[:100]!r}")
@@ -0,0 +1,477 @@
+###### Tracing
+# Nested timing spans for the pipelines and the Interface server, replacing the ./run_time_record/<model>.json files:
+#   model (one pipeline run of one dataset entry)
+#     stage     const-var, action, nl-annotation, code-generation, refinement
+#       attempt   one code generation attempt / one refinement round
+#         step      codegen, refine, verification
+#           llm / pat   one LLM request (tokens in and out, prompt size, retries) / one PAT run (verification statistics)
+# Spans nest through a context variable, so a span opened inside another one becomes its child, also across the
+# llm_client event loop thread. Spans opened outside of a trace() are not recorded.
+# When the model span of a trace ends, the whole trace is written as one compact columnar segment
+# (gzipped JSON, one array per column, repeated strings stored once): <TRACE_DIR>/<model>/<time>-<pid>-<n>.spans.json.gz
+# Segments are only ever added, never rewritten; `compact` merges the segments of every model into one.
+# Usage:
+#   python tracing.py summary ./traces [--output summary.json]   (per-model times, averages and distributions)
+#   python tracing.py compact ./traces
+#   python tracing.py import-legacy ./run_time_record ./traces   (convert old run_time_record/<model>.json files)
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import uuid
+import argparse
+import datetime
+import functools
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Set TRACING=0 to record nothing
+TRACING_ENABLED = os.environ.get("TRACING", "1") != "0"
+TRACE_DIR = os.environ.get("TRACE_DIR", "./traces")
+
+FORMAT = "spans-columnar"
+FORMAT_VERSION = 1
+SEGMENT_SUFFIX = ".spans.json.gz"
+# Columns every span has; attributes (tokensIn, visitedStates, attempt, ...) become further columns
+BASE_COLUMNS = ('traceId', 'spanId', 'parentId', 'model', 'kind', 'name', 'start', 'duration', 'status', 'error')
+
+_current = contextvars.ContextVar('tracing_current_span', default=None)
+_lock = threading.Lock()
+_segment_counter = itertools.count()
+
+
+class _Trace:
+    def __init__(self, model, trace_dir):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.model = model
+        self.trace_dir = os.path.abspath(trace_dir)
+        self.spans = []
+
+
+class Span:
+    """
+    One timed operation. Attributes are set with set(); the span is recorded when it ends.
+    """
+    def __init__(self, trace, parent, name, kind, attributes):
+        self.trace = trace
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.status = 'ok'
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def elapsed(self):
+        """
+        Seconds since the span started (its duration once it has ended).
+        """
+        return self.duration if self.duration is not None else time.perf_counter() - self._start
+
+    def end(self, duration=None):
+        self.duration = time.perf_counter() - self._start if duration is None else duration
+        if self.trace is None:
+            return
+        row = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'parentId': self.parent.span_id if self.parent is not None and self.parent.trace is self.trace else None,
+            'model': self.trace.model,
+            'kind': self.kind,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6),
+            'status': self.status,
+            'error': self.error
+        }
+        for key, value in self.attributes.items():
+            if key not in row:
+                row[key] = value
+        with _lock:
+            self.trace.spans.append(row)
+
+
+def current():
+    """
+    The innermost open span (a non-recording one outside of any trace), for setting attributes from inside a stage.
+    """
+    return _current.get() or Span(None, None, "", "", {})
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = 'error'
+        span.error = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+@contextmanager
+def trace(model, name='pipeline', trace_dir=None, **attributes):
+    """
+    Root span of one model run. All spans opened inside it are written out together when it ends.
+    """
+    if not TRACING_ENABLED:
+        with _activate(Span(None, None, name, 'model', attributes)) as root:
+            yield root
+        return
+    root = Span(_Trace(model, trace_dir or TRACE_DIR), None, name, 'model', attributes)
+    try:
+        with _activate(root):
+            yield root
+    finally:
+        try:
+            export_trace(root.trace)
+        except OSError as e:
+            print(f"Error exporting trace of {model}: {e}")
+
+
+@contextmanager
+def span(name, kind='step', **attributes):
+    """
+    Child span of the current span. Outside of a trace, a span that records nothing.
+    """
+    parent = _current.get()
+    trace_ = parent.trace if parent is not None else None
+    with _activate(Span(trace_, parent, name, kind, attributes)) as child:
+        yield child
+
+
+def traced(name, kind='step'):
+    """
+    Decorator: run the function inside span(name, kind).
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name, kind, duration, status='ok', **attributes):
+    """
+    Record an operation that has already finished (e.g. a PAT run on a worker thread) as a child of the current span.
+    """
+    parent = _current.get()
+    if parent is None or parent.trace is None:
+        return
+    child = Span(parent.trace, parent, name, kind, attributes)
+    child.status = status
+    child.start -= duration or 0.0
+    child.end(duration or 0.0)
+
+
+def record_model_span(model, name, kind, duration, trace_dir=None, **attributes):
+    """
+    A finished span reported from outside a pipeline run (e.g. a stage timed by the front-end), written out at once
+    as a trace of its own.
+    """
+    if not TRACING_ENABLED:
+        return
+    model_trace = _Trace(model, trace_dir or TRACE_DIR)
+    span_ = Span(model_trace, None, name, kind, attributes)
+    span_.start -= duration or 0.0
+    span_.end(duration or 0.0)
+    export_trace(model_trace)
+
+
+# ---------- columnar segments ----------
+
+def _safe_name(model):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', model or 'unknown_model')
+
+
+def _encode_column(values):
+    """
+    Columns of strings (and nulls) store every distinct string once: {"dict": [...], "codes": [...]}, -1 for null.
+    """
+    if all(value is None or isinstance(value, str) for value in values):
+        dictionary = {}
+        codes = [-1 if value is None else dictionary.setdefault(value, len(dictionary)) for value in values]
+        return {'dict': list(dictionary), 'codes': codes}
+    return values
+
+
+def _decode_column(column):
+    if isinstance(column, dict):
+        dictionary = column['dict']
+        return [None if code < 0 else dictionary[code] for code in column['codes']]
+    return column
+
+
+def write_segment(path, rows):
+    columns = list(BASE_COLUMNS)
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    segment = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'count': len(rows),
+        'columns': {column: _encode_column([row.get(column) for row in rows]) for column in columns}
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(segment, f, separators=(',', ':'), default=str)
+    os.replace(tmp_path, path)
+
+
+def read_segment(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        segment = json.load(f)
+    if segment.get('format') != FORMAT:
+        raise ValueError(f"{path} is not a span segment")
+    columns = {name: _decode_column(column) for name, column in segment['columns'].items()}
+    return [
+        {name: values[k] for name, values in columns.items() if values[k] is not None}
+        for k in range(segment['count'])
+    ]
+
+
+def export_trace(model_trace):
+    with _lock:
+        rows, model_trace.spans = model_trace.spans, []
+    if not rows:
+        return None
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(
+        model_trace.trace_dir, _safe_name(model_trace.model),
+        f"{stamp}-{os.getpid()}-{next(_segment_counter)}{SEGMENT_SUFFIX}"
+    )
+    write_segment(path, rows)
+    return path
+
+
+def segment_paths(trace_dir):
+    paths = []
+    for directory, _, files in os.walk(trace_dir):
+        paths += [os.path.join(directory, name) for name in files if name.endswith(SEGMENT_SUFFIX)]
+    return sorted(paths)
+
+
+def load_spans(trace_dir):
+    """
+    All spans under `trace_dir`, oldest segment first.
+    """
+    spans = []
+    for path in segment_paths(trace_dir):
+        spans += read_segment(path)
+    return spans
+
+
+def compact(trace_dir):
+    """
+    Merge the segments of every model directory into a single segment.
+    """
+    merged = []
+    for directory in sorted({os.path.dirname(path) for path in segment_paths(trace_dir)}):
+        paths = [path for path in segment_paths(directory) if os.path.dirname(path) == directory]
+        if len(paths) < 2:
+            continue
+        rows = []
+        for path in paths:
+            rows += read_segment(path)
+        target = os.path.join(directory, f"compacted-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}{SEGMENT_SUFFIX}")
+        write_segment(target, rows)
+        for path in paths:
+            os.remove(path)
+        merged.append((directory, len(paths), len(rows)))
+    return merged
+
+
+def import_legacy(run_time_dir, trace_dir):
+    """
+    Convert ./run_time_record/<model>.json files ({"codegen-time_<timestamp>": {"runTime": ...}, ...}) into segments.
+    """
+    converted = []
+    for name in sorted(os.listdir(run_time_dir)):
+        if not name.endswith('.json'):
+            continue
+        model = os.path.splitext(name)[0]
+        with open(os.path.join(run_time_dir, name), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        model_trace = _Trace(model, trace_dir)
+        for key, value in records.items():
+            stage, kind, attributes = legacy_stage(key)
+            if isinstance(value, dict):
+                attributes.update({k: v for k, v in value.items() if k != 'runTime'})
+                duration = value.get('runTime')
+            else:
+                duration = value
+            span_ = Span(model_trace, None, stage, kind, attributes)
+            span_.end(float(duration or 0.0))
+        converted.append((model, export_trace(model_trace)))
+    return converted
+
+
+def legacy_stage(key):
+    """
+    'refine-time_2_2025-05-01-10-00-00' -> ('refine', 'step', {'round': 2}); 'const-var-time' -> ('const-var', 'stage', {})
+    """
+    match = re.match(r'(?P<stage>[A-Za-z-]+?)-time(?:_(?P<rest>.*))?$', key)
+    if not match:
+        return key, 'stage', {}
+    stage = match.group('stage')
+    attributes = {}
+    rest = match.group('rest') or ""
+    if stage == 'refine' and rest.split('_')[0].isdigit():
+        attributes['round'] = int(rest.split('_')[0])
+    kind = 'step' if stage in STEP_NAMES else 'stage'
+    return stage, kind, attributes
+
+
+# ---------- summaries ----------
+
+SINGLE_STAGES = {'const-var': 'const_var_time', 'action': 'action_time', 'nl-annotation': 'nl_annotation_time'}
+STEP_NAMES = ('codegen', 'verification', 'refine')
+TIME_COLUMNS = (
+    'const_var_time', 'action_time', 'nl_annotation_time', 'total_codegen_time', 'avg_codegen_time',
+    'total_refine_time', 'avg_refine_time', 'total_verif_time', 'avg_verif_time', 'total_llm_time', 'total_pat_time'
+)
+PERCENTILES = (25, 50, 75)
+
+
+def summarize_model(spans):
+    """
+    Per-model figures of eval_time.ipynb (stage times; number, total and average of code generations, refinements
+    and verifications) plus the LLM and PAT cost of the model.
+    """
+    summary = {column: 0.0 for column in SINGLE_STAGES.values()}
+    for stage, column in SINGLE_STAGES.items():
+        durations = [span_['duration'] for span_ in spans if span_['name'] == stage and span_['kind'] == 'stage']
+        # A rerun replaces the earlier time, as in the run_time_record files
+        summary[column] = durations[-1] if durations else 0.0
+
+    def steps(name):
+        return [span_ for span_ in spans if span_['name'] == name and span_['kind'] == 'step']
+
+    codegen = [span_['duration'] for span_ in steps('codegen')]
+    verify = [span_['duration'] for span_ in steps('verification')]
+    refine = steps('refine')
+    refine_times = [span_['duration'] for span_ in refine]
+    llm = [span_ for span_ in spans if span_['kind'] == 'llm']
+    pat = [span_ for span_ in spans if span_['kind'] == 'pat']
+    # Time to the first token of the streamed LLM requests
+    ttft = [span_['ttft'] for span_ in llm if span_.get('ttft') is not None]
+    summary.update({
+        'num_codegen': len(codegen),
+        'total_codegen_time': sum(codegen),
+        'avg_codegen_time': sum(codegen) / len(codegen) if codegen else 0.0,
+        'total_refine_rounds': max([span_.get('round', 0) for span_ in refine], default=0),
+        'total_refine_attempts': len(refine),
+        'total_refine_time': sum(refine_times),
+        'avg_refine_time': sum(refine_times) / len(refine_times) if refine_times else 0.0,
+        'num_verifications': len(verify),
+        'total_verif_time': sum(verify),
+        'avg_verif_time': sum(verify) / len(verify) if verify else 0.0,
+        'llm_calls': len(llm),
+        'llm_retries': sum(span_.get('retries', 0) for span_ in llm),
+        'tokens_in': sum(span_.get('tokensIn', 0) for span_ in llm),
+        'tokens_out': sum(span_.get('tokensOut', 0) for span_ in llm),
+        'cached_tokens_in': sum(span_.get('cachedTokensIn', 0) for span_ in llm),
+        'cache_write_tokens': sum(span_.get('cacheWriteTokens', 0) for span_ in llm),
+        'total_llm_time': sum(span_['duration'] for span_ in llm),
+        'avg_ttft': sum(ttft) / len(ttft) if ttft else 0.0,
+        'pat_runs': len(pat),
+        'total_pat_time': sum(span_['duration'] for span_ in pat),
+        'max_visited_states': max([span_.get('visitedStates', 0) for span_ in pat], default=0)
+    })
+    return summary
+
+
+def _percentile(sorted_values, q):
+    """
+    Linear interpolation between the closest ranks (pandas' default).
+    """
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def distribution(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    mean = sum(values) / len(values)
+    std = (sum((value - mean) ** 2 for value in values) / (len(values) - 1)) ** 0.5 if len(values) > 1 else 0.0
+    stats = {'min': values[0]}
+    stats.update({f"{q}%": _percentile(values, q) for q in PERCENTILES})
+    stats.update({'max': values[-1], 'mean': mean, 'std': std})
+    return stats
+
+
+def summarize(trace_dir):
+    """
+    {'perSystem': [per-model summary], 'averages': {column: mean}, 'timeDistributions': {time column: stats}}
+    """
+    by_model = {}
+    for span_ in load_spans(trace_dir):
+        by_model.setdefault(span_.get('model', 'unknown_model'), []).append(span_)
+    per_system = [{'system': model, **summarize_model(spans)} for model, spans in sorted(by_model.items())]
+    numeric = [column for column in (per_system[0] if per_system else {}) if column != 'system']
+    averages = {column: sum(row[column] for row in per_system) / len(per_system) for column in numeric}
+    distributions = {column: distribution([row[column] for row in per_system]) for column in TIME_COLUMNS}
+    return {'perSystem': per_system, 'averages': averages, 'timeDistributions': distributions}
+
+
+def _print_summary(result):
+    print(f"{len(result['perSystem'])} models")
+    print(f"\n{'time (s)':<22}" + "".join(f"{name:>10}" for name in ('min', '25%', '50%', '75%', 'max', 'mean', 'std')))
+    for column, stats in result['timeDistributions'].items():
+        if stats:
+            print(f"{column:<22}" + "".join(f"{stats[name]:>10.2f}" for name in ('min', '25%', '50%', '75%', 'max', 'mean', 'std')))
+    print("\naverages per model")
+    for column, value in result['averages'].items():
+        print(f"  {column:<22} {value:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize, compact or import pipeline traces")
+    commands = parser.add_subparsers(dest='command', required=True)
+    summary_parser = commands.add_parser('summary', help="per-model times, averages and distributions")
+    summary_parser.add_argument('trace_dir', nargs='?', default=TRACE_DIR)
+    summary_parser.add_argument('--output', default=None, help="also save the summary as JSON")
+    compact_parser = commands.add_parser('compact', help="merge the segments of every model")
+    compact_parser.add_argument('trace_dir', nargs='?', default=TRACE_DIR)
+    legacy_parser = commands.add_parser('import-legacy', help="convert run_time_record/<model>.json files")
+    legacy_parser.add_argument('run_time_dir', nargs='?', default='./run_time_record')
+    legacy_parser.add_argument('trace_dir', nargs='?', default=TRACE_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'summary':
+        result = summarize(args.trace_dir)
+        _print_summary(result)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2)
+            print(f"Summary saved to {args.output}")
+    elif args.command == 'compact':
+        for directory, segments, spans in compact(args.trace_dir):
+            print(f"{directory}: {segments} segments, {spans} spans")
+    else:
+        if not os.path.isdir(args.run_time_dir):
+            sys.exit(f"Not a directory: {args.run_time_dir}")
+        for model, path in import_legacy(args.run_time_dir, args.trace_dir):
+            print(f"{model} -> {path}")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules under test are imported the way the pipelines and the server import them
+sys.path.insert(0, os.path.join(ROOT, 'Shared'))
+sys.path.insert(0, os.path.join(ROOT, 'Interface'))
@@ -0,0 +1,90 @@
+import json
+
+import history_store
+from history_store import (
+    append_record, append_record_async, latest_record, log_path, migrate, read_records, rewrite_records
+)
+
+
+def _legacy(tmp_path, name, records):
+    path = tmp_path / name
+    path.write_text(json.dumps(records), encoding='utf-8')
+    return str(path)
+
+
+def test_log_path():
+    assert log_path('./history/const-history.json') == './history/const-history.jsonl'
+    assert log_path('./history/notes') == './history/notes.jsonl'
+
+
+def test_append_and_read(tmp_path):
+    path = str(tmp_path / 'history' / 'history.json')
+    assert read_records(path) == []
+    assert latest_record(path) is None
+    append_record(path, {'n': 1})
+    append_record(path, {'n': 2, 'text': 'héllo'})
+    assert read_records(path) == [{'n': 1}, {'n': 2, 'text': 'héllo'}]
+    assert latest_record(path) == {'n': 2, 'text': 'héllo'}
+
+
+def test_legacy_history_is_read_and_migrated_on_first_write(tmp_path):
+    path = _legacy(tmp_path, 'claude-code.json', [{'n': 1}, {'n': 2}])
+    assert read_records(path) == [{'n': 1}, {'n': 2}]
+    assert latest_record(path) == {'n': 2}
+    append_record(path, {'n': 3})
+    assert read_records(path) == [{'n': 1}, {'n': 2}, {'n': 3}]
+    # The legacy file is never modified
+    assert json.loads((tmp_path / 'claude-code.json').read_text(encoding='utf-8')) == [{'n': 1}, {'n': 2}]
+
+
+def test_latest_record_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_store, '_CHUNK_SIZE', 7)
+    path = str(tmp_path / 'history.json')
+    for n in range(20):
+        append_record(path, {'n': n, 'text': 'x' * n})
+    assert latest_record(path) == {'n': 19, 'text': 'x' * 19}
+
+
+def test_line_cut_short_is_skipped(tmp_path):
+    path = str(tmp_path / 'history.json')
+    append_record(path, {'n': 1})
+    with open(log_path(path), 'a', encoding='utf-8') as f:
+        f.write('{"n": 2, "te')
+    assert read_records(path) == [{'n': 1}]
+    assert latest_record(path) == {'n': 1}
+
+
+def test_rewrite_records(tmp_path):
+    path = str(tmp_path / 'history.json')
+    for n in range(3):
+        append_record(path, {'n': n})
+    rewrite_records(path, [{'n': 0}, {'n': 2}])
+    assert read_records(path) == [{'n': 0}, {'n': 2}]
+    assert latest_record(path) == {'n': 2}
+
+
+def test_append_record_async_keeps_order(tmp_path):
+    path = str(tmp_path / 'claude-refinement.json')
+    for n in range(50):
+        append_record_async(path, {'n': n})
+    history_store.flush()
+    assert read_records(path) == [{'n': n} for n in range(50)]
+
+
+def test_migrate(tmp_path):
+    _legacy(tmp_path, 'history.json', [{'n': 1}, {'n': 2}])
+    _legacy(tmp_path, 'const-history.json', {'n': 1})
+    _legacy(tmp_path, 'mismatch_traces.json', [{'trace': '<init>'}])
+    migrated = migrate(str(tmp_path))
+    assert sorted(migrated) == [('const-history.json', 1), ('history.json', 2)]
+    assert read_records(str(tmp_path / 'const-history.json')) == [{'n': 1}]
+    # Snapshots are not logs, and a history is only migrated once
+    assert not (tmp_path / 'mismatch_traces.jsonl').exists()
+    assert migrate(str(tmp_path)) == []
+
+
+def test_migrate_remove_legacy(tmp_path):
+    _legacy(tmp_path, 'history.json', [{'n': 1}])
+    migrate(str(tmp_path), remove_legacy=True)
+    assert not (tmp_path / 'history.json').exists()
+    assert read_records(str(tmp_path / 'history.json')) == [{'n': 1}]
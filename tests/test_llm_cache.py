@@ -0,0 +1,81 @@
+import json
+import os
+
+import llm_cache
+from llm_cache import cache_get, cache_put, cache_stats, is_cacheable
+from llm_replay import as_response, request_key
+
+PARAMS = {
+    'model': 'gpt-4o',
+    'messages': [{'role': 'system', 'content': 'You write PAT models.'}, {'role': 'user', 'content': 'Peterson'}],
+    'max_tokens': 1024
+}
+
+
+def _openai(text):
+    return as_response({'choices': [{'message': {'role': 'assistant', 'content': text}}], 'model': 'gpt-4o'})
+
+
+def _anthropic(text):
+    return as_response({'content': [{'type': 'text', 'text': text}], 'model': 'claude'})
+
+
+def test_request_key():
+    key = request_key('openai', PARAMS)
+    assert request_key('openai', dict(reversed(list(PARAMS.items())))) == key
+    assert request_key('anthropic', PARAMS) != key
+    assert request_key('openai', {**PARAMS, 'max_tokens': 2048}) != key
+    assert request_key('openai', {**PARAMS, 'messages': PARAMS['messages'][1:]}) != key
+
+
+def test_put_and_get(tmp_path):
+    cache_dir = str(tmp_path)
+    hits, misses = cache_stats['hits'], cache_stats['misses']
+    assert cache_get('openai', PARAMS, cache_dir) is None
+    cache_put('openai', PARAMS, _openai('var x = 0;'), cache_dir)
+    response = cache_get('openai', PARAMS, cache_dir)
+    assert response.choices[0].message.content == 'var x = 0;'
+    assert cache_get('openai', {**PARAMS, 'model': 'gpt-4.1'}, cache_dir) is None
+    assert (cache_stats['hits'], cache_stats['misses']) == (hits + 1, misses + 2)
+    assert os.listdir(tmp_path) == ['openai']
+
+
+def test_anthropic_responses(tmp_path):
+    cache_put('anthropic', PARAMS, _anthropic('#assert P() deadlockfree;'), str(tmp_path))
+    assert cache_get('anthropic', PARAMS, str(tmp_path)).content[0].text == '#assert P() deadlockfree;'
+
+
+def test_empty_answers_are_not_cached(tmp_path):
+    assert not is_cacheable('openai', _openai(''))
+    assert not is_cacheable('anthropic', as_response({'content': []}))
+    cache_put('openai', PARAMS, _openai(''), str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    cache_put('openai', PARAMS, _openai('var x = 0;'), str(tmp_path))
+    entry_path = os.path.join(str(tmp_path), 'openai', f"{request_key('openai', PARAMS)}.json")
+    with open(entry_path, 'r', encoding='utf-8') as f:
+        entry = json.load(f)
+    entry['created'] -= 3600
+    with open(entry_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    monkeypatch.setattr(llm_cache, 'LLM_CACHE_TTL', 60)
+    assert cache_get('openai', PARAMS, str(tmp_path)) is None
+    assert not os.path.exists(entry_path)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path)
+    requests = [{**PARAMS, 'max_tokens': n} for n in range(4)]
+    paths = [os.path.join(cache_dir, 'openai', f"{request_key('openai', params)}.json") for params in requests]
+    for n in range(3):
+        cache_put('openai', requests[n], _openai('var x = 0;'), cache_dir)
+        os.utime(paths[n], (1000 + n, 1000 + n))
+    # Reading the oldest entry makes it the most recently used
+    assert cache_get('openai', requests[0], cache_dir) is not None
+    # Room for three entries (their sizes differ by a few bytes)
+    entry_size = os.path.getsize(paths[0])
+    monkeypatch.setattr(llm_cache, 'LLM_CACHE_MAX_BYTES', 3 * entry_size + entry_size // 2)
+    cache_put('openai', requests[3], _openai('var x = 0;'), cache_dir)
+    assert [os.path.exists(path) for path in paths] == [True, False, True, True]
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+import llm_replay
+from llm_replay import as_response, next_recording, replay, reset, save, summarize
+
+PARAMS = {'model': 'claude', 'system': 'You write PAT models.', 'messages': [{'role': 'user', 'content': 'Peterson'}]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_replay_state(monkeypatch):
+    # What this process has read and replayed, per request
+    monkeypatch.setattr(llm_replay, '_recordings', {})
+    monkeypatch.setattr(llm_replay, '_replayed', {})
+
+
+def _answer(text):
+    return as_response({'content': [{'type': 'text', 'text': text}], 'model': 'claude'})
+
+
+def _record(recording_dir, params, texts):
+    for n, text in enumerate(texts):
+        save('anthropic', params, _answer(text), latency=0.5 + n, recording_dir=recording_dir)
+
+
+def _text(record):
+    return record['response']['content'][0]['text']
+
+
+def test_identical_requests_replay_in_recorded_order(tmp_path):
+    _record(str(tmp_path), PARAMS, ['first', 'second', 'third'])
+    replayed = [_text(next_recording('anthropic', PARAMS, str(tmp_path))) for _ in range(5)]
+    # The last recording answers once they are used up
+    assert replayed == ['first', 'second', 'third', 'third', 'third']
+
+
+def test_requests_are_replayed_independently(tmp_path):
+    other = {**PARAMS, 'messages': [{'role': 'user', 'content': 'Dijkstra'}]}
+    _record(str(tmp_path), PARAMS, ['p1', 'p2'])
+    _record(str(tmp_path), other, ['d1', 'd2'])
+    assert _text(next_recording('anthropic', PARAMS, str(tmp_path))) == 'p1'
+    assert _text(next_recording('anthropic', other, str(tmp_path))) == 'd1'
+    assert _text(next_recording('anthropic', PARAMS, str(tmp_path))) == 'p2'
+    assert _text(next_recording('anthropic', other, str(tmp_path))) == 'd2'
+
+
+def test_reset_starts_from_the_first_recording(tmp_path):
+    _record(str(tmp_path), PARAMS, ['first', 'second'])
+    next_recording('anthropic', PARAMS, str(tmp_path))
+    next_recording('anthropic', PARAMS, str(tmp_path))
+    reset()
+    assert _text(next_recording('anthropic', PARAMS, str(tmp_path))) == 'first'
+
+
+def test_request_never_recorded(tmp_path):
+    with pytest.raises(LookupError, match='LLM_MODE=record'):
+        next_recording('anthropic', PARAMS, str(tmp_path))
+
+
+def test_replay_returns_an_sdk_like_response(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_replay, 'LLM_REPLAY_LATENCY_SCALE', 0.0)
+    _record(str(tmp_path), PARAMS, ['var x = 0;'])
+    response = asyncio.run(replay('anthropic', PARAMS, str(tmp_path)))
+    assert response.content[0].text == 'var x = 0;'
+    assert response.model == 'claude'
+
+
+def test_replay_delay(monkeypatch):
+    monkeypatch.setattr(llm_replay, 'LLM_REPLAY_LATENCY_SCALE', 0.5)
+    assert llm_replay._replay_delay({'latency': 3.0}) == 1.5
+    monkeypatch.setattr(llm_replay, 'LLM_REPLAY_LATENCY', '2')
+    assert llm_replay._replay_delay({'latency': 3.0}) == 1.0
+
+
+def test_summarize(tmp_path):
+    _record(str(tmp_path), PARAMS, ['first', 'second'])
+    _record(str(tmp_path), {**PARAMS, 'model': 'other'}, ['only'])
+    assert summarize(str(tmp_path)) == {('anthropic', 'claude'): (1, 2, 2.0), ('anthropic', 'other'): (1, 1, 0.5)}
@@ -0,0 +1,56 @@
+import os
+
+import pat_cache
+from pat_cache import cache_get, cache_key, cache_put, cache_stats, is_cacheable, normalize_block
+
+OUTPUT = """=======================================================
+Assertion: P() deadlockfree
+********Verification Result********
+The Assertion (P() deadlockfree) is VALID.
+"""
+
+BLOCK = "var x = 0;\nP() = a -> P();\n#assert P() deadlockfree;"
+
+
+def test_normalize_block():
+    noisy = "var x = 0;   \r\n\r\n// the process\nP() = a -> P();\n  // the assertion\n#assert P() deadlockfree;\n"
+    assert normalize_block(noisy) == BLOCK
+
+
+def test_cache_key():
+    key = cache_key(BLOCK, None, 'v1')
+    assert cache_key(BLOCK.replace('\n', '\r\n') + '\n// done\n', None, 'v1') == key
+    assert cache_key(BLOCK.replace('x = 0', 'x = 1'), None, 'v1') != key
+    assert cache_key(BLOCK, '-engine 1', 'v1') != key
+    assert cache_key(BLOCK, None, 'v2') != key
+
+
+def test_put_and_get(tmp_path):
+    cache_dir = str(tmp_path)
+    key = cache_key(BLOCK, None, 'v1')
+    hits, misses = cache_stats['hits'], cache_stats['misses']
+    assert cache_get(cache_dir, key) is None
+    cache_put(cache_dir, key, OUTPUT, None, 'v1')
+    assert cache_get(cache_dir, key) == OUTPUT
+    assert (cache_stats['hits'], cache_stats['misses']) == (hits + 1, misses + 1)
+
+
+def test_outputs_without_result_are_not_cached(tmp_path):
+    assert not is_cacheable("")
+    assert not is_cacheable("Parsing Error: the process P is not defined.")
+    cache_put(str(tmp_path), 'key', "", None, 'v1')
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path)
+    keys = [f"key{n}" for n in range(4)]
+    for n, key in enumerate(keys[:3]):
+        cache_put(cache_dir, key, OUTPUT, None, 'v1')
+        os.utime(os.path.join(cache_dir, f"{key}.json"), (1000 + n, 1000 + n))
+    # Reading the oldest entry makes it the most recently used
+    assert cache_get(cache_dir, keys[0]) == OUTPUT
+    entry_size = os.path.getsize(os.path.join(cache_dir, f"{keys[0]}.json"))
+    monkeypatch.setattr(pat_cache, 'PAT_CACHE_MAX_BYTES', 3 * entry_size)
+    cache_put(cache_dir, keys[3], OUTPUT, None, 'v1')
+    assert sorted(os.listdir(cache_dir)) == ['key0.json', 'key2.json', 'key3.json']
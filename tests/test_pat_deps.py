@@ -0,0 +1,96 @@
+from pat_deps import affected_blocks, dependency_cone, parse_model, split_declarations
+from pat_runner import split_code_and_assertions
+
+MODEL = """#define N 2;
+var x = 0;
+var y = 1;
+enum {idle, busy};
+channel c 1;
+
+P() = [x < N] inc{x = x + 1;} -> P();
+Q() = c!y -> Q();
+Sys() = P() ||| Q();
+
+#assert P() deadlockfree;
+#define goal y == 2;
+#assert Sys() reaches goal;
+"""
+
+
+def _affected(previous, refined):
+    return affected_blocks(split_code_and_assertions(previous), split_code_and_assertions(refined))
+
+
+def test_split_declarations_one_per_line():
+    declarations = split_declarations(MODEL)
+    assert declarations[:4] == ['#define N 2;', 'var x = 0;', 'var y = 1;', 'enum {idle, busy};']
+    assert 'P() = [x < N] inc{x = x + 1;} -> P();' in declarations
+    assert declarations[-1] == '#assert Sys() reaches goal;'
+
+
+def test_split_declarations_on_one_line():
+    assert split_declarations("var x = 0; var y = 1;") == ['var x = 0;', 'var y = 1;']
+    assert split_declarations("#define A 1; #define B 2;") == ['#define A 1;', '#define B 2;']
+
+
+def test_split_declarations_drops_comments():
+    assert split_declarations("var x = 0; // var y = 1;\n/* var z; */ var w;") == ['var x = 0;', 'var w;']
+
+
+def test_sequential_composition_stays_in_its_process():
+    code = "P() = Q(); done{count = count + 1;} -> P();\nvar count = 0;"
+    assert split_declarations(code) == ['P() = Q(); done{count = count + 1;} -> P();', 'var count = 0;']
+
+
+def test_parse_model_names():
+    named, unnamed, asserts = parse_model(MODEL + "var a = 0, b = [1, 2];\nSystem = P() ||| Q();\n")
+    for name in ('N', 'x', 'y', 'idle', 'busy', 'c', 'P', 'Q', 'Sys', 'goal', 'a', 'b', 'System'):
+        assert name in named, name
+    assert unnamed == []
+    assert asserts == ['#assert P() deadlockfree;', '#assert Sys() reaches goal;']
+
+
+def test_dependency_cone_is_transitive():
+    named, _, asserts = parse_model(MODEL)
+    assert dependency_cone(named, asserts[0]) == {
+        '#define N 2;', 'var x = 0;', 'P() = [x < N] inc{x = x + 1;} -> P();'
+    }
+    cone = dependency_cone(named, asserts[1])
+    assert {'var y = 1;', 'channel c 1;', 'Q() = c!y -> Q();', '#define goal y == 2;'} <= cone
+
+
+def test_unrelated_change_is_not_affected():
+    assert _affected(MODEL, MODEL.replace('Q() = c!y -> Q();', 'Q() = c!y -> c!y -> Q();')) == [1]
+    assert _affected(MODEL, MODEL.replace('var x = 0;', 'var x = 1;')) == [0, 1]
+    assert _affected(MODEL, MODEL.replace('\n\nP()', '\n// the counter\nP()')) == []
+
+
+def test_change_outside_every_cone_is_parsed_once():
+    assert _affected(MODEL, MODEL.replace('var y = 1;', 'var y = 1;\nvar unused = 0;')) == [0]
+
+
+def test_new_assertion_affects_every_block():
+    assert _affected(MODEL, MODEL + "#assert Q() deadlockfree;\n") == [0, 1, 2]
+
+
+def test_variables_declared_on_one_line():
+    previous = MODEL.replace('var x = 0;\nvar y = 1;', 'var x = 0; var y = 1;')
+    assert _affected(previous, previous.replace('var y = 1;', 'var y = 5;')) == [1]
+    assert _affected(previous, previous.replace('var x = 0;', 'var x = 5;')) == [0, 1]
+
+
+def test_defines_declared_on_one_line():
+    previous = MODEL.replace('#define goal y == 2;', '#define other 3; #define goal y == 2;')
+    assert _affected(previous, previous.replace('#define goal y == 2;', '#define goal y == 3;')) == [1]
+
+
+def test_variable_used_after_sequential_composition():
+    previous = MODEL.replace('P() = [x < N] inc{x = x + 1;} -> P();', 'P() = Skip; [x < N] inc{x = x + 1;} -> P();')
+    assert _affected(previous, previous.replace('var x = 0;', 'var x = 5;')) == [0, 1]
+
+
+def test_unrecognised_text_depends_on_everything_it_refers_to():
+    previous = MODEL.replace('var y = 1;', 'var y = 1; unknown(x);')
+    # `unknown(x)` may change the meaning of the model, so a change to x can affect every assertion
+    assert _affected(previous, previous.replace('var x = 0;', 'var x = 5;')) == [0, 1]
+    assert _affected(previous, previous.replace('unknown(x);', 'unknown(y);')) == [0, 1]
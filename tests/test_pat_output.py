@@ -0,0 +1,93 @@
+from pat_output import PatResult, parse_assertion_output, parse_file, parse_output, total_visited_states
+
+VALID = """=======================================================
+Assertion: telecom_service() deadlockfree
+********Verification Result********
+The Assertion (telecom_service() deadlockfree) is VALID.
+
+********Verification Setting********
+Admissible Behavior: All
+Search Engine: Shortest Witness Trace using Breadth First Search
+System Abstraction: False
+
+
+********Verification Statistics********
+Visited States:4059
+Total Transitions:19116
+Time Used:0.4072176s
+Estimated Memory Used:13624.008KB
+"""
+
+INVALID = """=======================================================
+Assertion: aSys1() deadlockfree
+********Verification Result********
+The Assertion (aSys1() deadlockfree) is NOT valid.
+The following trace leads to a deadlock situation.
+<init -> c.[0, 0].1 -> τ -> ac!0.1>
+
+********Verification Setting********
+Admissible Behavior: All
+Search Engine: First Witness Trace using Depth First Search
+System Abstraction: False
+
+
+********Verification Statistics********
+Visited States:8
+Total Transitions:7
+Time Used:0.0078907s
+Estimated Memory Used:8522.248KB
+
+
+"""
+
+
+def test_valid_assertion():
+    result = parse_assertion_output(VALID)
+    assert result.assertion == 'telecom_service() deadlockfree'
+    assert result.result_text == 'The Assertion (telecom_service() deadlockfree) is VALID.'
+    assert result.verdict == 'Valid'
+    assert result.trace == []
+    assert result.trace_text == ""
+    assert result.engine == 'Shortest Witness Trace using Breadth First Search'
+    assert result.settings['System Abstraction'] == 'False'
+    assert result.statistics == {
+        'visitedStates': 4059, 'totalTransitions': 19116, 'timeUsed': 0.4072176, 'memoryKB': 13624.008
+    }
+
+
+def test_invalid_assertion_with_trace():
+    result = parse_assertion_output(INVALID)
+    assert result.verdict == 'Invalid'
+    assert result.trace == ['init', 'c.[0, 0].1', 'τ', 'ac!0.1']
+    assert result.trace_text == '<init -> c.[0, 0].1 -> τ -> ac!0.1>'
+    assert result.engine == 'First Witness Trace using Depth First Search'
+    assert result.statistics['visitedStates'] == 8
+
+
+def test_several_assertions_in_one_output():
+    results = parse_output(VALID + INVALID)
+    assert [result.assertion for result in results] == ['telecom_service() deadlockfree', 'aSys1() deadlockfree']
+    assert [result.verdict for result in results] == ['Valid', 'Invalid']
+    assert results[0].statistics['visitedStates'] == 4059
+
+
+def test_output_without_result():
+    assert parse_assertion_output("") == PatResult()
+    result = parse_assertion_output("Parsing Error: the process P is not defined.\n")
+    assert result.result_text is None
+    assert result.verdict == ""
+    assert result.statistics['visitedStates'] is None
+
+
+def test_parse_file_with_windows_line_endings(tmp_path):
+    path = tmp_path / 'pat_output_0.txt'
+    path.write_bytes((VALID + INVALID).replace('\n', '\r\n').encode('utf-8'))
+    results = parse_file(str(path))
+    assert [result.verdict for result in results] == ['Valid', 'Invalid']
+    assert results[1].trace[-1] == 'ac!0.1'
+
+
+def test_total_visited_states():
+    results = [{'statistics': {'visitedStates': 8}}, {'statistics': {'visitedStates': None}}, {}]
+    assert total_visited_states(results) == 8
+    assert total_visited_states([{}]) is None
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+import rules_classical_algos
+from rules_classical_algos import (
+    GENERATORS, Param, describe_parameters, get_generator, parameter_schema, parse_parameters, process_classical_algos
+)
+
+DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Interface', 'database-algorithm.json')
+
+
+def _smallest_values(params):
+    return [param.choices[0] if param.choices else param.minimum for param in params]
+
+
+def test_every_generator_is_in_the_database():
+    with open(DATABASE, 'r', encoding='utf-8') as f:
+        algo_ids = {entry.get('id') for entry in json.load(f)}
+    assert set(GENERATORS) <= algo_ids
+
+
+@pytest.mark.parametrize('algo_id', sorted(GENERATORS))
+def test_every_generator_builds_a_model(algo_id):
+    values = _smallest_values(get_generator(algo_id).params)
+    code = process_classical_algos(algo_id, " ".join(str(value) for value in values))
+    assert '#assert' in code
+
+
+def test_param_parse():
+    count = Param('n', minimum=2, maximum=4)
+    assert count.parse(' 3 ') == 3
+    assert count.parse('1') is None
+    assert count.parse('5') is None
+    assert count.parse('two') is None
+    kind = Param('event_type', choices=('tau', 'explicit'))
+    assert kind.parse('TAU') == 'tau'
+    assert kind.parse('other') is None
+
+
+def test_parse_parameters():
+    assert parse_parameters('peterson', '3') == (3,)
+    assert parse_parameters('peterson', 3) == (3,)
+    assert parse_parameters('concurrent_stack', '2, 1 explicit') == (2, 1, 'explicit')
+
+
+@pytest.mark.parametrize('algo_id, var_value, message', [
+    ('peterson', '1', "Please enter a valid number which is at least 2!"),
+    ('needham', 'new', "Please enter either 'original' or 'fixed'!"),
+    ('2dchannel', '2', "each of the two variables"),
+    ('2dchannel', '2 1', "adhere to the requirements"),
+    ('no_such_algorithm', '2', "does not exist"),
+])
+def test_invalid_parameters(algo_id, var_value, message):
+    with pytest.raises(ValueError, match=message):
+        process_classical_algos(algo_id, var_value)
+
+
+def test_describe_parameters():
+    assert describe_parameters('peterson') == "num_processes (at least 2)"
+    assert describe_parameters('2dchannel') == "num_rows (at least 2) and num_cols (at least 2)"
+    assert describe_parameters('concurrent_stack') == (
+        "num_processes (at least 2), stack_length (at least 1), and event_type (either 'tau' or 'explicit')"
+    )
+    assert describe_parameters('rubik_cube') == ""
+
+
+def test_parameter_schema():
+    assert parameter_schema('peg') == [{'name': 'game_setting', 'type': 'int', 'minimum': 1, 'maximum': 9}]
+    assert parameter_schema('needham') == [{'name': 'version', 'type': 'choice', 'choices': ['original', 'fixed']}]
+    assert parameter_schema('rubik_cube') == []
+
+
+def test_generated_code_is_memoized():
+    first = process_classical_algos('peterson', '2')
+    hits = rules_classical_algos._generate.cache_info().hits
+    assert process_classical_algos('peterson', ' 2') is first
+    assert rules_classical_algos._generate.cache_info().hits == hits + 1
+    assert process_classical_algos('peterson', '3') != first